@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Admission Control
+Per-client token buckets and fair, bounded per-endpoint-class concurrency
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+# Requests are 'cheap' unless their path starts with one of these prefixes
+EXPENSIVE_PREFIXES = ('/api/stats', '/api/metadata/', '/api/upload', '/api/download/')
+
+# Tokens a request of each class takes from its client's bucket
+ENDPOINT_COSTS = {'cheap': 1, 'expensive': 5}
+
+# Defaults, overridable with the FAF_* environment variables in from_env()
+RATE_LIMIT = 20.0          # tokens per second per client
+RATE_BURST = 40.0          # bucket size
+CONCURRENCY_LIMITS = {'cheap': 32, 'expensive': 4}
+QUEUE_LIMIT = 128          # waiting requests per endpoint class
+CLIENT_QUEUE_LIMIT = 16    # waiting requests per client per endpoint class
+QUEUE_TIMEOUT = 5.0        # seconds a request may wait for a slot
+MAX_CLIENTS = 10_000       # buckets kept; least recently seen are dropped
+
+
+class AdmissionRejected(Exception):
+    """A request refused by admission control (429 rate limited, 503 overloaded)"""
+    
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``; refilled lazily"""
+    
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def take(self, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; returns 0 if admitted, else seconds until they are available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class FairLimiter:
+    """
+    Run at most ``limit`` requests at once. Requests beyond that wait in
+    per-client queues served round-robin, so one client with many queued
+    requests delays everyone else by at most one request per turn. Waiting
+    is bounded by ``queue_limit``, ``client_queue_limit`` and ``timeout``;
+    past any of them the request is shed with a 503.
+    """
+    
+    def __init__(self, limit: int, queue_limit: int = QUEUE_LIMIT,
+                 client_queue_limit: int = CLIENT_QUEUE_LIMIT, timeout: float = QUEUE_TIMEOUT):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.client_queue_limit = client_queue_limit
+        self.timeout = timeout
+        self.active = 0
+        self.queued = 0
+        self.shed = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+    
+    async def acquire(self, client: str):
+        if self.active < self.limit and not self.queued:
+            self.active += 1
+            return
+        waiters = self._queues.get(client)
+        if self.queued >= self.queue_limit or (waiters and len(waiters) >= self.client_queue_limit):
+            self.shed += 1
+            raise AdmissionRejected(503, self.timeout, "Server busy: request queue full")
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                self.release()  # the slot arrived as we gave up
+            else:
+                self._discard(client, future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed += 1
+            raise AdmissionRejected(503, self.timeout, "Server busy: timed out waiting for capacity")
+    
+    def release(self):
+        """Hand the slot to the next client in turn, or free it"""
+        while self._queues:
+            client, waiters = next(iter(self._queues.items()))
+            future = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+    
+    def _discard(self, client: str, future: asyncio.Future):
+        waiters = self._queues.get(client)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            if not waiters:
+                del self._queues[client]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'limit': self.limit, 'active': self.active, 'queued': self.queued,
+                'waiting_clients': len(self._queues), 'shed': self.shed}
+
+
+class AdmissionController:
+    """
+    Admission control for the API server: a token bucket per client (a
+    configured API key, else the address) and a FairLimiter per endpoint
+    class. Runs on the event loop thread only, so it needs no locks.
+    """
+    
+    def __init__(self, rate: float = RATE_LIMIT, burst: float = RATE_BURST,
+                 limits: Optional[Dict[str, int]] = None, queue_limit: int = QUEUE_LIMIT,
+                 client_queue_limit: int = CLIENT_QUEUE_LIMIT, queue_timeout: float = QUEUE_TIMEOUT,
+                 max_clients: int = MAX_CLIENTS, api_keys: Iterable[str] = ()):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.api_keys = frozenset(api_keys)
+        self.limiters = {
+            endpoint_class: FairLimiter(limit, queue_limit, client_queue_limit, queue_timeout)
+            for endpoint_class, limit in {**CONCURRENCY_LIMITS, **(limits or {})}.items()
+        }
+        self.rate_limited = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+    
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build from FAF_RATE_LIMIT, FAF_RATE_BURST, FAF_CONCURRENCY_CHEAP/EXPENSIVE, FAF_QUEUE_* and FAF_API_KEYS"""
+        env = os.environ.get
+        return cls(
+            rate=float(env("FAF_RATE_LIMIT", RATE_LIMIT)),
+            burst=float(env("FAF_RATE_BURST", RATE_BURST)),
+            limits={'cheap': int(env("FAF_CONCURRENCY_CHEAP", CONCURRENCY_LIMITS['cheap'])),
+                    'expensive': int(env("FAF_CONCURRENCY_EXPENSIVE", CONCURRENCY_LIMITS['expensive']))},
+            queue_limit=int(env("FAF_QUEUE_LIMIT", QUEUE_LIMIT)),
+            client_queue_limit=int(env("FAF_CLIENT_QUEUE_LIMIT", CLIENT_QUEUE_LIMIT)),
+            queue_timeout=float(env("FAF_QUEUE_TIMEOUT", QUEUE_TIMEOUT)),
+            api_keys=[key.strip() for key in env("FAF_API_KEYS", "").split(",") if key.strip()]
+        )
+    
+    def client_id(self, api_key: Optional[str], address: Optional[str]) -> str:
+        """
+        Bucket by API key only when it is one of ``api_keys`` (FAF_API_KEYS,
+        comma-separated). Any other key is ignored and the request is bucketed
+        by address, so a client cannot mint a fresh full bucket per request.
+        """
+        if api_key and api_key in self.api_keys:
+            return f"key:{api_key}"
+        return f"addr:{address or 'unknown'}"
+    
+    @staticmethod
+    def endpoint_class(path: str) -> str:
+        return 'expensive' if path.startswith(EXPENSIVE_PREFIXES) else 'cheap'
+    
+    def check_rate(self, client: str, cost: float = 1.0):
+        """Take ``cost`` tokens from ``client``'s bucket or raise a 429"""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take(cost)
+        if wait:
+            self.rate_limited += 1
+            raise AdmissionRejected(429, wait, "Rate limit exceeded")
+    
+    async def admit(self, client: str, path: str) -> FairLimiter:
+        """Take a slot for one request; the caller calls ``release()`` on the returned limiter once done"""
+        endpoint_class = self.endpoint_class(path)
+        self.check_rate(client, ENDPOINT_COSTS.get(endpoint_class, 1))
+        limiter = self.limiters[endpoint_class]
+        await limiter.acquire(client)
+        return limiter
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self._buckets),
+            'rate_limited': self.rate_limited,
+            'rate': self.rate,
+            'burst': self.burst,
+            'classes': {name: limiter.stats() for name, limiter in self.limiters.items()}
+        }
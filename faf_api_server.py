@@ -4,18 +4,41 @@ FAF File Tools API Server
 FastAPI implementation for file operations via HTTP
 """
 
-from fastapi import FastAPI, HTTPException, File, UploadFile, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, File, UploadFile, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, field_serializer
+from typing import Optional, List, Dict, Any, Literal, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
 import os
+import asyncio
+import queue
+import base64
 import json
-import hashlib
+import stat
+import threading
+import time
 import aiofiles
 from pathlib import Path
-import uvicorn
+
+from faf_admission import AdmissionController, AdmissionRejected
+from faf_file_tools import hash_file, msgpack
+from faf_tracing import enabled as tracing_enabled, span, start_trace
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the storage directory; release background resources on shutdown"""
+    global _access_log
+    BASE_PATH.mkdir(parents=True, exist_ok=True)
+    yield
+    if _watcher is not None:
+        _watcher.stop()
+    if _access_log is not None:
+        _access_log.close()
+        _access_log = None
 
 
 # FastAPI app initialization
@@ -24,7 +47,8 @@ app = FastAPI(
     description="🏎️ High-performance file operations API powered by FAF",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -40,14 +64,89 @@ app.add_middleware(
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_EXTENSIONS = {'.py', '.js', '.ts', '.json', '.md', '.txt', '.yaml', '.html', '.css'}
 FORBIDDEN_PATHS = ['/etc', '/sys', '/proc', '/dev', '/boot']
+# Created at startup (lifespan), not on import
 BASE_PATH = Path("./faf_storage")
-BASE_PATH.mkdir(exist_ok=True)
+EVENTS_MAX_WAIT_S = 60.0
+EVENTS_KEEPALIVE_S = 15.0
+
+# Change watcher over BASE_PATH, started on first use of the events endpoints
+_watcher: Optional["ChangeWatcher"] = None
+_watcher_lock = threading.Lock()
+
+
+class AccessMetrics(deque):
+    """
+    Bounded deque of access records that keeps running per-operation totals
+    of its successful records' durations, so mean latencies cost O(1).
+    Records enter through append() and leave by eviction or clear().
+    """
+    
+    def __init__(self, maxlen: int):
+        super().__init__(maxlen=maxlen)
+        self.totals: Dict[str, List] = {}  # operation -> [total duration_ms, count]
+    
+    def append(self, record: Dict[str, Any]):
+        if len(self) == self.maxlen:
+            self._count(self[0], -1)
+        super().append(record)
+        self._count(record, 1)
+    
+    def clear(self):
+        super().clear()
+        self.totals.clear()
+    
+    def mean_latency(self, operation: str) -> Optional[float]:
+        total, count = self.totals.get(operation, (0.0, 0))
+        return round(total / count, 2) if count else None
+    
+    def _count(self, record: Dict[str, Any], sign: int):
+        if record["success"]:
+            totals = self.totals.setdefault(record["operation"], [0.0, 0])
+            totals[1] += sign
+            # Reset at zero so float error cannot accumulate across evictions
+            totals[0] = totals[0] + sign * record["duration_ms"] if totals[1] else 0.0
+
+
+# Per-request timings in FAFPythonBridge operation-record shape, kept in
+# memory for /api/metrics and appended to FAF_ACCESS_LOG (JSON Lines) if set
+ACCESS_METRICS_LIMIT = 10000
+ACCESS_LOG_PATH = os.environ.get("FAF_ACCESS_LOG")
+access_metrics = AccessMetrics(ACCESS_METRICS_LIMIT)
+_access_log: Optional["AccessLogWriter"] = None
+
+# Opt-in request profiling (see faf_profiling): FAF_PROFILE=sampling|cprofile
+# profiles every API request; with FAF_PROFILE_HEADER=1 a client may request
+# it per call with "X-FAF-Profile: sampling|cprofile". The output path is
+# returned in X-FAF-Profile-Output.
+PROFILE_MODE = os.environ.get("FAF_PROFILE", "")
+PROFILE_HEADER_ENABLED = os.environ.get("FAF_PROFILE_HEADER") == "1"
+
+# Response formats chosen from the Accept header: JSON, msgpack when the
+# msgpack package is installed (no string escaping, bytes stay binary), and
+# the file itself for /api/read in bytes mode
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+OCTET_STREAM_MEDIA_TYPE = "application/octet-stream"
+RESPONSE_MEDIA_TYPES = (JSON_MEDIA_TYPE,) + (MSGPACK_MEDIA_TYPES if msgpack is not None else ())
+
+# Admission control (see faf_admission): with FAF_ADMISSION=1 every client
+# (an X-API-Key listed in FAF_API_KEYS, else the address) gets a token bucket
+# and each endpoint class a bounded, fairly queued concurrency limit; refusals
+# are 429/503 with Retry-After. Limits come from FAF_RATE_LIMIT etc.
+admission: Optional[AdmissionController] = (
+    AdmissionController.from_env() if os.environ.get("FAF_ADMISSION") == "1" else None)
+
+# Raw reads above this size are streamed from disk instead of sent as one body
+PASSTHROUGH_STREAM_BYTES = 1024 * 1024
 
 
 # Pydantic models
 class FileReadRequest(BaseModel):
     path: str = Field(..., description="File path to read")
     encoding: str = Field("utf-8", description="File encoding")
+    mode: Literal["text", "bytes"] = Field(
+        "text", description="'text' decodes with encoding; 'bytes' never decodes: the file is the "
+                            "body for Accept: application/octet-stream, binary in msgpack, base64 in JSON")
     
 class FileWriteRequest(BaseModel):
     path: str = Field(..., description="File path to write")
@@ -60,6 +159,13 @@ class FileOperationResponse(BaseModel):
     data: Optional[Any] = None
     timestamp: datetime = Field(default_factory=datetime.now)
     duration_ms: Optional[float] = None
+    
+    @field_serializer("data", when_used="json")
+    def _content_as_base64(self, data: Any) -> Any:
+        """Binary content (read in bytes mode) is standard base64 in JSON"""
+        if isinstance(data, dict) and isinstance(data.get("content"), bytes):
+            return {**data, "content": base64.b64encode(data["content"]).decode("ascii")}
+        return data
 
 class FileMetadata(BaseModel):
     path: str
@@ -90,11 +196,309 @@ def validate_path(path: str) -> bool:
 
 def get_file_hash(filepath: Path) -> str:
     """Calculate SHA-256 hash of file"""
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return hash_file(filepath)
+
+def stat_or_404(path: Path, detail: str = "File not found") -> os.stat_result:
+    """
+    Take the single stat() snapshot a request uses for existence, type,
+    size limits and the response; 404 if ``path`` does not exist.
+    """
+    try:
+        return path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail=detail)
+
+def tree_totals(root: Path) -> Tuple[int, int]:
+    """(files, bytes) below ``root`` in one os.scandir pass, one stat per file"""
+    files = size = 0
+    pending = [root]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    files += 1
+                    size += entry.stat().st_size
+    return files, size
+
+def start_watcher() -> "ChangeWatcher":
+    """Return the BASE_PATH change watcher, starting it if needed (blocks until armed)"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None or not _watcher.running:
+            from faf_watcher import ChangeWatcher
+            BASE_PATH.mkdir(parents=True, exist_ok=True)
+            _watcher = ChangeWatcher(BASE_PATH).start()
+        return _watcher
+
+async def get_watcher() -> "ChangeWatcher":
+    """The running change watcher; a first start (tree scan) runs off the event loop"""
+    watcher = _watcher
+    if watcher is not None and watcher.running:
+        return watcher
+    return await asyncio.to_thread(start_watcher)
+
+class AccessLogWriter:
+    """
+    Append access records to a JSON Lines file from a background thread, so
+    request handling never waits on serialization or disk. Records queued
+    together are written and flushed as one batch.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="faf-access-log", daemon=True)
+        self._thread.start()
+    
+    def write(self, record: Dict[str, Any]):
+        self._queue.put(record)
+    
+    def close(self):
+        """Flush queued records and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+    
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                f.write("".join(json.dumps(record) + "\n" for record in batch if record is not None))
+                f.flush()
+                if None in batch:
+                    return
+
+def record_access(record: Dict[str, Any]):
+    """Keep a request timing record and queue it for the access log"""
+    global _access_log
+    access_metrics.append(record)
+    if ACCESS_LOG_PATH:
+        if _access_log is None:
+            _access_log = AccessLogWriter(ACCESS_LOG_PATH)
+        _access_log.write(record)
+
+
+def measured_latency(operation: str) -> Optional[float]:
+    """Mean duration (ms) of the recorded successful requests for ``operation``"""
+    return access_metrics.mean_latency(operation)
+
+
+def negotiate(accept: Optional[str], offered: Tuple[str, ...] = RESPONSE_MEDIA_TYPES) -> str:
+    """
+    The offered media type ranked highest by an Accept header: by q-value,
+    then exact types over wildcards, then header order. Falls back to
+    ``offered[0]`` when nothing matches.
+    """
+    best, best_rank = offered[0], (0.0, -1)
+    for item in (accept or "").split(","):
+        media, *params = [part.strip().lower() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media in offered:
+            candidate, specificity = media, 1
+        elif media in ("*/*", "application/*"):
+            candidate, specificity = offered[0], 0
+        else:
+            continue
+        if q > 0 and (q, specificity) > best_rank:
+            best, best_rank = candidate, (q, specificity)
+    return best
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def model_response(model: BaseModel, accept: Optional[str] = None, status_code: int = 200) -> Response:
+    """Serialize a response model as JSON or msgpack (per ``accept``) inside a 'serialize' span"""
+    media_type = negotiate(accept)
+    with span("serialize", **{"response.media_type": media_type}) as s:
+        if media_type == JSON_MEDIA_TYPE:
+            body = model.model_dump_json()
+        else:
+            body = msgpack.packb(model.model_dump(), default=_msgpack_default)
+        s.set_attribute("response.bytes", len(body))
+    return Response(body, status_code=status_code, media_type=media_type)
+
+
+def operation_name(request: Request) -> str:
+    """Name a request after its route, e.g. /api/metadata/{path:path} -> api_metadata"""
+    route = request.scope.get("route")
+    parts = getattr(route, "path", request.url.path).strip("/").split("/")
+    return "_".join(parts[:2])
+
+
+def instrumented(path: str) -> bool:
+    """API requests are timed, traced, profiled and admitted; the long-lived event feeds are not"""
+    return path.startswith("/api/") and not path.startswith("/api/events")
+
+
+class ResponseWatch:
+    """ASGI ``send`` wrapper noting the response status and body size; can add headers and hook start/end"""
+    
+    __slots__ = ('send', 'status', 'size', 'headers', 'on_start', 'on_end')
+    
+    def __init__(self, send):
+        self.send = send
+        self.status = 500
+        self.size = 0
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.on_start = None
+        self.on_end = None
+    
+    async def __call__(self, message: Dict[str, Any]):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            if self.on_start is not None:
+                await self.on_start()
+            if self.headers:
+                message = dict(message, headers=list(message.get("headers", [])) + self.headers)
+        elif message["type"] == "http.response.body":
+            self.size += len(message.get("body", b""))
+            if not message.get("more_body", False) and self.on_end is not None:
+                on_end, self.on_end = self.on_end, None
+                try:
+                    return await self.send(message)
+                finally:
+                    on_end()
+        await self.send(message)
+
+
+class RequestInstrumentation:
+    """
+    Pure-ASGI middleware for API requests, layered from the outside in:
+    the root trace span and request profiling (when enabled), the timing
+    record for /api/metrics, and admission control (when enabled). A
+    disabled feature costs a flag check rather than a middleware hop.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not instrumented(scope["path"]):
+            return await self.app(scope, receive, send)
+        request = Request(scope, receive)
+        watch = ResponseWatch(send)
+        if tracing_enabled():
+            await self.trace(request, watch)
+        else:
+            await self.profile(request, watch)
+    
+    async def trace(self, request: Request, watch: ResponseWatch):
+        """Open the root span of the request; endpoints add phase spans below it"""
+        method, path = request.method, request.url.path
+        with start_trace(f"{method} {path}", traceparent=request.headers.get("traceparent"),
+                         **{"http.request.method": method, "url.path": path}) as root:
+            try:
+                await self.profile(request, watch)
+            finally:
+                route = getattr(request.scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{method} {route}"
+                    root.set_attribute("http.route", route)
+                root.set_attribute("http.response.status_code", watch.status)
+                if watch.status >= 500:
+                    root.set_status("error")
+    
+    async def profile(self, request: Request, watch: ResponseWatch):
+        """Profile the request when FAF_PROFILE, or an allowed X-FAF-Profile header, asks for it"""
+        mode = PROFILE_MODE
+        if PROFILE_HEADER_ENABLED:
+            mode = request.headers.get("x-faf-profile", mode)
+        if not mode:
+            return await self.record(request, watch)
+        
+        from faf_profiling import PROFILE_MODES, Profiler, ProfilerBusy
+        if mode not in PROFILE_MODES:
+            response = JSONResponse(status_code=400, content={"detail": f"X-FAF-Profile must be one of {list(PROFILE_MODES)}"})
+            return await response(request.scope, request.receive, watch)
+        
+        # Sample every thread so work offloaded to the threadpool shows up too
+        # (along with anything else in flight); one session runs at a time
+        profiler = Profiler(mode, all_threads=True)
+        try:
+            profiler.start()
+        except ProfilerBusy:
+            watch.headers.append((b"x-faf-profile-output", b"busy"))
+            return await self.record(request, watch)
+        
+        async def finish():
+            """Stop when the response starts; the file is written off the event loop"""
+            if profiler.output_path is None:
+                profiler.label = f"{request.method}_{operation_name(request)}"
+                output = profiler.stop(write=False)
+                await asyncio.to_thread(profiler.write)
+                watch.headers.append((b"x-faf-profile-output", str(output).encode()))
+        
+        watch.on_start = finish
+        try:
+            await self.record(request, watch)
+        finally:
+            await finish()  # the app failed before starting a response
+    
+    async def record(self, request: Request, watch: ResponseWatch):
+        """Record the duration and outcome of the request"""
+        start_time = time.perf_counter()
+        try:
+            await self.admit(request, watch)
+        finally:
+            record_access({
+                "operation": operation_name(request),
+                # Body-path endpoints (read, write, upload) set state.file_path
+                "path": getattr(request.state, "file_path", None) or request.path_params.get("path") or request.url.path,
+                "size_bytes": watch.size,
+                "timestamp": datetime.now().isoformat(),
+                "duration_ms": (time.perf_counter() - start_time) * 1000,
+                "success": watch.status < 400,
+                "method": request.method,
+                "status": watch.status
+            })
+    
+    async def admit(self, request: Request, watch: ResponseWatch):
+        """Rate-limit and queue the request when admission control is enabled"""
+        controller = admission
+        if controller is None:
+            return await self.app(request.scope, request.receive, watch)
+        
+        client = controller.client_id(request.headers.get("x-api-key"),
+                                      request.client.host if request.client else None)
+        try:
+            limiter = await controller.admit(client, request.url.path)
+        except AdmissionRejected as e:
+            response = JSONResponse(status_code=e.status_code, content={"detail": e.reason},
+                                    headers={"Retry-After": str(e.retry_after)})
+            return await response(request.scope, request.receive, watch)
+        
+        # Hold the slot until the last body chunk is sent, so streamed
+        # downloads and large reads stay bounded, not just the endpoint call
+        watch.on_end = limiter.release
+        try:
+            await self.app(request.scope, request.receive, watch)
+        finally:
+            if watch.on_end is not None:  # no complete response was sent
+                watch.on_end = None
+                limiter.release()
+
+
+app.add_middleware(RequestInstrumentation)
 
 
 # API Endpoints
@@ -157,13 +561,13 @@ async def root():
                 <h2>Status: ✅ Operational</h2>
                 <p>Version: 2.0.0</p>
                 <p>Max File Size: 50MB</p>
-                <p>Response Time: ~40ms avg</p>
+                <p>Response Time: measured in /api/stats</p>
             </div>
             
             <h2>Available Endpoints:</h2>
             <div class="endpoint">
                 <span class="method get">GET</span>
-                <strong>/api/read</strong> - Read file content
+                <strong>/api/read</strong> - Read file content (text, or raw bytes with mode=bytes)
             </div>
             <div class="endpoint">
                 <span class="method post">POST</span>
@@ -193,6 +597,18 @@ async def root():
                 <span class="method get">GET</span>
                 <strong>/api/stats</strong> - API statistics
             </div>
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/api/metrics</strong> - Recent request timings
+            </div>
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/api/events</strong> - Long-poll for file changes
+            </div>
+            <div class="endpoint">
+                <span class="method get">GET</span>
+                <strong>/api/events/stream</strong> - Server-sent change events
+            </div>
             
             <p style="margin-top: 30px;">
                 📚 <a href="/docs">Interactive API Documentation</a><br>
@@ -209,92 +625,138 @@ async def root():
     return html_content
 
 @app.post("/api/read", response_model=FileOperationResponse)
-async def read_file(request: FileReadRequest):
+async def read_file(request: FileReadRequest, http_request: Request):
     """Read file content"""
-    import time
-    start_time = time.time()
+    start_time = time.perf_counter()
+    http_request.state.file_path = request.path
     
-    if not validate_path(request.path):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(request.path):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     filepath = BASE_PATH / request.path
     
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    if filepath.stat().st_size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="File too large")
+    # Open first and fstat the descriptor: one snapshot serves the existence
+    # check, the size limit and the response
+    with span("open"):
+        try:
+            f = await aiofiles.open(filepath, 'rb')
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
+        except OSError as e:
+            raise HTTPException(status_code=500, detail=str(e))
     
     try:
-        async with aiofiles.open(filepath, 'r', encoding=request.encoding) as f:
-            content = await f.read()
+        with span("stat"):
+            stats = os.fstat(f.fileno())
+        
+        if stats.st_size > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large")
+        
+        accept = http_request.headers.get("accept")
+        passthrough = request.mode == "bytes" and negotiate(
+            accept, RESPONSE_MEDIA_TYPES + (OCTET_STREAM_MEDIA_TYPE,)) == OCTET_STREAM_MEDIA_TYPE
+        if passthrough and stats.st_size > PASSTHROUGH_STREAM_BYTES:
+            # Large files are streamed from disk in chunks, never held whole
+            return FileResponse(filepath, media_type=OCTET_STREAM_MEDIA_TYPE, stat_result=stats)
+        
+        with span("read") as s:
+            raw = await f.read()
+            s.set_attribute("file.bytes", len(raw))
+        
+        if passthrough:
+            # The file's bytes are the body: nothing decoded or re-encoded
+            return Response(raw, media_type=OCTET_STREAM_MEDIA_TYPE)
+        if request.mode == "bytes":
+            data = {"content": raw, "size": stats.st_size, "binary": True}
+        else:
+            with span("decode", encoding=request.encoding):
+                # Same result as text mode: universal newlines
+                content = raw.decode(request.encoding).replace("\r\n", "\n").replace("\r", "\n")
+            data = {"content": content, "size": stats.st_size}
         
-        duration = (time.time() - start_time) * 1000
+        duration = (time.perf_counter() - start_time) * 1000
         
-        return FileOperationResponse(
+        return model_response(FileOperationResponse(
             success=True,
-            message=f"Successfully read {filepath.stat().st_size} bytes",
-            data={"content": content, "size": filepath.stat().st_size},
+            message=f"Successfully read {stats.st_size} bytes",
+            data=data,
             duration_ms=duration
-        )
+        ), accept)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await f.close()
 
 @app.post("/api/write", response_model=FileOperationResponse)
-async def write_file(request: FileWriteRequest):
+async def write_file(request: FileWriteRequest, http_request: Request):
     """Write file content"""
-    import time
-    start_time = time.time()
+    start_time = time.perf_counter()
+    http_request.state.file_path = request.path
     
-    if not validate_path(request.path):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(request.path):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     filepath = BASE_PATH / request.path
     
     # Check content size
-    content_size = len(request.content.encode('utf-8'))
+    with span("encode") as s:
+        encoded = request.content.encode('utf-8')
+        content_size = len(encoded)
+        s.set_attribute("file.bytes", content_size)
     if content_size > MAX_FILE_SIZE:
         raise HTTPException(status_code=413, detail="Content too large")
     
     try:
         # Create directories if needed
         if request.create_dirs:
-            filepath.parent.mkdir(parents=True, exist_ok=True)
+            with span("mkdir"):
+                filepath.parent.mkdir(parents=True, exist_ok=True)
         
-        async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-            await f.write(request.content)
+        with span("write"):
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(encoded)
         
-        duration = (time.time() - start_time) * 1000
+        duration = (time.perf_counter() - start_time) * 1000
         
-        return FileOperationResponse(
+        return model_response(FileOperationResponse(
             success=True,
             message=f"Successfully wrote {content_size} bytes to {request.path}",
             data={"path": str(filepath), "size": content_size},
             duration_ms=duration
-        )
+        ), http_request.headers.get("accept"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(request: Request, file: UploadFile = File(...)):
     """Upload a file"""
-    if file.size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="File too large")
-    
-    # Validate extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=415, detail=f"File type {file_ext} not allowed")
+    request.state.file_path = f"uploads/{file.filename}"
+    with span("validate"):
+        if file.size > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large")
+        
+        # Validate extension
+        file_ext = Path(file.filename).suffix.lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=415, detail=f"File type {file_ext} not allowed")
     
     filepath = BASE_PATH / "uploads" / file.filename
-    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with span("mkdir"):
+        filepath.parent.mkdir(parents=True, exist_ok=True)
     
     try:
-        content = await file.read()
-        async with aiofiles.open(filepath, 'wb') as f:
-            await f.write(content)
+        with span("receive") as s:
+            content = await file.read()
+            s.set_attribute("file.bytes", len(content))
+        with span("write"):
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(content)
         
-        return FileOperationResponse(
+        return model_response(FileOperationResponse(
             success=True,
             message=f"File uploaded successfully",
             data={
@@ -302,107 +764,120 @@ async def upload_file(file: UploadFile = File(...)):
                 "size": len(content),
                 "path": str(filepath.relative_to(BASE_PATH))
             }
-        )
+        ), request.headers.get("accept"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/download/{path:path}")
 async def download_file(path: str):
     """Download a file"""
-    if not validate_path(path):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(path):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     filepath = BASE_PATH / path
     
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    with span("stat"):
+        stats = stat_or_404(filepath)
     
     return FileResponse(
         path=filepath,
         filename=filepath.name,
-        media_type='application/octet-stream'
+        media_type='application/octet-stream',
+        stat_result=stats
     )
 
 @app.get("/api/list")
-async def list_files(directory: str = ""):
+async def list_files(request: Request, directory: str = ""):
     """List files in directory"""
-    if not validate_path(directory):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(directory):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     dirpath = BASE_PATH / directory
     
-    if not dirpath.exists():
-        raise HTTPException(status_code=404, detail="Directory not found")
-    
-    if not dirpath.is_dir():
-        raise HTTPException(status_code=400, detail="Path is not a directory")
-    
-    files = []
-    for item in dirpath.iterdir():
-        files.append({
-            "name": item.name,
-            "type": "directory" if item.is_dir() else "file",
-            "size": item.stat().st_size if item.is_file() else None,
-            "modified": datetime.fromtimestamp(item.stat().st_mtime)
-        })
-    
-    return FileOperationResponse(
+    with span("stat"):
+        try:
+            entries = os.scandir(dirpath)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Directory not found")
+        except NotADirectoryError:
+            raise HTTPException(status_code=400, detail="Path is not a directory")
+    
+    # Entry types come from the directory listing; each entry is stat'ed once
+    with span("scan") as s, entries:
+        files = []
+        for entry in entries:
+            stats = entry.stat()
+            files.append({
+                "name": entry.name,
+                "type": "directory" if entry.is_dir() else "file",
+                "size": stats.st_size if entry.is_file() else None,
+                "modified": datetime.fromtimestamp(stats.st_mtime)
+            })
+        s.set_attribute("directory.entries", len(files))
+    
+    return model_response(FileOperationResponse(
         success=True,
         message=f"Found {len(files)} items",
         data=files
-    )
+    ), request.headers.get("accept"))
 
 @app.get("/api/metadata/{path:path}", response_model=FileMetadata)
-async def get_metadata(path: str):
+async def get_metadata(path: str, request: Request):
     """Get file metadata"""
-    if not validate_path(path):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(path):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     filepath = BASE_PATH / path
     
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    with span("stat"):
+        stats = stat_or_404(filepath)
     
-    stats = filepath.stat()
+    with span("hash", **{"file.bytes": stats.st_size}):
+        digest = get_file_hash(filepath)
     
-    return FileMetadata(
+    return model_response(FileMetadata(
         path=str(filepath.relative_to(BASE_PATH)),
         size=stats.st_size,
         created=datetime.fromtimestamp(stats.st_ctime),
         modified=datetime.fromtimestamp(stats.st_mtime),
-        hash=get_file_hash(filepath),
+        hash=digest,
         type=filepath.suffix
-    )
+    ), request.headers.get("accept"))
 
 @app.delete("/api/delete/{path:path}")
-async def delete_file(path: str):
+async def delete_file(path: str, request: Request):
     """Delete a file"""
-    if not validate_path(path):
-        raise HTTPException(status_code=403, detail="Invalid or forbidden path")
+    with span("validate"):
+        if not validate_path(path):
+            raise HTTPException(status_code=403, detail="Invalid or forbidden path")
     
     filepath = BASE_PATH / path
     
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="File not found")
+    with span("stat"):
+        stats = stat_or_404(filepath)
     
     try:
-        if filepath.is_file():
-            filepath.unlink()
-        else:
-            filepath.rmdir()  # Only removes empty directories
+        with span("unlink"):
+            if stat.S_ISREG(stats.st_mode):
+                filepath.unlink()
+            else:
+                filepath.rmdir()  # Only removes empty directories
         
-        return FileOperationResponse(
+        return model_response(FileOperationResponse(
             success=True,
             message=f"Successfully deleted {path}"
-        )
+        ), request.headers.get("accept"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stats")
 async def get_stats():
     """Get API statistics"""
-    total_files = sum(1 for _ in BASE_PATH.rglob("*") if _.is_file())
-    total_size = sum(f.stat().st_size for f in BASE_PATH.rglob("*") if f.is_file())
+    with span("scan"):
+        total_files, total_size = tree_totals(BASE_PATH)
     
     return {
         "status": "operational",
@@ -416,14 +891,75 @@ async def get_stats():
             "uptime": "N/A"  # Would need process manager for real uptime
         },
         "performance": {
-            "avg_read_ms": 40,
-            "avg_write_ms": 94,
+            "avg_read_ms": measured_latency("api_read"),
+            "avg_write_ms": measured_latency("api_write"),
+            "measured_requests": len(access_metrics),
             "target_response_ms": 200
-        }
+        },
+        "admission": admission.stats() if admission is not None else None
     }
 
+@app.get("/api/events")
+async def poll_events(since: Optional[int] = None, timeout: float = 25.0):
+    """Long-poll for changes after event ``since`` (omit it to wait for the next change)"""
+    journal = (await get_watcher()).journal
+    cursor = journal.last_seq if since is None else since
+    truncated = journal.is_truncated(cursor)
+    
+    events = await journal.wait_async(cursor, timeout=min(max(timeout, 0), EVENTS_MAX_WAIT_S))
+    
+    return FileOperationResponse(
+        success=True,
+        message=f"{len(events)} change events",
+        data={
+            "cursor": events[-1].seq if events else cursor,
+            "truncated": truncated,
+            "events": [event.to_dict() for event in events]
+        }
+    )
+
+@app.get("/api/events/stream")
+async def stream_events(request: Request, since: Optional[int] = None):
+    """Server-sent events feed of changes (resumes from Last-Event-ID)"""
+    journal = (await get_watcher()).journal
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    cursor = journal.last_seq if since is None else since
+    
+    async def event_source():
+        nonlocal cursor
+        while not await request.is_disconnected():
+            if journal.is_truncated(cursor):
+                yield "event: overflow\ndata: {}\n\n"
+            events = await journal.wait_async(cursor, timeout=EVENTS_KEEPALIVE_S)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                cursor = event.seq
+                yield f"id: {event.seq}\nevent: {event.event}\ndata: {json.dumps(event.to_dict())}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/api/metrics")
+async def get_metrics(limit: int = 1000):
+    """Most recent request timings (newest last), ready for FAFDataAnalyzer.ingest_operations"""
+    records = list(access_metrics)[-limit:] if limit > 0 else []
+    return FileOperationResponse(
+        success=True,
+        message=f"{len(records)} request records",
+        data=records
+    )
+
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("🏎️ FAF File Tools API Server")
     print("=" * 50)
     print("Starting server on http://localhost:8000")
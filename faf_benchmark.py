@@ -0,0 +1,1131 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Benchmark Suite
+Measures performance of file operations, data analysis and the API server
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from faf_file_tools import FAFPythonBridge, REPORT_FORMATS, hash_file, msgpack
+from faf_data_analyzer import FAFDataAnalyzer
+from faf_lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# Benchmark groups run by run_full_benchmark, in order
+BENCHMARK_GROUPS = ('read', 'write', 'json', 'analyzer', 'api', 'concurrency', 'stat', 'startup')
+
+# Payload sizes for the read/write/API benchmarks
+BENCHMARK_FILE_SIZES = {'1KB': 1024, '10KB': 10 * 1024, '100KB': 100 * 1024, '1MB': 1024 * 1024}
+
+# Number of records in the small/medium/large JSON documents
+BENCHMARK_JSON_SIZES = {'small': 10, 'medium': 100, 'large': 1000}
+
+# Concurrent benchmarks: workloads, execution modes, parallelism levels and
+# the operations shared out among the workers in every timed call
+CONCURRENT_WORKLOADS = ('read', 'write', 'hash', 'json')
+CONCURRENCY_MODES = ('thread', 'process', 'asyncio')
+CONCURRENCY_LEVELS = (1, 2, 4, 8)
+CONCURRENT_OPERATIONS = 64
+
+# Stat benchmarks: request metadata patterns, each timed with repeated
+# pathlib stats and with one snapshot per file, serving STAT_REQUESTS
+# requests from STAT_THREADS threads per timed call
+STAT_PATTERNS = ('read', 'metadata', 'list')
+STAT_STRATEGIES = ('repeated', 'snapshot')
+STAT_REQUESTS = 64
+STAT_THREADS = 8
+STAT_LIST_FILES = 100
+
+# Cold-start benchmarks: statements timed in a fresh interpreter, and the
+# heavy dependencies reported as imported by each
+STARTUP_TARGETS = {
+    'interpreter': 'pass',
+    'faf_file_tools': 'import faf_file_tools',
+    'faf_data_analyzer': 'import faf_data_analyzer',
+    'analyzer_suite': 'import faf_data_analyzer; faf_data_analyzer.FAFDataAnalyzer().create_benchmark_suite()',
+    'faf_benchmark': 'import faf_benchmark',
+    'faf_api_server': 'import faf_api_server'
+}
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'fastapi', 'pydantic', 'uvicorn', 'httpx')
+
+# Resamples used for bootstrap confidence intervals
+BOOTSTRAP_RESAMPLES = 2000
+
+# Upper bound on calls per timed sample during calibration
+MAX_LOOPS = 1_000_000
+
+# SQLite history of benchmark runs used by ``compare``
+BENCHMARK_DB = os.environ.get("FAF_BENCHMARK_DB", "benchmark_history.db")
+
+# Statistics compared between runs and the smallest change worth flagging
+COMPARE_METRICS = ('mean', 'median', 'p99')
+COMPARE_THRESHOLD = 0.05
+# Comparison statuses that make `faf_benchmark.py compare` exit 1
+GATE_FAILURES = ('regression', 'failed', 'missing')
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing statistics for one benchmark (all times are per call)"""
+    name: str
+    group: str
+    params: Dict[str, Any]
+    loops: int
+    samples: int
+    rejected: int
+    mean_ms: float
+    median_ms: float
+    p99_ms: float
+    stdev_ms: float
+    min_ms: float
+    max_ms: float
+    ci_low_ms: float
+    ci_high_ms: float
+    ops_per_sec: float
+    timings_ms: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+    # Concurrent benchmarks only: speedup over parallelism 1 per core used
+    efficiency: Optional[float] = None
+    # Measured facts about the run; unlike params, not part of the stored key
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.samples > 0
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+    
+    @classmethod
+    def failed(cls, name: str, group: str, params: Dict[str, Any], error: str) -> "BenchmarkResult":
+        nan = float('nan')
+        return cls(name, group, params, 0, 0, 0, nan, nan, nan, nan, nan, nan, nan, nan, 0.0, error=error)
+
+
+def reject_outliers(timings: np.ndarray, fence: float = 1.5) -> np.ndarray:
+    """Drop samples outside Tukey's fences (``fence`` x IQR beyond the quartiles)"""
+    if len(timings) < 4:
+        return timings
+    q1, q3 = np.percentile(timings, [25, 75])
+    spread = fence * (q3 - q1)
+    return timings[(timings >= q1 - spread) & (timings <= q3 + spread)]
+
+
+def bootstrap_ci(timings: np.ndarray, confidence: float = 0.95,
+                 resamples: int = BOOTSTRAP_RESAMPLES, seed: int = 0) -> Tuple[float, float]:
+    """Percentile bootstrap confidence interval for the mean"""
+    if len(timings) < 2:
+        value = float(timings[0]) if len(timings) else float('nan')
+        return value, value
+    rng = np.random.default_rng(seed)
+    means = rng.choice(timings, size=(resamples, len(timings))).mean(axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(means, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+# Statistic functions for COMPARE_METRICS, applied along the last axis
+_STATISTICS = {
+    'mean': lambda values: np.mean(values, axis=-1),
+    'median': lambda values: np.median(values, axis=-1),
+    'p99': lambda values: np.percentile(values, 99, axis=-1)
+}
+
+
+def bootstrap_difference(base: np.ndarray, head: np.ndarray, metric: str = 'mean',
+                         confidence: float = 0.95, resamples: int = BOOTSTRAP_RESAMPLES,
+                         seed: int = 0) -> Tuple[float, float]:
+    """Bootstrap confidence interval for ``metric(head) - metric(base)``"""
+    statistic = _STATISTICS[metric]
+    rng = np.random.default_rng(seed)
+    differences = (statistic(rng.choice(head, size=(resamples, len(head)))) -
+                   statistic(rng.choice(base, size=(resamples, len(base)))))
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(differences, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def git_commit(path: Optional[str] = None) -> Tuple[Optional[str], bool]:
+    """(HEAD commit, working tree has uncommitted changes) or (None, False) outside git"""
+    cwd = path or os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True,
+                                text=True, check=True, timeout=10).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd,
+                                capture_output=True, text=True, check=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None, False
+    return commit, bool(status.strip())
+
+
+def machine_fingerprint(env: Optional[Dict[str, Any]] = None) -> str:
+    """Short stable hash of the hardware and interpreter that produced a run"""
+    env = env or environment()
+    keys = ('implementation', 'python', 'platform', 'machine', 'processor', 'cpu_count')
+    identity = json.dumps({key: env.get(key) for key in keys}, sort_keys=True)
+    return hashlib.sha256(identity.encode()).hexdigest()[:16]
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and interpreter the results were measured on"""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__
+    }
+
+
+class FAFBenchmark:
+    """
+    Benchmark FAF file operations.
+    
+    Every benchmark is warmed up, then calibrated so one timed sample runs
+    the operation enough times to last ``min_sample_time`` seconds. Up to
+    ``samples`` samples are taken (within ``max_time`` seconds), outliers
+    are rejected with Tukey's fences and the mean gets a bootstrap
+    confidence interval. Scratch files live in ``work_dir`` (a temporary
+    directory unless given) and are removed by ``close()``.
+    """
+    
+    def __init__(self, samples: int = 20, warmup: int = 3, min_sample_time: float = 0.005,
+                 max_time: float = 2.0, confidence: float = 0.95,
+                 work_dir: Optional[str] = None, analyzer_rows: int = 10_000):
+        self.samples = samples
+        self.warmup = warmup
+        self.min_sample_time = min_sample_time
+        self.max_time = max_time
+        self.confidence = confidence
+        self.analyzer_rows = analyzer_rows
+        self._owns_work_dir = work_dir is None
+        self.work_dir = Path(work_dir or tempfile.mkdtemp(prefix="faf_bench_"))
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.bridge = FAFPythonBridge(base_path=str(self.work_dir))
+        self.results: Dict[str, BenchmarkResult] = {}
+    
+    def close(self):
+        """Remove the scratch directory if this benchmark created it"""
+        if self._owns_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    def __enter__(self) -> "FAFBenchmark":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def measure(self, name: str, operation: Callable, *args, group: str = 'custom',
+                params: Optional[Dict[str, Any]] = None, **kwargs) -> BenchmarkResult:
+        """Benchmark ``operation(*args, **kwargs)`` and record the result under ``name``"""
+        params = params or {}
+        try:
+            for _ in range(self.warmup):
+                operation(*args, **kwargs)
+            loops = self._calibrate(operation, args, kwargs)
+            
+            timings = []
+            deadline = time.perf_counter() + self.max_time
+            while len(timings) < self.samples:
+                start = time.perf_counter()
+                for _ in range(loops):
+                    operation(*args, **kwargs)
+                timings.append((time.perf_counter() - start) * 1000 / loops)
+                if time.perf_counter() > deadline and len(timings) >= 3:
+                    break
+        except Exception as e:
+            result = BenchmarkResult.failed(name, group, params, f"{type(e).__name__}: {e}")
+        else:
+            result = self._summarize(name, group, params, loops, np.asarray(timings))
+        finally:
+            self.bridge.operations.clear()
+        
+        self.results[name] = result
+        return result
+    
+    def _calibrate(self, operation: Callable, args: Tuple, kwargs: Dict) -> int:
+        """Smallest loop count whose sample lasts at least ``min_sample_time``"""
+        loops = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                operation(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.min_sample_time or loops >= MAX_LOOPS:
+                return loops
+            per_call = max(elapsed / loops, 1e-9)
+            loops = min(MAX_LOOPS, max(loops * 2, math.ceil(self.min_sample_time / per_call * 1.1)))
+    
+    def _summarize(self, name: str, group: str, params: Dict[str, Any], loops: int,
+                   timings: np.ndarray) -> BenchmarkResult:
+        kept = reject_outliers(timings)
+        mean = float(kept.mean())
+        low, high = bootstrap_ci(kept, self.confidence)
+        return BenchmarkResult(
+            name=name,
+            group=group,
+            params=params,
+            loops=loops,
+            samples=len(kept),
+            rejected=len(timings) - len(kept),
+            mean_ms=mean,
+            median_ms=float(np.median(kept)),
+            p99_ms=float(np.percentile(kept, 99)),
+            stdev_ms=float(kept.std(ddof=1)) if len(kept) > 1 else 0.0,
+            min_ms=float(kept.min()),
+            max_ms=float(kept.max()),
+            ci_low_ms=low,
+            ci_high_ms=high,
+            ops_per_sec=1000 / mean if mean > 0 else float('inf'),
+            timings_ms=kept.tolist()
+        )
+    
+    def generate_test_file(self, size_bytes: int, name: Optional[str] = None) -> str:
+        """Write a file of ``size_bytes`` random hex text; returns its name in ``work_dir``"""
+        name = name or f"test_{size_bytes}b.txt"
+        (self.work_dir / name).write_text(os.urandom(size_bytes // 2 + 1).hex()[:size_bytes])
+        return name
+    
+    def benchmark_read_operations(self) -> Dict[str, BenchmarkResult]:
+        """Benchmark raw reads and FAFPythonBridge hashing of files of several sizes"""
+        results = {}
+        for size, size_bytes in BENCHMARK_FILE_SIZES.items():
+            filepath = self.work_dir / self.generate_test_file(size_bytes)
+            params = {'size_bytes': size_bytes}
+            
+            def read_op():
+                with open(filepath, 'rb') as f:
+                    f.read()
+            
+            results[f'read_{size}'] = self.measure(f'read_{size}', read_op, group='read', params=params)
+            results[f'hash_{size}'] = self.measure(f'hash_{size}', self.bridge.calculate_file_hash,
+                                                   filepath.name, group='read', params=params)
+        return results
+    
+    def benchmark_write_operations(self) -> Dict[str, BenchmarkResult]:
+        """Benchmark raw writes and FAFPythonBridge reports in every available format"""
+        results = {}
+        for size, size_bytes in BENCHMARK_FILE_SIZES.items():
+            content = os.urandom(size_bytes // 2 + 1).hex()[:size_bytes]
+            filepath = self.work_dir / f"write_{size}.txt"
+            
+            def write_op():
+                filepath.write_text(content)
+            
+            results[f'write_{size}'] = self.measure(f'write_{size}', write_op, group='write',
+                                                    params={'size_bytes': size_bytes})
+        
+        report = _json_document(BENCHMARK_JSON_SIZES['medium'])
+        for fmt, (ext, _) in REPORT_FORMATS.items():
+            if fmt == 'msgpack' and msgpack is None:
+                continue
+            name = f'report_{fmt}'
+            results[name] = self.measure(name, self.bridge.write_python_report, report,
+                                         f"reports/report{ext}", formats=(fmt,),
+                                         group='write', params={'records': BENCHMARK_JSON_SIZES['medium']})
+        return results
+    
+    def benchmark_json_operations(self) -> Dict[str, BenchmarkResult]:
+        """Benchmark JSON writes and FAFPythonBridge JSON reads"""
+        results = {}
+        for size, records in BENCHMARK_JSON_SIZES.items():
+            data = _json_document(records)
+            filepath = self.work_dir / f"json_{size}.json"
+            params = {'records': records}
+            
+            def json_write():
+                with open(filepath, 'w') as f:
+                    json.dump(data, f)
+            
+            results[f'json_write_{size}'] = self.measure(f'json_write_{size}', json_write,
+                                                         group='json', params=params)
+            results[f'json_read_{size}'] = self.measure(f'json_read_{size}', self.bridge.read_json_config,
+                                                        filepath.name, group='json', params=params)
+        return results
+    
+    def benchmark_analyzer_operations(self) -> Dict[str, BenchmarkResult]:
+        """Benchmark FAFDataAnalyzer generation, analysis and rendering"""
+        analyzer = FAFDataAnalyzer()
+        rows = self.analyzer_rows
+        df = analyzer.generate_sample_data(rows, seed=0)
+        analysis = analyzer.analyze_performance(df)
+        batch = df.iloc[:1000]
+        
+        def analyze():
+            analyzer.invalidate(df)  # measure the computation, not the memo
+            return analyzer.analyze_performance(df)
+        
+        benchmarks = {
+            'generate_sample_data': (analyzer.generate_sample_data, (rows,), {'seed': 0}),
+            'analyze_performance': (analyze, (), {}),
+            'analyze_windows': (analyzer.analyze_windows, (df,), {'freq': '1h'}),
+            'compact_frame': (analyzer.compact_frame, (df,), {}),
+            'add_operations': (analyzer.add_operations, (batch,), {}),
+            'render_reports': (analyzer.render_reports, (analysis,), {})
+        }
+        results = {}
+        for name, (operation, args, kwargs) in benchmarks.items():
+            params = {'rows': len(batch) if name == 'add_operations' else rows}
+            results[name] = self.measure(name, operation, *args, group='analyzer', params=params, **kwargs)
+        return results
+    
+    def benchmark_api_operations(self) -> Dict[str, BenchmarkResult]:
+        """Benchmark the API server in-process (needs fastapi and httpx)"""
+        try:
+            import faf_api_server
+            from fastapi.testclient import TestClient
+        except ImportError as e:
+            print(f"⚠️ Skipping API benchmarks: {e}")
+            return {}
+        
+        storage = self.work_dir / "api_storage"
+        storage.mkdir(exist_ok=True)
+        original_base = faf_api_server.BASE_PATH
+        faf_api_server.BASE_PATH = storage
+        results = {}
+        try:
+            with TestClient(faf_api_server.app) as client:
+                def call(method: str, url: str, **kwargs):
+                    response = client.request(method, url, **kwargs)
+                    response.raise_for_status()
+                
+                for size in ('1KB', '100KB'):
+                    content = os.urandom(BENCHMARK_FILE_SIZES[size] // 2).hex()
+                    params = {'size_bytes': len(content)}
+                    body = {"path": f"bench_{size}.txt", "content": content}
+                    results[f'api_write_{size}'] = self.measure(
+                        f'api_write_{size}', call, "POST", "/api/write", json=body,
+                        group='api', params=params)
+                    results[f'api_read_{size}'] = self.measure(
+                        f'api_read_{size}', call, "POST", "/api/read", json={"path": body["path"]},
+                        group='api', params=params)
+                
+                # The same 100KB file as text in JSON, undecoded bytes passed
+                # through, base64 in JSON and text in msgpack
+                params = {'size_bytes': BENCHMARK_FILE_SIZES['100KB']}
+                for name, mode, accept in (('api_read_bytes_100KB', 'bytes', 'application/octet-stream'),
+                                           ('api_read_base64_100KB', 'bytes', 'application/json'),
+                                           ('api_read_msgpack_100KB', 'text', 'application/msgpack')):
+                    if 'msgpack' in accept and msgpack is None:
+                        continue
+                    results[name] = self.measure(
+                        name, call, "POST", "/api/read", json={"path": "bench_100KB.txt", "mode": mode},
+                        headers={"Accept": accept}, group='api', params={**params, 'mode': mode, 'accept': accept})
+                
+                for name, url in (('api_metadata', "/api/metadata/bench_1KB.txt"),
+                                  ('api_list', "/api/list"), ('api_stats', "/api/stats")):
+                    results[name] = self.measure(name, call, "GET", url, group='api')
+        finally:
+            faf_api_server.BASE_PATH = original_base
+            faf_api_server.access_metrics.clear()
+        return results
+    
+    def benchmark_concurrency_operations(self, workloads: Tuple[str, ...] = CONCURRENT_WORKLOADS,
+                                         modes: Tuple[str, ...] = CONCURRENCY_MODES,
+                                         levels: Tuple[int, ...] = CONCURRENCY_LEVELS,
+                                         operations: int = CONCURRENT_OPERATIONS) -> Dict[str, BenchmarkResult]:
+        """
+        Run read/write/hash/JSON workloads on thread pools, process pools and
+        asyncio tasks at each parallelism level.
+        
+        Every timed call shares ``operations`` operations out among the
+        workers, so results are comparable across levels. ``efficiency`` is
+        the speedup over level 1 of the same mode divided by the cores the
+        level can use (min(level, CPU count)); 1.0 is linear scaling.
+        """
+        unknown = [mode for mode in modes if mode not in CONCURRENCY_MODES]
+        unknown += [workload for workload in workloads if workload not in CONCURRENT_WORKLOADS]
+        if unknown:
+            raise ValueError(f"Unknown concurrency mode(s) or workload(s): {unknown}")
+        
+        paths = {
+            'read': self.work_dir / self.generate_test_file(BENCHMARK_FILE_SIZES['100KB'], "concurrent_read.txt"),
+            'write': self.work_dir / self.generate_test_file(BENCHMARK_FILE_SIZES['100KB'], "concurrent_write.txt"),
+            'hash': self.work_dir / self.generate_test_file(BENCHMARK_FILE_SIZES['1MB'], "concurrent_hash.txt"),
+            'json': self.work_dir / "concurrent.json"
+        }
+        paths['json'].write_text(json.dumps(_json_document(BENCHMARK_JSON_SIZES['large'])))
+        cores = os.cpu_count() or 1
+        
+        results = {}
+        for mode in modes:
+            for workload in workloads:
+                by_level = {}
+                for level in levels:
+                    jobs = [(workload, str(paths[workload]), count, worker)
+                            for worker, count in enumerate(_split(operations, level))]
+                    name = f"{workload}_{mode}_x{level}"
+                    params = {'workload': workload, 'mode': mode, 'parallelism': level, 'operations': operations}
+                    with _ConcurrentRunner(mode, level) as runner:
+                        by_level[level] = results[name] = self.measure(name, runner.run, jobs,
+                                                                       group='concurrency', params=params)
+                
+                single = by_level.get(1)
+                if single is not None and single.ok:
+                    for level, result in by_level.items():
+                        if result.ok:
+                            result.efficiency = single.mean_ms / result.mean_ms / min(level, cores)
+        return results
+    
+    def benchmark_stat_operations(self, patterns: Tuple[str, ...] = STAT_PATTERNS,
+                                  requests: int = STAT_REQUESTS, threads: int = STAT_THREADS,
+                                  list_files: int = STAT_LIST_FILES) -> Dict[str, BenchmarkResult]:
+        """
+        Compare the API's per-request metadata patterns: 'repeated' re-stats
+        the file for every check (exists, size limit, response), 'snapshot'
+        takes one open+fstat / stat / scandir entry stat and reuses it.
+        ``metadata['stat_calls']`` is the number of stat-family calls per
+        request, counted on an untimed pass.
+        """
+        unknown = [pattern for pattern in patterns if pattern not in STAT_PATTERNS]
+        if unknown:
+            raise ValueError(f"Unknown stat pattern(s): {unknown}")
+        
+        listing = self.work_dir / "stat_list"
+        listing.mkdir(exist_ok=True)
+        for i in range(list_files):
+            (listing / f"file_{i}.txt").write_text("x")
+        targets = {
+            'read': self.work_dir / self.generate_test_file(BENCHMARK_FILE_SIZES['1KB'], "stat_read.txt"),
+            'metadata': self.work_dir / "stat_read.txt",
+            'list': listing
+        }
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for pattern in patterns:
+                for strategy in STAT_STRATEGIES:
+                    handler = _STAT_HANDLERS[pattern, strategy]
+                    path = targets[pattern]
+                    with _StatCounter() as counter:
+                        handler(path)
+                    
+                    def serve():
+                        for _ in pool.map(handler, [path] * requests):
+                            pass
+                    
+                    name = f"stat_{pattern}_{strategy}"
+                    params = {'pattern': pattern, 'strategy': strategy, 'requests': requests, 'threads': threads}
+                    results[name] = self.measure(name, serve, group='stat', params=params)
+                    results[name].metadata['stat_calls'] = counter.calls
+        return results
+    
+    def benchmark_startup_operations(self, targets: Dict[str, str] = STARTUP_TARGETS) -> Dict[str, BenchmarkResult]:
+        """
+        Time cold starts: every call runs a statement in a fresh interpreter
+        (from ``work_dir``, so import side effects would land there).
+        ``metadata['heavy_modules']`` lists the HEAVY_MODULES the statement imported;
+        compare against ``startup_interpreter`` for the interpreter's own cost.
+        """
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent),
+                                                          env.get('PYTHONPATH')]))
+        results = {}
+        for name, statement in targets.items():
+            probe = subprocess.run(
+                [sys.executable, "-c", f"{statement}\nimport sys\n"
+                                       f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+                cwd=self.work_dir, env=env, capture_output=True, text=True)
+            result = results[f'startup_{name}'] = self.measure(
+                f'startup_{name}', subprocess.run, [sys.executable, "-c", statement], group='startup',
+                params={'statement': statement}, cwd=self.work_dir, env=env, check=True,
+                stdout=subprocess.DEVNULL)
+            result.metadata['heavy_modules'] = probe.stdout.strip().split(',') if probe.stdout.strip() else []
+        return results
+    
+    def run_full_benchmark(self, groups: Tuple[str, ...] = BENCHMARK_GROUPS) -> Dict[str, BenchmarkResult]:
+        """Run the requested benchmark groups"""
+        unknown = [group for group in groups if group not in BENCHMARK_GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown benchmark group(s): {unknown}")
+        
+        print("🏎️ Starting FAF Benchmark Suite...")
+        print("-" * 50)
+        icons = {'read': '📖', 'write': '✍️', 'json': '🔧', 'analyzer': '📊', 'api': '🌐', 'concurrency': '🧵',
+                 'stat': '🗂️', 'startup': '🚀'}
+        all_results = {}
+        for group in groups:
+            print(f"{icons[group]} Benchmarking {group} operations...")
+            all_results.update(getattr(self, f"benchmark_{group}_operations")())
+        return all_results
+    
+    def generate_report(self, results: Dict[str, BenchmarkResult]) -> str:
+        """Generate benchmark report"""
+        report = []
+        report.append("=" * 78)
+        report.append("FAF FILE TOOLS - BENCHMARK RESULTS")
+        report.append("=" * 78)
+        ci = f"{self.confidence:.0%} CI"
+        header = f"{'Benchmark':<26}{'Mean':>11}{'Median':>11}{ci:>23}{'ops/s':>12}  n"
+        
+        for group in dict.fromkeys(result.group for result in results.values()):
+            report.append("")
+            report.append(f"{group.upper()} OPERATIONS")
+            report.append("-" * 78)
+            report.append(header)
+            for name, result in results.items():
+                if result.group != group:
+                    continue
+                if not result.ok:
+                    report.append(f"{name:<26}  ❌ {result.error}")
+                    continue
+                interval = f"{_format_ms(result.ci_low_ms)} - {_format_ms(result.ci_high_ms)}"
+                report.append(f"{name:<26}{_format_ms(result.mean_ms):>11}{_format_ms(result.median_ms):>11}"
+                              f"{interval:>23}{result.ops_per_sec:>12,.0f}  {result.samples}"
+                              + (f" (-{result.rejected})" if result.rejected else "")
+                              + (f"  eff {result.efficiency:.0%}" if result.efficiency is not None else ""))
+        
+        failed = sum(not result.ok for result in results.values())
+        report.append("")
+        report.append("=" * 78)
+        report.append(f"🏁 {len(results)} benchmarks, {failed} failed")
+        return "\n".join(report)
+    
+    def settings(self) -> Dict[str, Any]:
+        """Measurement settings recorded with saved and stored results"""
+        return {
+            'samples': self.samples,
+            'warmup': self.warmup,
+            'min_sample_time': self.min_sample_time,
+            'max_time': self.max_time,
+            'confidence': self.confidence
+        }
+    
+    def save_results(self, results: Dict[str, BenchmarkResult], filepath: str) -> str:
+        """Write results plus environment metadata as JSON"""
+        payload = {
+            'timestamp': datetime.now().isoformat(),
+            'environment': environment(),
+            'settings': self.settings(),
+            'results': {name: result.to_dict() for name, result in results.items()}
+        }
+        with open(filepath, 'w') as f:
+            json.dump(payload, f, indent=2, default=str)
+        return filepath
+
+
+@dataclass
+class Comparison:
+    """
+    Change of one statistic of one benchmark between two runs. Benchmarks
+    that cannot be compared get one entry with no statistics: status
+    'missing' (absent from head), 'new' (absent from base), 'failed'
+    (errored in head) or 'recovered' (errored in base only), with the
+    reason in ``detail``.
+    """
+    name: str
+    params: Dict[str, Any]
+    metric: str
+    base_ms: Optional[float]
+    head_ms: Optional[float]
+    change_pct: Optional[float]
+    ci_low_pct: Optional[float]
+    ci_high_pct: Optional[float]
+    status: str
+    detail: str = ''
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class BenchmarkStore:
+    """
+    SQLite history of benchmark runs.
+    
+    Each run is keyed by git commit, machine fingerprint and benchmark
+    settings; each result by benchmark name and parameters, with its kept
+    per-sample timings so runs can be compared statistically later.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            git_commit TEXT,
+            dirty INTEGER NOT NULL DEFAULT 0,
+            machine TEXT NOT NULL,
+            label TEXT,
+            environment TEXT NOT NULL,
+            settings TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS results (
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            grp TEXT NOT NULL,
+            params TEXT NOT NULL,
+            result TEXT NOT NULL,
+            PRIMARY KEY (run_id, name, params)
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_commit ON runs (git_commit, machine);
+    """
+    
+    def __init__(self, path: str = BENCHMARK_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self) -> "BenchmarkStore":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def add_run(self, results: Dict[str, BenchmarkResult], settings: Optional[Dict[str, Any]] = None,
+                label: Optional[str] = None, commit: Optional[str] = None,
+                dirty: Optional[bool] = None, env: Optional[Dict[str, Any]] = None) -> int:
+        """Store a run; commit and dirty default to the current git checkout"""
+        if commit is None:
+            commit, detected_dirty = git_commit()
+            dirty = detected_dirty if dirty is None else dirty
+        env = env or environment()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (timestamp, git_commit, dirty, machine, label, environment, settings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(), commit, int(bool(dirty)), machine_fingerprint(env), label,
+                 json.dumps(env, sort_keys=True), json.dumps(settings or {}, sort_keys=True)))
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO results (run_id, name, grp, params, result) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, result.name, result.group, json.dumps(result.params, sort_keys=True),
+                  json.dumps(result.to_dict())) for result in results.values()])
+        return run_id
+    
+    def runs(self, machine: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs first"""
+        query = "SELECT id, timestamp, git_commit, dirty, machine, label FROM runs"
+        args: Tuple = ()
+        if machine is not None:
+            query += " WHERE machine = ?"
+            args = (machine,)
+        rows = self.conn.execute(query + " ORDER BY id DESC LIMIT ?", args + (limit,))
+        return [dict(row) for row in rows]
+    
+    def resolve_run(self, ref: Any = None, machine: Optional[str] = None) -> int:
+        """
+        Run id for ``ref``: an id, a commit (prefix) or label, 'latest' /
+        None, or 'previous'; commits and labels resolve to their newest run.
+        """
+        where, args = ("WHERE machine = ?", (machine,)) if machine else ("", ())
+        if ref is None or ref in ('latest', 'previous'):
+            rows = self.conn.execute(f"SELECT id FROM runs {where} ORDER BY id DESC LIMIT 2", args).fetchall()
+            index = 1 if ref == 'previous' else 0
+            if len(rows) <= index:
+                raise LookupError(f"No {ref or 'latest'} benchmark run in {self.path}")
+            return rows[index]['id']
+        if isinstance(ref, int) or str(ref).isdigit():
+            row = self.conn.execute("SELECT id FROM runs WHERE id = ?", (int(ref),)).fetchone()
+            if row:
+                return row['id']
+        clause = "(git_commit LIKE ? OR label = ?)" + (" AND machine = ?" if machine else "")
+        row = self.conn.execute(f"SELECT id FROM runs WHERE {clause} ORDER BY id DESC LIMIT 1",
+                                (f"{ref}%", str(ref)) + args).fetchone()
+        if row is None:
+            raise LookupError(f"No benchmark run matches {ref!r} in {self.path}")
+        return row['id']
+    
+    def run_info(self, run_id: int) -> Dict[str, Any]:
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        info = dict(row)
+        info['environment'] = json.loads(info['environment'])
+        info['settings'] = json.loads(info['settings'])
+        return info
+    
+    def load_results(self, run_id: int) -> Dict[Tuple[str, str], BenchmarkResult]:
+        """Results of a run keyed by (name, canonical params JSON)"""
+        rows = self.conn.execute("SELECT name, params, result FROM results WHERE run_id = ?", (run_id,))
+        return {(row['name'], row['params']): BenchmarkResult(**json.loads(row['result'])) for row in rows}
+    
+    def compare(self, base: Any = 'previous', head: Any = 'latest',
+                metrics: Tuple[str, ...] = COMPARE_METRICS, threshold: float = COMPARE_THRESHOLD,
+                confidence: float = 0.95) -> List[Comparison]:
+        """
+        Compare two runs benchmark by benchmark.
+        
+        A statistic is a regression (or improvement) only when the bootstrap
+        confidence interval of its change excludes zero *and* the change is
+        at least ``threshold`` (relative), so noise and trivial shifts pass.
+        Benchmarks missing from either run or failing in head are reported
+        too (see Comparison); GATE_FAILURES lists the statuses that fail,
+        so new benchmarks and a base that ran fewer groups still pass.
+        """
+        base_results = self.load_results(self.resolve_run(base))
+        head_results = self.load_results(self.resolve_run(head))
+        comparisons = []
+        for key in base_results.keys() - head_results.keys():
+            result = base_results[key]
+            comparisons.append(_uncompared(result, 'missing', "not in head run"))
+        for key, head_result in head_results.items():
+            base_result = base_results.get(key)
+            if base_result is None:
+                comparisons.append(_uncompared(head_result, 'new', "not in base run"))
+                continue
+            if not head_result.ok:
+                comparisons.append(_uncompared(head_result, 'failed', head_result.error or "no samples"))
+                continue
+            if not base_result.ok:
+                comparisons.append(_uncompared(head_result, 'recovered', base_result.error or "no samples"))
+                continue
+            base_timings = np.asarray(base_result.timings_ms)
+            head_timings = np.asarray(head_result.timings_ms)
+            for metric in metrics:
+                base_value = float(_STATISTICS[metric](base_timings))
+                head_value = float(_STATISTICS[metric](head_timings))
+                low, high = bootstrap_difference(base_timings, head_timings, metric, confidence)
+                change = (head_value - base_value) / base_value
+                if low > 0 and change >= threshold:
+                    status = 'regression'
+                elif high < 0 and change <= -threshold:
+                    status = 'improvement'
+                else:
+                    status = 'unchanged'
+                comparisons.append(Comparison(
+                    name=head_result.name,
+                    params=head_result.params,
+                    metric=metric,
+                    base_ms=base_value,
+                    head_ms=head_value,
+                    change_pct=change * 100,
+                    ci_low_pct=low / base_value * 100,
+                    ci_high_pct=high / base_value * 100,
+                    status=status
+                ))
+        return comparisons
+
+
+def _uncompared(result: BenchmarkResult, status: str, detail: str) -> Comparison:
+    return Comparison(name=result.name, params=result.params, metric='', base_ms=None, head_ms=None,
+                      change_pct=None, ci_low_pct=None, ci_high_pct=None, status=status, detail=detail)
+
+
+def format_comparison(comparisons: List[Comparison], base: Dict[str, Any], head: Dict[str, Any]) -> str:
+    """Text table of a run comparison, worst regressions first"""
+    def describe(run: Dict[str, Any]) -> str:
+        commit = (run['git_commit'] or 'no-git')[:10] + ('+dirty' if run['dirty'] else '')
+        return f"run {run['id']} ({commit}{', ' + run['label'] if run['label'] else ''})"
+    
+    report = []
+    report.append("=" * 78)
+    report.append(f"BENCHMARK COMPARISON: {describe(base)} -> {describe(head)}")
+    report.append("=" * 78)
+    if base['machine'] != head['machine']:
+        report.append("⚠️ Runs come from different machines; differences may not be meaningful")
+    report.append(f"{'Benchmark':<26}{'Stat':>7}{'Base':>11}{'Head':>11}{'Change':>9}{'CI':>18}  Status")
+    report.append("-" * 78)
+    order = {'failed': 0, 'missing': 1, 'regression': 2, 'improvement': 3, 'recovered': 4, 'new': 5, 'unchanged': 6}
+    icons = {'failed': '💥', 'missing': '❓', 'regression': '❌', 'improvement': '✅', 'new': '🆕'}
+    for c in sorted(comparisons, key=lambda c: (order[c.status], -(c.change_pct or 0))):
+        icon = icons.get(c.status, '  ')
+        if c.change_pct is None:
+            report.append(f"{c.name:<26}{'':>56}  {icon} {c.status}: {c.detail}")
+            continue
+        interval = f"[{c.ci_low_pct:+.1f}, {c.ci_high_pct:+.1f}]%"
+        report.append(f"{c.name:<26}{c.metric:>7}{_format_ms(c.base_ms):>11}{_format_ms(c.head_ms):>11}"
+                      f"{c.change_pct:>+8.1f}%{interval:>18}  {icon} {c.status}")
+    counts = {status: sum(c.status == status for c in comparisons) for status in order}
+    compared = sum(c.change_pct is not None for c in comparisons)
+    report.append("-" * 78)
+    report.append(f"{counts['regression']} regressions, {counts['improvement']} improvements, "
+                  f"{compared} statistics compared")
+    if counts['missing'] or counts['failed']:
+        report.append(f"{counts['failed']} benchmarks failed in head, {counts['missing']} missing from head")
+    if counts['new']:
+        report.append(f"{counts['new']} benchmarks new in head (not gated)")
+    return "\n".join(report)
+
+
+def _split(total: int, parts: int) -> List[int]:
+    """Share ``total`` operations out among ``parts`` workers as evenly as possible"""
+    share, extra = divmod(total, parts)
+    return [share + (i < extra) for i in range(parts)]
+
+
+def _concurrent_operation(workload: str, path: str, worker: int, payload: Optional[bytes]):
+    """One operation of a concurrent workload"""
+    if workload == 'read':
+        with open(path, 'rb') as f:
+            f.read()
+    elif workload == 'write':
+        with open(f"{path}.{worker}", 'wb') as f:
+            f.write(payload)
+    elif workload == 'hash':
+        hash_file(path)
+    else:
+        with open(path, 'rb') as f:
+            json.load(f)
+
+
+def _run_workload(job: Tuple[str, str, int, int]):
+    """Worker entry point: run ``count`` operations of one workload"""
+    workload, path, count, worker = job
+    payload = Path(path).read_bytes() if workload == 'write' else None
+    for _ in range(count):
+        _concurrent_operation(workload, path, worker, payload)
+
+
+def _repeated_stat_read(path: Path) -> int:
+    """Read as the API did before snapshots: exists(), size check, two stats for the response"""
+    if not path.exists() or path.stat().st_size > BENCHMARK_FILE_SIZES['1MB']:
+        raise FileNotFoundError(path)
+    with open(path, 'rb') as f:
+        f.read()
+    return path.stat().st_size + path.stat().st_size
+
+
+def _snapshot_stat_read(path: Path) -> int:
+    """Read with one open+fstat snapshot"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > BENCHMARK_FILE_SIZES['1MB']:
+            raise ValueError(path)
+        f.read()
+    return size
+
+
+def _repeated_stat_metadata(path: Path) -> Tuple[int, float]:
+    if not path.exists():
+        raise FileNotFoundError(path)
+    stats = path.stat()
+    return stats.st_size, stats.st_mtime
+
+
+def _snapshot_stat_metadata(path: Path) -> Tuple[int, float]:
+    stats = path.stat()
+    return stats.st_size, stats.st_mtime
+
+
+def _repeated_stat_list(path: Path) -> List[Tuple]:
+    """List as the API did before snapshots: up to four stats per entry"""
+    if not path.exists() or not path.is_dir():
+        raise NotADirectoryError(path)
+    return [(item.name, item.is_dir(), item.stat().st_size if item.is_file() else None, item.stat().st_mtime)
+            for item in path.iterdir()]
+
+
+def _snapshot_stat_list(path: Path) -> List[Tuple]:
+    """List with os.scandir: types from the listing, one stat per entry"""
+    with os.scandir(path) as entries:
+        listing = []
+        for entry in entries:
+            stats = entry.stat()
+            listing.append((entry.name, entry.is_dir(), stats.st_size if entry.is_file() else None, stats.st_mtime))
+        return listing
+
+
+_STAT_HANDLERS = {
+    ('read', 'repeated'): _repeated_stat_read,
+    ('read', 'snapshot'): _snapshot_stat_read,
+    ('metadata', 'repeated'): _repeated_stat_metadata,
+    ('metadata', 'snapshot'): _snapshot_stat_metadata,
+    ('list', 'repeated'): _repeated_stat_list,
+    ('list', 'snapshot'): _snapshot_stat_list
+}
+
+
+class _StatCounter:
+    """
+    Count stat-family calls made while active: os.stat/lstat/fstat and the
+    first stat() of each os.scandir entry (later ones are cached). The fstat
+    open() performs internally is not visible from Python and not counted.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __enter__(self) -> "_StatCounter":
+        self._originals = {name: getattr(os, name) for name in ('stat', 'lstat', 'fstat', 'scandir')}
+        for name in ('stat', 'lstat', 'fstat'):
+            setattr(os, name, self._counted(self._originals[name]))
+        scandir = self._originals['scandir']
+        counter = self
+        
+        class CountedScandir:
+            def __init__(self, *args, **kwargs):
+                self._iterator = scandir(*args, **kwargs)
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                self._iterator.close()
+            
+            def __iter__(self):
+                for entry in self._iterator:
+                    yield _CountedEntry(entry, counter)
+        
+        os.scandir = CountedScandir
+        return self
+    
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+    
+    def _counted(self, function: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return function(*args, **kwargs)
+        return counted
+
+
+class _CountedEntry:
+    """os.DirEntry proxy counting its first stat()"""
+    
+    def __init__(self, entry: os.DirEntry, counter: _StatCounter):
+        self._entry = entry
+        self._counter = counter
+        self._stat_seen = False
+    
+    def stat(self, *args, **kwargs):
+        if not self._stat_seen:
+            self._stat_seen = True
+            self._counter.calls += 1
+        return self._entry.stat(*args, **kwargs)
+    
+    def __getattr__(self, attr: str):
+        return getattr(self._entry, attr)
+
+
+class _ConcurrentRunner:
+    """Persistent pool (or event loop) running one batch of jobs per call"""
+    
+    def __init__(self, mode: str, level: int):
+        self.mode = mode
+        self.level = level
+        self.pool = None
+        self.loop = None
+    
+    def __enter__(self) -> "_ConcurrentRunner":
+        if self.mode == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers=self.level)
+        elif self.mode == 'process':
+            self.pool = ProcessPoolExecutor(max_workers=self.level)
+        else:
+            self.loop = asyncio.new_event_loop()
+            self.loop.set_default_executor(ThreadPoolExecutor(max_workers=self.level))
+        return self
+    
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.loop is not None:
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+    
+    def run(self, jobs: List[Tuple[str, str, int, int]]):
+        if self.pool is not None:
+            list(self.pool.map(_run_workload, jobs))
+        else:
+            self.loop.run_until_complete(self._gather(jobs))
+    
+    async def _gather(self, jobs: List[Tuple[str, str, int, int]]):
+        # One task per worker, each awaiting its blocking file operations in
+        # the default executor the way aiofiles does for the API server
+        async def task(workload: str, path: str, count: int, worker: int):
+            payload = Path(path).read_bytes() if workload == 'write' else None
+            for _ in range(count):
+                await asyncio.to_thread(_concurrent_operation, workload, path, worker, payload)
+        await asyncio.gather(*(task(*job) for job in jobs))
+
+
+def _json_document(records: int) -> Dict[str, Any]:
+    """JSON-serializable document with ``records`` small records"""
+    return {'records': [{'key': 'value', 'index': i, 'tags': ['faf', 'bench']} for i in range(records)]}
+
+
+def _format_ms(value: float) -> str:
+    if value < 1:
+        return f"{value * 1000:.1f}µs"
+    return f"{value:.2f}ms"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite, list stored runs or compare two of them"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ('run', 'history', 'compare', '-h', '--help'):
+        argv.insert(0, 'run')  # `faf_benchmark.py [groups]` runs the suite
+    
+    parser = argparse.ArgumentParser(description="FAF File Tools benchmark suite")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=BENCHMARK_DB, help="SQLite results store")
+    commands = parser.add_subparsers(dest="command")
+    
+    run = commands.add_parser("run", parents=[common], help="run benchmarks and store the results")
+    run.add_argument("groups", nargs="*", default=list(BENCHMARK_GROUPS),
+                     help=f"benchmark groups to run ({', '.join(BENCHMARK_GROUPS)})")
+    run.add_argument("--samples", type=int, default=20)
+    run.add_argument("--max-time", type=float, default=2.0, help="seconds per benchmark")
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--label", help="name for this run (e.g. a release tag)")
+    run.add_argument("--no-store", action="store_true", help="do not record the run in --db")
+    
+    history = commands.add_parser("history", parents=[common], help="list stored runs")
+    history.add_argument("--limit", type=int, default=20)
+    
+    compare = commands.add_parser("compare", parents=[common],
+                                  help="compare two stored runs; exits 1 on regressions, failed or missing benchmarks")
+    compare.add_argument("base", nargs="?", default="previous", help="run id, commit, label or 'previous'")
+    compare.add_argument("head", nargs="?", default="latest", help="run id, commit, label or 'latest'")
+    compare.add_argument("--threshold", type=float, default=COMPARE_THRESHOLD,
+                         help="smallest relative change to flag (default: 0.05)")
+    compare.add_argument("--json", action="store_true", help="print comparisons as JSON")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "run":
+        with FAFBenchmark(samples=args.samples, max_time=args.max_time) as benchmark:
+            results = benchmark.run_full_benchmark(tuple(args.groups))
+            print(benchmark.generate_report(results))
+            benchmark.save_results(results, args.output)
+            print(f"\n✅ Results saved to {args.output}")
+            if not args.no_store:
+                with BenchmarkStore(args.db) as store:
+                    run_id = store.add_run(results, benchmark.settings(), label=args.label)
+                print(f"✅ Stored as run {run_id} in {args.db}")
+        return 0
+    
+    with BenchmarkStore(args.db) as store:
+        if args.command == "history":
+            for run_info in store.runs(limit=args.limit):
+                commit = (run_info['git_commit'] or 'no-git')[:10] + ('+dirty' if run_info['dirty'] else '')
+                print(f"{run_info['id']:>5}  {run_info['timestamp'][:19]}  {commit:<18}"
+                      f"{run_info['machine']}  {run_info['label'] or ''}")
+            return 0
+        
+        base, head = store.resolve_run(args.base), store.resolve_run(args.head)
+        comparisons = store.compare(base, head, threshold=args.threshold)
+        if args.json:
+            print(json.dumps([c.to_dict() for c in comparisons], indent=2))
+        else:
+            print(format_comparison(comparisons, store.run_info(base), store.run_info(head)))
+        return 1 if any(c.status in GATE_FAILURES for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,626 @@ FAF File Tools - Data Analysis Module
 Demonstrates complex Python file operations with data processing
 """
 
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Tuple, Optional
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, List, Dict, Tuple, Optional
 import json
 import csv
 from datetime import datetime, timedelta
-import random
+from pathlib import Path
 import os
+import copy
+import heapq
+import html
+import io
+import shutil
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from faf_lazy import lazy_import
+
+# pandas and numpy are imported on first use, not at module import
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+
+
+# Columns of an operations frame, as produced by generate_sample_data
+OPERATION_COLUMNS = ['timestamp', 'operation', 'file_type', 'duration_ms',
+                     'size_bytes', 'success', 'path']
+
+SAMPLE_OPERATIONS = ['faf_read', 'faf_write', 'faf_init', 'faf_sync', 'faf_enhance']
+SAMPLE_FILE_TYPES = ['.py', '.ts', '.json', '.md', '.txt', '.yaml', '.html']
+
+# Per-operation latency distribution and inclusive size range;
+# latency is (distribution, *params): normal(mean, std),
+# lognormal(median, sigma) or exponential(mean)
+SAMPLE_PROFILES = {
+    'faf_read': {'latency': ('normal', 40, 10), 'size_bytes': (100, 50000)},
+    'faf_write': {'latency': ('normal', 94, 20), 'size_bytes': (500, 100000)},
+    'default': {'latency': ('normal', 150, 50), 'size_bytes': (1000, 25000)}
+}
+
+
+def _draw_latency(rng: np.random.Generator, spec: Tuple, size: int) -> np.ndarray:
+    """Sample ``size`` latencies (ms) from a SAMPLE_PROFILES latency spec"""
+    kind, *params = spec
+    if kind == 'normal':
+        return rng.normal(params[0], params[1], size)
+    if kind == 'lognormal':
+        return rng.lognormal(np.log(params[0]), params[1], size)
+    if kind == 'exponential':
+        return rng.exponential(params[0], size)
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def _frame_fingerprint(df: pd.DataFrame) -> Tuple:
+    """Cheap change check for memoized frame statistics: shape, columns and column totals"""
+    return (df.shape, tuple(df.columns),
+            float(df['duration_ms'].sum()) if 'duration_ms' in df else None,
+            int(df['size_bytes'].sum()) if 'size_bytes' in df else None,
+            int(df['success'].sum()) if 'success' in df else None)
+
+
+def _sample_paths(start_index: int, ft_codes: np.ndarray) -> Any:
+    """
+    '/test/path/file_<row><ext>' for each row. Joined with Arrow compute
+    kernels when pyarrow is installed; NumPy string ops are slower than a
+    plain comprehension here, so that remains the fallback.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return [f'/test/path/file_{i}{SAMPLE_FILE_TYPES[code]}'
+                for i, code in zip(range(start_index, start_index + len(ft_codes)), ft_codes.tolist())]
+    rows = pc.cast(pa.array(np.arange(start_index, start_index + len(ft_codes))), pa.string())
+    extensions = pa.array(SAMPLE_FILE_TYPES).take(pa.array(ft_codes))
+    return pc.binary_join_element_wise('/test/path/file_', rows, extensions, '').to_pandas()
+
+
+# Upper bound on partition directories one Parquet export may create
+PARQUET_MAX_PARTITIONS = 1 << 16
+
+# compact_frame stores paths as a categorical (an interned path dictionary)
+# when at most this fraction of the rows are distinct paths
+PATH_CATEGORY_RATIO = 0.5
+
+# Latency quantiles reported per time window by analyze_windows
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+
+# Largest groups listed per breakdown table in rendered reports
+REPORT_TOP_N = 20
+
+# Columns analyze_performance breaks metrics down by
+GROUP_COLUMNS = {'operation': 'by_operation', 'file_type': 'by_file_type'}
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch-style).
+    
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within ``relative_accuracy`` of the true value and two sketches merge by
+    adding bucket counts.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.offset = 0
+        self.bins = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+    
+    def update(self, values: Any):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values[values > 0]
+        self.count += len(values)
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+            low = int(keys.min())
+            self._add(low, np.bincount(keys - low))
+    
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        if len(other.bins):
+            self._add(other.offset, other.bins)
+    
+    def _add(self, offset: int, counts: np.ndarray):
+        if not len(self.bins):
+            self.offset, self.bins = offset, counts.astype(np.int64)
+            return
+        low = min(self.offset, offset)
+        high = max(self.offset + len(self.bins), offset + len(counts))
+        if low != self.offset or high != self.offset + len(self.bins):
+            grown = np.zeros(high - low, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.bins)] = self.bins
+            self.offset, self.bins = low, grown
+        self.bins[offset - self.offset:offset - self.offset + len(counts)] += counts
+    
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float('nan')
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.bins) + self.zero_count
+        key = self.offset + int(np.searchsorted(cumulative, rank, side='right'))
+        return float(2 * self.gamma ** key / (self.gamma + 1))
+
+
+class DistinctCounter:
+    """
+    Mergeable distinct-value counter.
+    
+    Exact (a set of 64-bit hashes) up to ``exact_limit`` values, then a
+    HyperLogLog sketch with 2**14 registers (~0.8% standard error).
+    """
+    PRECISION = 14
+    
+    def __init__(self, exact_limit: int = 100_000):
+        self.exact_limit = exact_limit
+        self.hashes: Optional[set] = set()
+        self.registers: Optional[np.ndarray] = None
+    
+    def update(self, values: Any):
+        hashes = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+        if self.hashes is not None:
+            self.hashes.update(np.unique(hashes).tolist())
+            if len(self.hashes) > self.exact_limit:
+                self._switch_to_sketch()
+        else:
+            np.maximum(self.registers, self._registers_for(hashes), out=self.registers)
+    
+    def merge(self, other: "DistinctCounter"):
+        if self.hashes is not None and other.hashes is not None:
+            self.hashes |= other.hashes
+            if len(self.hashes) > self.exact_limit:
+                self._switch_to_sketch()
+            return
+        if self.hashes is not None:
+            self._switch_to_sketch()
+        other_registers = other.registers
+        if other_registers is None:
+            other_registers = self._registers_for(np.fromiter(other.hashes, dtype=np.uint64))
+        np.maximum(self.registers, other_registers, out=self.registers)
+    
+    def estimate(self) -> int:
+        if self.hashes is not None:
+            return len(self.hashes)
+        m = 1 << self.PRECISION
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # small-range correction
+        return int(round(estimate))
+    
+    def __getstate__(self) -> Dict:
+        # Ship exact hashes as one uint64 array rather than a set of ints
+        state = self.__dict__.copy()
+        if self.hashes is not None:
+            state['hashes'] = np.fromiter(self.hashes, dtype=np.uint64, count=len(self.hashes))
+        return state
+    
+    def __setstate__(self, state: Dict):
+        if state['hashes'] is not None:
+            state['hashes'] = set(state['hashes'].tolist())
+        self.__dict__.update(state)
+    
+    def _switch_to_sketch(self):
+        self.registers = self._registers_for(np.fromiter(self.hashes, dtype=np.uint64))
+        self.hashes = None
+    
+    def _registers_for(self, hashes: np.ndarray) -> np.ndarray:
+        p = self.PRECISION
+        registers = np.zeros(1 << p, dtype=np.uint8)
+        if not len(hashes):
+            return registers
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes << np.uint64(p)
+        # Position of the first set bit in the remaining 64 - p bits
+        rank = np.full(len(hashes), 64 - p + 1, dtype=np.uint8)
+        nonzero = rest != 0
+        rank[nonzero] = 64 - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(registers, index, rank)
+        return registers
+
+
+class _GroupTotals:
+    """Running sums and latency sketch for one slice of the operations"""
+    
+    def __init__(self):
+        self.count = 0
+        self.successes = 0
+        self.duration_sum = 0.0
+        self.size_sum = 0
+        self.durations = QuantileSketch()
+    
+    def merge(self, other: "_GroupTotals"):
+        self.count += other.count
+        self.successes += other.successes
+        self.duration_sum += other.duration_sum
+        self.size_sum += other.size_sum
+        self.durations.merge(other.durations)
+    
+    def metrics(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_duration_ms': self.duration_sum / self.count,
+            'avg_size_bytes': self.size_sum / self.count,
+            'success_rate': self.successes / self.count * 100,
+            'p95_duration_ms': self.durations.quantile(0.95),
+            'p99_duration_ms': self.durations.quantile(0.99)
+        }
+
+
+class PartialAggregate:
+    """
+    Mergeable partial aggregates of operations frames.
+    
+    ``update`` folds in a chunk, ``merge`` combines partials computed
+    elsewhere (other chunks, files or processes) and ``to_analysis`` returns
+    the same structure as FAFDataAnalyzer.analyze_performance. Quantiles
+    come from QuantileSketch and unique files from DistinctCounter, so
+    memory does not grow with the number of rows.
+    """
+    
+    def __init__(self):
+        self.totals = _GroupTotals()
+        self.groups: Dict[str, Dict[str, _GroupTotals]] = {column: {} for column in GROUP_COLUMNS}
+        self.paths = DistinctCounter()
+        self.first_timestamp = None
+        self.last_timestamp = None
+    
+    def update(self, df: pd.DataFrame):
+        if not len(df):
+            return
+        durations = df['duration_ms'].to_numpy(dtype=np.float64)
+        sizes = df['size_bytes'].to_numpy(dtype=np.float64)
+        success = df['success'].to_numpy(dtype=bool)
+        timestamps = df['timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps)
+        
+        self._fold(self.totals, len(df), success.sum(), durations.sum(), sizes.sum(), durations)
+        self._extend_time_range(timestamps.min(), timestamps.max())
+        self.paths.update(df['path'])
+        
+        for column in GROUP_COLUMNS:
+            codes, names = pd.factorize(df[column], sort=False)
+            valid = codes >= 0
+            codes = codes[valid]
+            counts = np.bincount(codes, minlength=len(names))
+            successes = np.bincount(codes, weights=success[valid], minlength=len(names))
+            duration_sums = np.bincount(codes, weights=durations[valid], minlength=len(names))
+            size_sums = np.bincount(codes, weights=sizes[valid], minlength=len(names))
+            # One stable sort splits every group's durations for the sketches
+            grouped = np.split(durations[valid][np.argsort(codes, kind='stable')],
+                               np.cumsum(counts)[:-1])
+            
+            groups = self.groups[column]
+            for i, name in enumerate(names):
+                totals = groups.setdefault(str(name), _GroupTotals())
+                self._fold(totals, counts[i], successes[i], duration_sums[i], size_sums[i], grouped[i])
+    
+    def merge(self, other: "PartialAggregate") -> "PartialAggregate":
+        self.totals.merge(other.totals)
+        for column, groups in other.groups.items():
+            for name, totals in groups.items():
+                self.groups[column].setdefault(name, _GroupTotals()).merge(totals)
+        self.paths.merge(other.paths)
+        if other.first_timestamp is not None:
+            self._extend_time_range(other.first_timestamp, other.last_timestamp)
+        return self
+    
+    def to_analysis(self) -> Dict:
+        totals = self.totals
+        count = totals.count
+        return {
+            'summary': {
+                'total_operations': count,
+                'unique_files': self.paths.estimate(),
+                'time_range': {
+                    'start': str(self.first_timestamp),
+                    'end': str(self.last_timestamp)
+                },
+                'success_rate': totals.successes / count * 100 if count else float('nan')
+            },
+            'performance': {
+                'avg_duration_ms': totals.duration_sum / count if count else float('nan'),
+                'median_duration_ms': totals.durations.quantile(0.5),
+                'p95_duration_ms': totals.durations.quantile(0.95),
+                'p99_duration_ms': totals.durations.quantile(0.99),
+                'total_bytes_processed': totals.size_sum,
+                'avg_file_size_bytes': totals.size_sum / count if count else float('nan')
+            },
+            **{key: {name: group.metrics() for name, group in self.groups[column].items()}
+               for column, key in GROUP_COLUMNS.items()}
+        }
+    
+    @staticmethod
+    def _fold(totals: _GroupTotals, count, successes, duration_sum, size_sum, durations):
+        totals.count += int(count)
+        totals.successes += int(successes)
+        totals.duration_sum += float(duration_sum)
+        totals.size_sum += int(size_sum)
+        totals.durations.update(durations)
+    
+    def _extend_time_range(self, start, end):
+        if self.first_timestamp is None or start < self.first_timestamp:
+            self.first_timestamp = start
+        if self.last_timestamp is None or end > self.last_timestamp:
+            self.last_timestamp = end
+
+
+def _iter_frames(data: Any) -> Iterator[pd.DataFrame]:
+    """Treat a frame or an iterable of frames uniformly as a stream of chunks"""
+    if isinstance(data, pd.DataFrame):
+        yield data
+    else:
+        yield from data
+
+
+# Rendered report layout: (key, label, format) per field and group column
+REPORT_TITLE = "FAF FILE TOOLS - PERFORMANCE ANALYSIS REPORT"
+REPORT_FOOTER = ("Report generated by FAF Data Analyzer v2.0.0",
+                 "🏎️ Built for speed. Designed for excellence.")
+REPORT_SUMMARY_FIELDS = (
+    ('total_operations', 'Total Operations', '{:,}'),
+    ('unique_files', 'Unique Files', '{:,}'),
+    ('success_rate', 'Success Rate', '{:.2f}%')
+)
+REPORT_PERFORMANCE_FIELDS = (
+    ('avg_duration_ms', 'Average Duration', '{:.2f}ms'),
+    ('median_duration_ms', 'Median Duration', '{:.2f}ms'),
+    ('p95_duration_ms', '95th Percentile', '{:.2f}ms'),
+    ('p99_duration_ms', '99th Percentile', '{:.2f}ms'),
+    ('total_bytes_processed', 'Total Bytes', '{:,}'),
+    ('avg_file_size_bytes', 'Avg File Size', '{:.0f} bytes')
+)
+REPORT_GROUP_COLUMNS = (
+    ('count', 'Count', '{:,}'),
+    ('avg_duration_ms', 'Avg ms', '{:.2f}'),
+    ('p95_duration_ms', 'P95 ms', '{:.2f}'),
+    ('avg_size_bytes', 'Avg Bytes', '{:,.0f}'),
+    ('success_rate', 'Success %', '{:.2f}')
+)
+REPORT_GROUP_TITLES = {'by_operation': ('🔧', 'PERFORMANCE BY OPERATION'),
+                       'by_file_type': ('📁', 'PERFORMANCE BY FILE TYPE')}
+
+
+def _format_metric(spec: str, value: Any) -> str:
+    if value is None:
+        return '-'
+    try:
+        return spec.format(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _json_metric(value: Any) -> Any:
+    """Plain JSON value for a metric (numpy scalars unwrapped, NaN as null)"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _top_groups(groups: Dict[str, Dict], top_n: Optional[int]) -> Tuple[List[Tuple[str, Dict]], int, int]:
+    """Largest ``top_n`` groups by count plus the number of groups/operations left out"""
+    by_count = lambda item: item[1]['count']
+    if top_n is None or len(groups) <= top_n:
+        return sorted(groups.items(), key=by_count, reverse=True), 0, 0
+    top = heapq.nlargest(top_n, groups.items(), key=by_count)
+    omitted_ops = sum(metrics['count'] for metrics in groups.values()) - sum(m['count'] for _, m in top)
+    return top, len(groups) - len(top), int(omitted_ops)
+
+
+class _AnalysisReport:
+    """Renders one output format from the events of _render_analysis"""
+    
+    def __init__(self, handle):
+        self.handle = handle
+    
+    def begin(self, title: str):
+        pass
+    
+    def section(self, key: str, icon: str, title: str):
+        pass
+    
+    def field(self, key: str, label: str, value: Any, text: str):
+        pass
+    
+    def groups(self, key: str, rows: List[Tuple[str, Dict, List[str]]], omitted: int, omitted_ops: int):
+        pass
+    
+    def end(self, footer: Tuple[str, ...]):
+        pass
+
+
+class _TextReport(_AnalysisReport):
+    """Plain text, as printed by main()"""
+    
+    def begin(self, title):
+        self.handle.write(f"{'=' * 60}\n{title}\n{'=' * 60}\n")
+    
+    def section(self, key, icon, title):
+        self.handle.write(f"\n{icon} {title}\n{'-' * 40}\n")
+    
+    def field(self, key, label, value, text):
+        self.handle.write(f"{label}: {text}\n")
+    
+    def groups(self, key, rows, omitted, omitted_ops):
+        headers = ['Name'] + [label for _, label, _ in REPORT_GROUP_COLUMNS]
+        table = [[name] + cells for name, _, cells in rows]
+        widths = [max(len(row[i]) for row in [headers] + table) for i in range(len(headers))]
+        for row in [headers] + table:
+            self.handle.write(row[0].ljust(widths[0]) + "".join(
+                "  " + cell.rjust(width) for cell, width in zip(row[1:], widths[1:])) + "\n")
+        if omitted:
+            self.handle.write(f"... {omitted:,} more ({omitted_ops:,} operations)\n")
+    
+    def end(self, footer):
+        self.handle.write(f"\n{'=' * 60}\n" + "\n".join(footer))
+
+
+class _MarkdownReport(_AnalysisReport):
+    """GitHub-flavoured Markdown"""
+    
+    def begin(self, title):
+        self.handle.write(f"# {title}\n")
+    
+    def section(self, key, icon, title):
+        self.handle.write(f"\n## {icon} {title}\n\n")
+    
+    def field(self, key, label, value, text):
+        self.handle.write(f"- **{label}:** {text}\n")
+    
+    def groups(self, key, rows, omitted, omitted_ops):
+        self.handle.write("| Name | " + " | ".join(label for _, label, _ in REPORT_GROUP_COLUMNS) + " |\n")
+        self.handle.write("|---|" + "---:|" * len(REPORT_GROUP_COLUMNS) + "\n")
+        for name, _, cells in rows:
+            self.handle.write(f"| {_markdown_cell(name)} | " + " | ".join(cells) + " |\n")
+        if omitted:
+            self.handle.write(f"\n_... {omitted:,} more ({omitted_ops:,} operations)_\n")
+    
+    def end(self, footer):
+        self.handle.write("\n---\n\n" + "  \n".join(footer) + "\n")
+
+
+def _markdown_cell(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("|", "\\|")
+
+
+class _HtmlReport(_AnalysisReport):
+    """Standalone HTML page"""
+    
+    def begin(self, title):
+        self.handle.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n</head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+        )
+        self._open_list = False
+    
+    def section(self, key, icon, title):
+        self._close_list()
+        self.handle.write(f"<h2>{icon} {html.escape(title)}</h2>\n")
+    
+    def field(self, key, label, value, text):
+        if not self._open_list:
+            self.handle.write("<dl>\n")
+            self._open_list = True
+        self.handle.write(f"<dt>{html.escape(label)}</dt><dd>{html.escape(text)}</dd>\n")
+    
+    def groups(self, key, rows, omitted, omitted_ops):
+        write = self.handle.write
+        write("<table>\n<thead><tr><th>Name</th>" +
+              "".join(f"<th>{html.escape(label)}</th>" for _, label, _ in REPORT_GROUP_COLUMNS) +
+              "</tr></thead>\n<tbody>\n")
+        for name, _, cells in rows:
+            write(f"<tr><td>{html.escape(str(name))}</td>" +
+                  "".join(f"<td>{html.escape(cell)}</td>" for cell in cells) + "</tr>\n")
+        write("</tbody>\n</table>\n")
+        if omitted:
+            write(f"<p>... {omitted:,} more ({omitted_ops:,} operations)</p>\n")
+    
+    def end(self, footer):
+        self._close_list()
+        self.handle.write("<footer>\n" + "".join(f"<p>{html.escape(line)}</p>\n" for line in footer) +
+                          "</footer>\n</body>\n</html>\n")
+    
+    def _close_list(self):
+        if self._open_list:
+            self.handle.write("</dl>\n")
+            self._open_list = False
+
+
+class _JsonReport(_AnalysisReport):
+    """Machine-readable JSON with the same (truncated) content"""
+    
+    def begin(self, title):
+        self.report = {'title': title}
+    
+    def section(self, key, icon, title):
+        self.current = self.report[key] = {}
+    
+    def field(self, key, label, value, text):
+        self.current[key] = ({k: _json_metric(v) for k, v in value.items()}
+                             if isinstance(value, dict) else _json_metric(value))
+    
+    def groups(self, key, rows, omitted, omitted_ops):
+        self.current.update({
+            'groups': {name: {k: _json_metric(v) for k, v in metrics.items()} for name, metrics, _ in rows},
+            'omitted_groups': omitted,
+            'omitted_operations': omitted_ops
+        })
+    
+    def end(self, footer):
+        json.dump(self.report, self.handle, indent=2)
+        self.handle.write("\n")
+
+
+# Rendered report format -> (file extension, renderer)
+ANALYSIS_REPORT_FORMATS = {
+    'text': ('.txt', _TextReport),
+    'markdown': ('.md', _MarkdownReport),
+    'html': ('.html', _HtmlReport),
+    'json': ('.json', _JsonReport)
+}
+
+
+def _render_analysis(analysis: Dict, renderers: List[_AnalysisReport], top_n: Optional[int]):
+    """Walk ``analysis`` once, formatting each value once for every renderer"""
+    def emit(method: str, *args):
+        for renderer in renderers:
+            getattr(renderer, method)(*args)
+    
+    emit('begin', REPORT_TITLE)
+    
+    emit('section', 'summary', '📊', 'SUMMARY')
+    summary = analysis['summary']
+    for key, label, spec in REPORT_SUMMARY_FIELDS:
+        emit('field', key, label, summary[key], _format_metric(spec, summary[key]))
+    time_range = summary['time_range']
+    emit('field', 'time_range', 'Time Range', time_range,
+         f"{str(time_range['start'])[:19]} to {str(time_range['end'])[:19]}")
+    
+    emit('section', 'performance', '⚡', 'PERFORMANCE METRICS')
+    perf = analysis['performance']
+    for key, label, spec in REPORT_PERFORMANCE_FIELDS:
+        emit('field', key, label, perf[key], _format_metric(spec, perf[key]))
+    
+    for key, (icon, title) in REPORT_GROUP_TITLES.items():
+        top, omitted, omitted_ops = _top_groups(analysis.get(key, {}), top_n)
+        rows = [(str(name), metrics, [_format_metric(spec, metrics.get(column))
+                                      for column, _, spec in REPORT_GROUP_COLUMNS])
+                for name, metrics in top]
+        emit('section', key, icon, title)
+        emit('groups', key, rows, omitted, omitted_ops)
+    
+    emit('end', REPORT_FOOTER)
+
+
+def _metric_paths(paths: Any) -> List[str]:
+    """Normalise a single path or an iterable of paths to a list of strings"""
+    if isinstance(paths, (str, os.PathLike)):
+        return [os.fspath(paths)]
+    return [os.fspath(path) for path in paths]
+
+
+def _aggregate_file_worker(job: Tuple[str, int]) -> PartialAggregate:
+    """Process pool entry point for analyze_files_parallel"""
+    path, chunk_size = job
+    return FAFDataAnalyzer().aggregate_file(path, chunk_size)
 
 
 class FAFDataAnalyzer:
@@ -20,51 +632,208 @@ class FAFDataAnalyzer:
     def __init__(self):
         self.performance_data = []
         self.file_metrics = {}
+        # Derived statistics per frame, keyed on id() and dropped with the frame;
+        # each entry carries the _frame_fingerprint it was computed for
+        self._frame_cache: Dict[int, Tuple[Tuple, Dict[str, Any]]] = {}
+        # Running aggregates for add_operations / current_analysis, created
+        # on first use so constructing an analyzer does not import numpy
+        self._live: Optional[PartialAggregate] = None
+        self._live_analysis: Optional[Dict] = None
+        self._live_lock = threading.Lock()
         
-    def generate_sample_data(self, num_operations: int = 100) -> pd.DataFrame:
-        """Generate sample performance data for testing"""
+    def generate_sample_data(self, num_operations: int = 100, seed: Optional[int] = None,
+                             operation_mix: Optional[Dict[str, float]] = None,
+                             profiles: Optional[Dict[str, Dict]] = None,
+                             success_rate: float = 0.98,
+                             start_time: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Generate sample performance data for testing.
         
-        operations = ['faf_read', 'faf_write', 'faf_init', 'faf_sync', 'faf_enhance']
-        file_types = ['.py', '.ts', '.json', '.md', '.txt', '.yaml', '.html']
+        Rows are drawn in bulk from a NumPy ``Generator``; the same ``seed``
+        (and ``start_time``) always yields the same frame. ``operation_mix``
+        weights the operations and ``profiles`` overrides the latency
+        distribution / size range per operation (see SAMPLE_PROFILES).
+        """
+        rng = np.random.default_rng(seed)
+        if start_time is None:
+            start_time = datetime.now() - timedelta(hours=24)
+        return self._sample_chunk(rng, num_operations, 0, start_time,
+                                  operation_mix, profiles, success_rate)
+    
+    def stream_sample_data(self, filepath: str, num_operations: int,
+                           chunk_size: int = 1_000_000, seed: Optional[int] = None,
+                           **options) -> str:
+        """Write a large synthetic workload to CSV chunk by chunk (bounded memory)"""
+        rng = np.random.default_rng(seed)
+        start_time = options.pop('start_time', None) or datetime.now() - timedelta(hours=24)
         
-        data = []
-        base_time = datetime.now() - timedelta(hours=24)
+        written = 0
+        while written < num_operations:
+            rows = min(chunk_size, num_operations - written)
+            chunk = self._sample_chunk(rng, rows, written, start_time, **options)
+            chunk.to_csv(filepath, mode='w' if written == 0 else 'a',
+                         header=written == 0, index=False)
+            written += rows
         
-        for i in range(num_operations):
-            timestamp = base_time + timedelta(minutes=i*15)
-            operation = random.choice(operations)
-            file_type = random.choice(file_types)
-            
-            # Simulate realistic performance metrics
-            if operation == 'faf_read':
-                duration_ms = random.gauss(40, 10)  # Average 40ms
-                size_bytes = random.randint(100, 50000)
-            elif operation == 'faf_write':
-                duration_ms = random.gauss(94, 20)  # Average 94ms
-                size_bytes = random.randint(500, 100000)
-            else:
-                duration_ms = random.gauss(150, 50)
-                size_bytes = random.randint(1000, 25000)
-            
-            data.append({
-                'timestamp': timestamp,
-                'operation': operation,
-                'file_type': file_type,
-                'duration_ms': max(1, duration_ms),  # Ensure positive
-                'size_bytes': size_bytes,
-                'success': random.random() > 0.02,  # 98% success rate
-                'path': f'/test/path/file_{i}{file_type}'
-            })
+        return f"Generated {written} records to {filepath}"
+    
+    def _sample_chunk(self, rng: np.random.Generator, rows: int, start_index: int,
+                      start_time: datetime, operation_mix: Optional[Dict[str, float]] = None,
+                      profiles: Optional[Dict[str, Dict]] = None,
+                      success_rate: float = 0.98) -> pd.DataFrame:
+        """Draw ``rows`` operations starting at row ``start_index``"""
+        mix = operation_mix or {op: 1.0 for op in SAMPLE_OPERATIONS}
+        operations = list(mix)
+        weights = np.array([mix[op] for op in operations], dtype=float)
+        profiles = {**SAMPLE_PROFILES, **(profiles or {})}
+        
+        op_codes = rng.choice(len(operations), size=rows, p=weights / weights.sum())
+        ft_codes = rng.integers(len(SAMPLE_FILE_TYPES), size=rows)
+        
+        duration_ms = np.empty(rows)
+        size_bytes = np.empty(rows, dtype=np.int64)
+        for code, op in enumerate(operations):
+            mask = op_codes == code
+            count = int(mask.sum())
+            profile = profiles.get(op, profiles['default'])
+            duration_ms[mask] = _draw_latency(rng, profile['latency'], count)
+            low, high = profile['size_bytes']
+            size_bytes[mask] = rng.integers(low, high, size=count, endpoint=True)
         
-        return pd.DataFrame(data)
+        first = pd.Timestamp(start_time) + pd.Timedelta(minutes=15 * start_index)
+        
+        return pd.DataFrame({
+            'timestamp': pd.date_range(first, periods=rows, freq='15min'),
+            'operation': pd.Categorical.from_codes(op_codes, categories=operations),
+            'file_type': pd.Categorical.from_codes(ft_codes, categories=SAMPLE_FILE_TYPES),
+            'duration_ms': np.maximum(duration_ms, 1),  # Ensure positive
+            'size_bytes': size_bytes,
+            'success': rng.random(rows) < success_rate,
+            'path': _sample_paths(start_index, ft_codes)
+        })
+    
+    def ingest_operations(self, source: Any, chunk_size: int = 100_000) -> pd.DataFrame:
+        """
+        Build an operations frame from real records instead of sample data.
+        
+        ``source`` may be a live FAFPythonBridge, an iterable of FileOperation
+        objects or record dicts (e.g. the ``data`` of /api/metrics), or the
+        path of a JSON Lines log written by FAFPythonBridge.export_operations
+        or the API server's FAF_ACCESS_LOG.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            chunks = list(self.iter_operation_log(source, chunk_size))
+            if not chunks:
+                return self._operations_frame([])
+            return self.compact_frame(pd.concat(chunks, ignore_index=True))
+        return self.compact_frame(self._operations_frame(getattr(source, 'operations', source)))
+    
+    def compact_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Memory-compact copy of an operations frame.
+        
+        Operations and file types become categoricals, durations float32 and
+        sizes the smallest integer type that fits. Paths are interned into a
+        categorical when they repeat enough to pay for the dictionary (see
+        PATH_CATEGORY_RATIO); the distinct count is kept for analyze_performance.
+        """
+        sizes = df['size_bytes']
+        compact = pd.DataFrame({
+            'timestamp': pd.to_datetime(df['timestamp']),
+            'operation': df['operation'].astype('category'),
+            'file_type': df['file_type'].astype('category'),
+            'duration_ms': df['duration_ms'].astype(np.float32),
+            'size_bytes': pd.to_numeric(sizes, downcast='unsigned' if not len(sizes) or sizes.min() >= 0
+                                        else 'integer'),
+            'success': df['success'].astype(bool),
+            'path': df['path']
+        }, columns=OPERATION_COLUMNS)
+        
+        if isinstance(df['path'].dtype, pd.CategoricalDtype):
+            compact['path'] = df['path'].cat.remove_unused_categories()
+            unique_paths = len(compact['path'].cat.categories)
+        else:
+            codes, uniques = pd.factorize(df['path'])
+            unique_paths = len(uniques)
+            if unique_paths <= PATH_CATEGORY_RATIO * len(df):
+                compact['path'] = pd.Categorical.from_codes(codes, categories=uniques)
+        self._frame_stats(compact)['unique_files'] = unique_paths
+        return compact
+    
+    def invalidate(self, df: Optional[pd.DataFrame] = None):
+        """
+        Forget memoized statistics for ``df`` (or every frame). Needed only
+        after in-place edits the fingerprint cannot see, e.g. relabelling
+        operations or swapping two durations.
+        """
+        if df is None:
+            self._frame_cache.clear()
+        else:
+            self._frame_cache.pop(id(df), None)
+    
+    def _frame_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Memo dict for ``df``, started afresh whenever its fingerprint changes"""
+        key = id(df)
+        fingerprint = _frame_fingerprint(df)
+        entry = self._frame_cache.get(key)
+        if entry is None:
+            weakref.finalize(df, self._frame_cache.pop, key, None)
+        if entry is None or entry[0] != fingerprint:
+            entry = self._frame_cache[key] = (fingerprint, {})
+        return entry[1]
+    
+    def iter_operation_log(self, filepath: str, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Read a JSON Lines operation log as a sequence of operations frames"""
+        batch = []
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= chunk_size:
+                    yield self._operations_frame(batch)
+                    batch = []
+        if batch:
+            yield self._operations_frame(batch)
+    
+    def _operations_frame(self, records: Iterable[Any]) -> pd.DataFrame:
+        """Collect operation records column by column into a compact frame"""
+        columns = {name: [] for name in OPERATION_COLUMNS}
+        for record in records:
+            get = record.get if isinstance(record, dict) else record.__getattribute__
+            path = get('path')
+            columns['timestamp'].append(get('timestamp'))
+            columns['operation'].append(get('operation'))
+            columns['file_type'].append(os.path.splitext(path)[1].lower())
+            columns['duration_ms'].append(get('duration_ms'))
+            columns['size_bytes'].append(get('size_bytes'))
+            columns['success'].append(get('success'))
+            columns['path'].append(path)
+        
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(columns['timestamp'], format='ISO8601'),
+            'operation': pd.Categorical(columns['operation']),
+            'file_type': pd.Categorical(columns['file_type']),
+            'duration_ms': np.asarray(columns['duration_ms'], dtype=np.float64),
+            'size_bytes': np.asarray(columns['size_bytes'], dtype=np.int64),
+            'success': np.asarray(columns['success'], dtype=bool),
+            'path': columns['path']
+        }, columns=OPERATION_COLUMNS)
     
     def analyze_performance(self, df: pd.DataFrame) -> Dict:
-        """Analyze performance metrics from operations data"""
+        """Analyze performance metrics from operations data (memoized per frame)"""
+        stats = self._frame_stats(df)
+        if 'analysis' not in stats:
+            stats['analysis'] = self._analyze_frame(df, stats)
+        return copy.deepcopy(stats['analysis'])
+    
+    def _analyze_frame(self, df: pd.DataFrame, stats: Dict[str, Any]) -> Dict:
+        if 'unique_files' not in stats:
+            stats['unique_files'] = df['path'].nunique()
         
         analysis = {
             'summary': {
                 'total_operations': len(df),
-                'unique_files': df['path'].nunique(),
+                'unique_files': stats['unique_files'],
                 'time_range': {
                     'start': str(df['timestamp'].min()),
                     'end': str(df['timestamp'].max())
@@ -79,322 +848,321 @@ class FAFDataAnalyzer:
                 'total_bytes_processed': df['size_bytes'].sum(),
                 'avg_file_size_bytes': df['size_bytes'].mean()
             },
-            'by_operation': {},
-            'by_file_type': {}
+            'by_operation': self._group_metrics(df, 'operation'),
+            'by_file_type': self._group_metrics(df, 'file_type')
         }
         
-        # Analysis by operation type
-        for op in df['operation'].unique():
-            op_data = df[df['operation'] == op]
-            analysis['by_operation'][op] = {
-                'count': len(op_data),
-                'avg_duration_ms': op_data['duration_ms'].mean(),
-                'avg_size_bytes': op_data['size_bytes'].mean(),
-                'success_rate': (op_data['success'].sum() / len(op_data) * 100)
-            }
-        
-        # Analysis by file type
-        for ft in df['file_type'].unique():
-            ft_data = df[df['file_type'] == ft]
-            analysis['by_file_type'][ft] = {
-                'count': len(ft_data),
-                'avg_duration_ms': ft_data['duration_ms'].mean(),
-                'avg_size_bytes': ft_data['size_bytes'].mean()
-            }
-        
         return analysis
     
-    def generate_performance_report(self, analysis: Dict) -> str:
-        """Generate a formatted performance report"""
-        
-        report = []
-        report.append("=" * 60)
-        report.append("FAF FILE TOOLS - PERFORMANCE ANALYSIS REPORT")
-        report.append("=" * 60)
-        report.append("")
-        
-        # Summary section
-        report.append("📊 SUMMARY")
-        report.append("-" * 40)
-        summary = analysis['summary']
-        report.append(f"Total Operations: {summary['total_operations']:,}")
-        report.append(f"Unique Files: {summary['unique_files']:,}")
-        report.append(f"Success Rate: {summary['success_rate']:.2f}%")
-        report.append(f"Time Range: {summary['time_range']['start'][:19]} to")
-        report.append(f"           {summary['time_range']['end'][:19]}")
-        report.append("")
+    def analyze_files(self, paths: Any, chunk_size: int = 1_000_000) -> Dict:
+        """
+        Out-of-core analyze_performance over metric files larger than RAM.
         
-        # Performance metrics
-        report.append("⚡ PERFORMANCE METRICS")
-        report.append("-" * 40)
-        perf = analysis['performance']
-        report.append(f"Average Duration: {perf['avg_duration_ms']:.2f}ms")
-        report.append(f"Median Duration: {perf['median_duration_ms']:.2f}ms")
-        report.append(f"95th Percentile: {perf['p95_duration_ms']:.2f}ms")
-        report.append(f"99th Percentile: {perf['p99_duration_ms']:.2f}ms")
-        report.append(f"Total Bytes: {perf['total_bytes_processed']:,}")
-        report.append(f"Avg File Size: {perf['avg_file_size_bytes']:.0f} bytes")
-        report.append("")
-        
-        # By operation type
-        report.append("🔧 PERFORMANCE BY OPERATION")
-        report.append("-" * 40)
-        for op, metrics in analysis['by_operation'].items():
-            report.append(f"\n{op}:")
-            report.append(f"  Count: {metrics['count']}")
-            report.append(f"  Avg Duration: {metrics['avg_duration_ms']:.2f}ms")
-            report.append(f"  Avg Size: {metrics['avg_size_bytes']:.0f} bytes")
-            report.append(f"  Success Rate: {metrics['success_rate']:.2f}%")
-        report.append("")
-        
-        # By file type
-        report.append("📁 PERFORMANCE BY FILE TYPE")
-        report.append("-" * 40)
-        for ft, metrics in analysis['by_file_type'].items():
-            report.append(f"{ft}: {metrics['count']} ops, "
-                         f"{metrics['avg_duration_ms']:.1f}ms avg, "
-                         f"{metrics['avg_size_bytes']:.0f} bytes avg")
+        Files (CSV, Parquet file or partitioned dataset, Feather, JSON Lines)
+        are read ``chunk_size`` rows at a time and folded into one
+        PartialAggregate; quantiles and unique files are sketch estimates.
+        """
+        partial = PartialAggregate()
+        for path in _metric_paths(paths):
+            partial.merge(self.aggregate_file(path, chunk_size))
+        return partial.to_analysis()
+    
+    def analyze_files_parallel(self, paths: Any, workers: Optional[int] = None,
+                               chunk_size: int = 1_000_000) -> Dict:
+        """
+        analyze_files fanned out over a process pool.
         
-        report.append("")
-        report.append("=" * 60)
-        report.append("Report generated by FAF Data Analyzer v2.0.0")
-        report.append("🏎️ Built for speed. Designed for excellence.")
+        Each worker reduces whole files to a PartialAggregate; only those
+        small partials travel back to be merged, so throughput scales with
+        the number of files up to ``workers`` (default: CPU count).
+        """
+        paths = _metric_paths(paths)
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+        if workers <= 1:
+            return self.analyze_files(paths, chunk_size)
         
-        return "\n".join(report)
+        partial = PartialAggregate()
+        jobs = [(path, chunk_size) for path in paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_aggregate_file_worker, jobs):
+                partial.merge(result)
+        return partial.to_analysis()
     
-    def export_metrics_csv(self, df: pd.DataFrame, filepath: str):
-        """Export metrics to CSV for further analysis"""
-        df.to_csv(filepath, index=False)
-        return f"Exported {len(df)} records to {filepath}"
+    def aggregate_file(self, path: str, chunk_size: int = 1_000_000) -> PartialAggregate:
+        """Fold one metrics file into a PartialAggregate"""
+        partial = PartialAggregate()
+        for chunk in self.iter_metric_chunks(path, chunk_size):
+            partial.update(chunk)
+        return partial
     
-    def create_benchmark_suite(self) -> str:
-        """Create a Python benchmark suite for FAF tools"""
+    def iter_metric_chunks(self, path: str, chunk_size: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """Read an exported metrics file as a sequence of operations frames"""
+        path = os.fspath(path)
+        name = path.lower()
+        if name.endswith(('.csv', '.csv.gz')):
+            yield from pd.read_csv(path, chunksize=chunk_size, parse_dates=['timestamp'])
+        elif name.endswith(('.jsonl', '.ndjson', '.log')):
+            yield from self.iter_operation_log(path, chunk_size)
+        elif name.endswith(('.feather', '.arrow')):
+            import pyarrow as pa
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    yield reader.get_batch(i).to_pandas()
+        else:
+            # Parquet file or (hive-partitioned) dataset directory
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+            dataset = ds.dataset(path, format='parquet', partitioning='hive')
+            # Partitioned datasets yield many small fragments; coalesce them
+            pending, rows = [], 0
+            for batch in dataset.to_batches(batch_size=chunk_size):
+                pending.append(batch)
+                rows += batch.num_rows
+                if rows >= chunk_size:
+                    yield pa.Table.from_batches(pending).to_pandas()
+                    pending, rows = [], 0
+            if pending:
+                yield pa.Table.from_batches(pending).to_pandas()
+    
+    def _group_metrics(self, df: pd.DataFrame, column: str) -> Dict:
+        """Per-group count, means, success rate and tail latency in one groupby pass"""
+        grouped = df.groupby(column, observed=True, sort=False)
+        metrics = grouped.agg(
+            count=('duration_ms', 'size'),
+            avg_duration_ms=('duration_ms', 'mean'),
+            avg_size_bytes=('size_bytes', 'mean'),
+            success_rate=('success', 'mean')
+        )
+        metrics['success_rate'] *= 100
+        tails = grouped['duration_ms'].quantile([0.95, 0.99]).unstack()
+        metrics['p95_duration_ms'] = tails[0.95]
+        metrics['p99_duration_ms'] = tails[0.99]
+        return metrics.to_dict('index')
+    
+    def add_operations(self, batch: Any) -> int:
+        """
+        Fold new operations into the running analysis.
         
-        benchmark_code = '''#!/usr/bin/env python3
-"""
-FAF File Tools - Benchmark Suite
-Measures performance of file operations
-"""
-
-import time
-import os
-import json
-import random
-import string
-from pathlib import Path
-from typing import List, Dict, Callable
-import statistics
-
-
-class FAFBenchmark:
-    """Benchmark FAF file operations"""
+        ``batch`` is an operations frame or anything ingest_operations
+        accepts in memory (FileOperation objects, record dicts). Cost is
+        proportional to the batch, not to everything seen so far.
+        Returns the total number of operations added.
+        """
+        if not isinstance(batch, pd.DataFrame):
+            batch = self._operations_frame(getattr(batch, 'operations', batch))
+        with self._live_lock:
+            if self._live is None:
+                self._live = PartialAggregate()
+            self._live.update(batch)
+            self._live_analysis = None
+            return self._live.totals.count
+    
+    def current_analysis(self) -> Dict:
+        """analyze_performance over every added operation, from the running sketches"""
+        with self._live_lock:
+            if self._live_analysis is None:
+                self._live_analysis = (self._live or PartialAggregate()).to_analysis()
+            return copy.deepcopy(self._live_analysis)
     
-    def __init__(self, iterations: int = 100):
-        self.iterations = iterations
-        self.results = {}
-        self.test_dir = Path("benchmark_tests")
-        self.test_dir.mkdir(exist_ok=True)
+    def reset_operations(self):
+        """Discard the running analysis"""
+        with self._live_lock:
+            self._live = None
+            self._live_analysis = None
     
-    def benchmark_operation(self, name: str, operation: Callable, *args, **kwargs) -> Dict:
-        """Benchmark a single operation"""
-        timings = []
-        errors = 0
+    def analyze_windows(self, df: pd.DataFrame, freq: str = '1min',
+                        rolling: Optional[str] = None, by: Optional[str] = None) -> pd.DataFrame:
+        """
+        Time-bucketed latency percentiles, throughput and error rate.
         
-        for i in range(self.iterations):
-            try:
-                start = time.perf_counter()
-                operation(*args, **kwargs)
-                duration = (time.perf_counter() - start) * 1000  # Convert to ms
-                timings.append(duration)
-            except Exception as e:
-                errors += 1
-                print(f"Error in {name}: {e}")
+        Operations are resampled into ``freq`` buckets (a pandas offset such
+        as '1min' or '1h'). With ``rolling`` (e.g. '15min') each bucket
+        reports the trailing window ending at its last operation instead.
+        ``by`` ('operation' or 'file_type') adds a leading index level.
+        """
+        if by is not None:
+            return pd.concat({name: self._window_metrics(group, freq, rolling)
+                              for name, group in df.groupby(by, observed=True)},
+                             names=[by])
+        return self._window_metrics(df, freq, rolling)
+    
+    def _window_metrics(self, df: pd.DataFrame, freq: str, rolling: Optional[str]) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            'duration_ms': df['duration_ms'].to_numpy(dtype=np.float64),
+            'errors': (~df['success'].to_numpy(dtype=bool)).astype(np.int64)
+        }, index=pd.DatetimeIndex(pd.to_datetime(df['timestamp']), name='window_start')).sort_index()
         
-        if timings:
-            return {
-                'name': name,
-                'iterations': self.iterations,
-                'errors': errors,
-                'min_ms': min(timings),
-                'max_ms': max(timings),
-                'mean_ms': statistics.mean(timings),
-                'median_ms': statistics.median(timings),
-                'stdev_ms': statistics.stdev(timings) if len(timings) > 1 else 0,
-                'success_rate': ((self.iterations - errors) / self.iterations * 100)
-            }
+        if rolling is None:
+            span = frame.resample(freq)
         else:
-            return {'name': name, 'errors': errors, 'success_rate': 0}
-    
-    def generate_test_file(self, size_kb: int) -> str:
-        """Generate a test file of specified size"""
-        content = ''.join(random.choices(string.ascii_letters + string.digits, 
-                                        k=size_kb * 1024))
-        filepath = self.test_dir / f"test_{size_kb}kb.txt"
-        filepath.write_text(content)
-        return str(filepath)
-    
-    def benchmark_read_operations(self):
-        """Benchmark file read operations"""
-        # Create test files of different sizes
-        test_files = {
-            '1KB': self.generate_test_file(1),
-            '10KB': self.generate_test_file(10),
-            '100KB': self.generate_test_file(100),
-            '1MB': self.generate_test_file(1024)
-        }
+            # Trailing window per operation, sampled at the end of each bucket
+            span = frame.rolling(rolling)
+        durations = span['duration_ms']
+        windows = pd.DataFrame({
+            'operations': durations.count(),
+            'errors': span['errors'].sum(),
+            'avg_duration_ms': durations.mean(),
+            **{f'p{int(q * 100)}_duration_ms': durations.quantile(q) for q in WINDOW_QUANTILES}
+        })
+        if rolling is not None:
+            windows = windows.resample(freq).last()
+            windows[['operations', 'errors']] = windows[['operations', 'errors']].fillna(0)
         
-        results = {}
-        for size, filepath in test_files.items():
-            def read_op():
-                with open(filepath, 'r') as f:
-                    _ = f.read()
-            
-            results[f'read_{size}'] = self.benchmark_operation(f'Read {size}', read_op)
-        
-        return results
+        # Per-window span so calendar offsets (days, months) are measured exactly
+        offset = pd.tseries.frequencies.to_offset(rolling or freq)
+        seconds = ((windows.index + offset) - windows.index).total_seconds()
+        operations = windows.pop('operations').astype(np.int64)
+        errors = windows.pop('errors')
+        windows.insert(0, 'operations', operations)
+        windows.insert(1, 'throughput_ops_s', operations / np.asarray(seconds))
+        windows.insert(2, 'error_rate', errors / operations.where(operations > 0) * 100)
+        return windows
     
-    def benchmark_write_operations(self):
-        """Benchmark file write operations"""
-        sizes = {'1KB': 1, '10KB': 10, '100KB': 100, '1MB': 1024}
-        results = {}
-        
-        for size_name, size_kb in sizes.items():
-            content = ''.join(random.choices(string.ascii_letters, k=size_kb * 1024))
-            
-            def write_op():
-                filepath = self.test_dir / f"write_test_{random.randint(1, 10000)}.txt"
-                filepath.write_text(content)
-                filepath.unlink()  # Clean up immediately
-            
-            results[f'write_{size_name}'] = self.benchmark_operation(
-                f'Write {size_name}', write_op
-            )
-        
-        return results
-    
-    def benchmark_json_operations(self):
-        """Benchmark JSON read/write operations"""
-        # Create test JSON data
-        test_data = {
-            'small': {'key': 'value'} * 10,
-            'medium': {'key': 'value'} * 100,
-            'large': {'key': 'value'} * 1000
-        }
+    def detect_regressions(self, windows: pd.DataFrame, metric: str = 'p95_duration_ms',
+                           baseline_windows: int = 5, threshold: float = 1.5,
+                           min_operations: int = 10) -> List[Dict]:
+        """
+        Flag windows whose ``metric`` is at least ``threshold`` times the
+        median of the preceding ``baseline_windows`` windows.
         
-        results = {}
+        Windows with fewer than ``min_operations`` operations are neither
+        flagged nor used as baseline. Works on grouped (``by``) windows too.
+        """
+        if isinstance(windows.index, pd.MultiIndex):
+            regressions = []
+            for name, group in windows.groupby(level=0, sort=False):
+                for regression in self.detect_regressions(group.droplevel(0), metric, baseline_windows,
+                                                          threshold, min_operations):
+                    regressions.append({'group': name, **regression})
+            return regressions
         
-        for size, data in test_data.items():
-            # Write benchmark
-            def json_write():
-                filepath = self.test_dir / f"json_test_{random.randint(1, 10000)}.json"
-                with open(filepath, 'w') as f:
-                    json.dump(data, f)
-                filepath.unlink()
-            
-            results[f'json_write_{size}'] = self.benchmark_operation(
-                f'JSON Write {size}', json_write
-            )
-            
-            # Prepare file for read benchmark
-            test_file = self.test_dir / f"json_read_{size}.json"
-            with open(test_file, 'w') as f:
-                json.dump(data, f)
-            
-            # Read benchmark
-            def json_read():
-                with open(test_file, 'r') as f:
-                    _ = json.load(f)
-            
-            results[f'json_read_{size}'] = self.benchmark_operation(
-                f'JSON Read {size}', json_read
-            )
-        
-        return results
+        values = windows[metric].where(windows['operations'] >= min_operations)
+        baseline = values.shift(1).rolling(baseline_windows, min_periods=1).median()
+        ratio = values / baseline
+        flagged = ratio[ratio >= threshold]
+        return [{
+            'window_start': str(start),
+            'metric': metric,
+            'value': float(values[start]),
+            'baseline': float(baseline[start]),
+            'ratio': float(ratio[start])
+        } for start in flagged.index]
     
-    def run_full_benchmark(self) -> Dict:
-        """Run complete benchmark suite"""
-        print("🏎️ Starting FAF Benchmark Suite...")
-        print("-" * 50)
-        
-        all_results = {}
-        
-        print("📖 Benchmarking read operations...")
-        all_results.update(self.benchmark_read_operations())
-        
-        print("✍️ Benchmarking write operations...")
-        all_results.update(self.benchmark_write_operations())
-        
-        print("🔧 Benchmarking JSON operations...")
-        all_results.update(self.benchmark_json_operations())
-        
-        return all_results
-    
-    def generate_report(self, results: Dict) -> str:
-        """Generate benchmark report"""
-        report = []
-        report.append("=" * 60)
-        report.append("FAF FILE TOOLS - BENCHMARK RESULTS")
-        report.append("=" * 60)
-        report.append("")
-        
-        # Group results by operation type
-        read_ops = {k: v for k, v in results.items() if 'read' in k}
-        write_ops = {k: v for k, v in results.items() if 'write' in k}
+    def generate_performance_report(self, analysis: Dict, format: str = 'text',
+                                    top_n: Optional[int] = REPORT_TOP_N) -> str:
+        """Generate a formatted performance report ('text', 'markdown', 'html' or 'json')"""
+        return self.render_reports(analysis, (format,), top_n)[format]
+    
+    def render_reports(self, analysis: Dict, formats: Tuple[str, ...] = tuple(ANALYSIS_REPORT_FORMATS),
+                       top_n: Optional[int] = REPORT_TOP_N) -> Dict[str, str]:
+        """
+        Render ``analysis`` into several formats in one pass.
         
-        # Read operations
-        report.append("📖 READ OPERATIONS")
-        report.append("-" * 40)
-        for name, metrics in read_ops.items():
-            report.append(f"{name}:")
-            report.append(f"  Mean: {metrics['mean_ms']:.2f}ms")
-            report.append(f"  Median: {metrics['median_ms']:.2f}ms")
-            report.append(f"  Min/Max: {metrics['min_ms']:.2f}ms / {metrics['max_ms']:.2f}ms")
-            report.append(f"  Success: {metrics['success_rate']:.1f}%")
-            report.append("")
+        Breakdown tables keep the ``top_n`` largest groups (by count) and
+        summarize the rest, so output size and time stay bounded however
+        many operations or file types there are; ``top_n=None`` keeps all.
+        """
+        buffers = {fmt: io.StringIO() for fmt in self._report_formats(formats)}
+        _render_analysis(analysis, [ANALYSIS_REPORT_FORMATS[fmt][1](buffer) for fmt, buffer in buffers.items()],
+                         top_n)
+        return {fmt: buffer.getvalue() for fmt, buffer in buffers.items()}
+    
+    def write_performance_report(self, analysis: Dict, output_file: str,
+                                 formats: Tuple[str, ...] = ('text',),
+                                 top_n: Optional[int] = REPORT_TOP_N) -> List[str]:
+        """
+        Render ``analysis`` straight to files in one pass.
         
-        # Write operations
-        report.append("✍️ WRITE OPERATIONS")
-        report.append("-" * 40)
-        for name, metrics in write_ops.items():
-            report.append(f"{name}:")
-            report.append(f"  Mean: {metrics['mean_ms']:.2f}ms")
-            report.append(f"  Median: {metrics['median_ms']:.2f}ms")
-            report.append(f"  Min/Max: {metrics['min_ms']:.2f}ms / {metrics['max_ms']:.2f}ms")
-            report.append(f"  Success: {metrics['success_rate']:.1f}%")
-            report.append("")
+        The first format is written to ``output_file``; the others go next to
+        it with their own extension. Returns the written paths.
+        """
+        base_file = Path(output_file)
+        base_file.parent.mkdir(parents=True, exist_ok=True)
+        paths, handles = [], []
+        try:
+            for index, fmt in enumerate(self._report_formats(formats)):
+                path = base_file if index == 0 else base_file.with_suffix(ANALYSIS_REPORT_FORMATS[fmt][0])
+                handles.append(open(path, 'w', encoding='utf-8'))
+                paths.append(str(path))
+            _render_analysis(analysis, [ANALYSIS_REPORT_FORMATS[fmt][1](handle)
+                                        for fmt, handle in zip(formats, handles)], top_n)
+        finally:
+            for handle in handles:
+                handle.close()
+        return paths
+    
+    def _report_formats(self, formats: Tuple[str, ...]) -> Tuple[str, ...]:
+        unknown = [fmt for fmt in formats if fmt not in ANALYSIS_REPORT_FORMATS]
+        if unknown or not formats:
+            raise ValueError(f"Unknown report format(s): {unknown or formats}")
+        return tuple(formats)
+    
+    def export_metrics_csv(self, df: Any, filepath: str, chunk_size: Optional[int] = None):
+        """
+        Export metrics to CSV for further analysis.
         
-        # Overall statistics
-        all_means = [v['mean_ms'] for v in results.values() if 'mean_ms' in v]
-        report.append("📊 OVERALL STATISTICS")
-        report.append("-" * 40)
-        report.append(f"Total Operations: {sum(v.get('iterations', 0) for v in results.values())}")
-        report.append(f"Average Duration: {statistics.mean(all_means):.2f}ms")
-        report.append(f"Operations Tested: {len(results)}")
+        ``df`` may also be an iterable of frames (e.g. iter_operation_log),
+        which are streamed to the file one after another; ``chunk_size``
+        caps how many rows are formatted at once.
+        """
+        records = 0
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            for chunk in _iter_frames(df):
+                chunk.to_csv(f, header=records == 0, index=False, chunksize=chunk_size)
+                records += len(chunk)
+        return f"Exported {records} records to {filepath}"
+    
+    def export_metrics_parquet(self, df: Any, path: str, compression: str = 'zstd',
+                               partition_by: Optional[List[str]] = None):
+        """
+        Export metrics to Parquet (requires pyarrow).
         
-        report.append("")
-        report.append("=" * 60)
-        report.append("🏁 Benchmark Complete!")
+        With ``partition_by`` (any of 'day', 'operation', 'file_type') ``path``
+        becomes a hive-partitioned dataset directory, e.g.
+        ``path/day=2025-09-15/operation=faf_read/*.parquet``, replacing any
+        dataset already there. ``df`` may be an iterable of frames, written
+        incrementally.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
         
-        return "\\n".join(report)
-
-
-if __name__ == "__main__":
-    # Run benchmark
-    benchmark = FAFBenchmark(iterations=50)
-    results = benchmark.run_full_benchmark()
+        records = 0
+        writer = None
+        try:
+            for index, chunk in enumerate(_iter_frames(df)):
+                if partition_by and 'day' in partition_by:
+                    chunk = chunk.assign(day=chunk['timestamp'].dt.strftime('%Y-%m-%d'))
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if partition_by:
+                    if index == 0 and os.path.isdir(path):
+                        shutil.rmtree(path)  # stale part files would be read back
+                    pq.write_to_dataset(
+                        table, path, partition_cols=list(partition_by),
+                        compression=compression,
+                        basename_template=f"part-{index}-{{i}}.parquet",
+                        existing_data_behavior='overwrite_or_ignore',
+                        max_partitions=PARQUET_MAX_PARTITIONS
+                    )
+                else:
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema, compression=compression)
+                    writer.write_table(table)
+                records += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return f"Exported {records} records to {path}"
     
-    # Generate and print report
-    report = benchmark.generate_report(results)
-    print(report)
-    
-    # Save results to JSON
-    with open('benchmark_results.json', 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+    def export_metrics_feather(self, df: pd.DataFrame, filepath: str, compression: str = 'lz4'):
+        """Export metrics to Feather / Arrow IPC (requires pyarrow)"""
+        df.reset_index(drop=True).to_feather(filepath, compression=compression)
+        return f"Exported {len(df)} records to {filepath}"
     
-    print("\\n✅ Results saved to benchmark_results.json")
-'''
-        
-        return benchmark_code
+    def create_benchmark_suite(self) -> str:
+        """Source of the FAF benchmark suite (the importable faf_benchmark module)"""
+        import faf_benchmark
+        return Path(faf_benchmark.__file__).read_text(encoding='utf-8')
 
 
 def main():
@@ -417,17 +1185,23 @@ def main():
     report = analyzer.generate_performance_report(analysis)
     print("\n" + report)
     
+    # Markdown and HTML copies of the report
+    written = analyzer.write_performance_report(analysis, "faf_performance_report.md",
+                                                formats=('markdown', 'html'))
+    print(f"✅ Wrote {', '.join(written)}")
+    
+    # Hourly windows and latency regressions
+    windows = analyzer.analyze_windows(df, freq='1h')
+    regressions = analyzer.detect_regressions(windows, min_operations=3)
+    print(f"\n⏱️ Analyzed {len(windows)} hourly windows, {len(regressions)} latency regressions")
+    
     # Export to CSV
     csv_path = "faf_metrics.csv"
     result = analyzer.export_metrics_csv(df, csv_path)
     print(f"\n✅ {result}")
     
-    # Save benchmark suite
-    print("\n🏎️ Generating benchmark suite...")
-    benchmark_code = analyzer.create_benchmark_suite()
-    with open("faf_benchmark.py", "w") as f:
-        f.write(benchmark_code)
-    print("✅ Created faf_benchmark.py")
+    # Benchmark suite lives in faf_benchmark.py
+    print("\n🏎️ Run the benchmark suite with: python faf_benchmark.py")
     
     # Save analysis results
     with open("faf_analysis_results.json", "w") as f:
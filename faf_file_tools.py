@@ -5,15 +5,49 @@ Version: 2.0.0
 Purpose: Demonstrate FAF file tools working with Python
 """
 
+import codecs
 import json
+import math
+import mmap
 import os
+import re
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import BinaryIO, Dict, Iterator, List, Optional, Any, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, asdict
+from json.encoder import encode_basestring as _encode_string
 import hashlib
 
+from faf_tracing import span, traced
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for msgpack reports
+    msgpack = None
+
+
+# Chunk size used by the streaming JSON readers
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*\Z')
+_JSON_STRUCTURE = re.compile(r'["\[\]{}]')
+_JSON_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Write buffer for streaming report sinks
+REPORT_BUFFER_SIZE = 1024 * 1024
+
+# Hashing engine settings
+HASH_MODES = ('buffered', 'mmap', 'tree')
+HASH_BUFFER_SIZE = 1024 * 1024
+TREE_CHUNK_SIZE = 4 * 1024 * 1024
+TREE_DIGEST_SIZE = 32
+
+# Number of scanned files resolved (cache lookup + hashing) per manifest batch
+MANIFEST_BATCH_SIZE = 1024
+
 
 @dataclass
 class FileOperation:
@@ -29,6 +63,19 @@ class FileOperation:
         return asdict(self)
 
 
+@dataclass
+class ManifestEntry:
+    """One file in a directory hash manifest"""
+    path: str
+    size_bytes: int
+    mtime_ns: int
+    hash: str
+    algorithm: str = "sha256"
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
 class FAFPythonBridge:
     """
     Bridge between FAF File Tools and Python applications
@@ -38,24 +85,33 @@ class FAFPythonBridge:
     def __init__(self, base_path: str = "."):
         self.base_path = Path(base_path)
         self.operations: List[FileOperation] = []
+        # Operations already written to each export_operations target
+        self._exported: Dict[Path, int] = {}
         self.stats = {
             "files_read": 0,
             "files_written": 0,
             "bytes_processed": 0,
-            "errors": 0
+            "errors": 0,
+            "records_streamed": 0,
+            "stream_throughput_mb_s": 0.0,
+            "files_hashed": 0,
+            "hash_cache_hits": 0
         }
         
+    @traced()
     def read_json_config(self, filename: str) -> Dict[str, Any]:
         """Read and parse JSON configuration files"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         file_path = self.base_path / filename
         
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
+            with span("read"):
+                with open(file_path, 'r') as f:
+                    content = f.read()
+            with span("decode", **{"file.bytes": len(content)}):
                 data = json.loads(content)
                 
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter() - start_time) * 1000
             self._log_operation('read', str(file_path), len(content), duration, True)
             self.stats["files_read"] += 1
             self.stats["bytes_processed"] += len(content)
@@ -67,58 +123,115 @@ class FAFPythonBridge:
             self._log_operation('read', str(file_path), 0, 0, False)
             raise Exception(f"Failed to read {filename}: {str(e)}")
     
-    def write_python_report(self, data: Dict[str, Any], output_file: str) -> str:
-        """Generate Python-formatted report files"""
-        start_time = time.time()
-        
-        report_lines = [
-            "# FAF File Tools - Python Report",
-            f"# Generated: {datetime.now().isoformat()}",
-            "# " + "=" * 50,
-            "",
-            "from typing import Dict, Any",
-            "",
-            "report_data = {"
-        ]
+    @traced()
+    def iter_json_lines(self, filename: str) -> Iterator[Any]:
+        """Stream records from a JSON Lines file, one decoded line at a time"""
+        file_path = self.base_path / filename
+        start_time = time.perf_counter()
+        bytes_read = 0
+        records = 0
+        success = True
         
-        # Format the data as Python code
-        for key, value in data.items():
-            if isinstance(value, str):
-                report_lines.append(f'    "{key}": "{value}",')
-            elif isinstance(value, (int, float, bool)):
-                report_lines.append(f'    "{key}": {value},')
-            elif isinstance(value, dict):
-                report_lines.append(f'    "{key}": {json.dumps(value)},')
-            else:
-                report_lines.append(f'    "{key}": {repr(value)},')
+        try:
+            with open(file_path, 'rb') as f:
+                for line_number, line in enumerate(f, 1):
+                    bytes_read += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"line {line_number}: {e}")
+                    records += 1
+                    yield record
+        except Exception as e:
+            success = False
+            self.stats["errors"] += 1
+            raise Exception(f"Failed to stream {filename}: {str(e)}")
+        finally:
+            self._record_stream(file_path, bytes_read, records, start_time, success)
+    
+    @traced()
+    def iter_json_array(self, filename: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+        """Stream the elements of a large top-level JSON array without loading the whole document"""
+        file_path = self.base_path / filename
+        start_time = time.perf_counter()
+        bytes_read = 0
+        records = 0
+        success = True
         
-        report_lines.append("}")
-        report_lines.extend([
-            "",
-            "def get_report():",
-            "    return report_data",
-            "",
-            'if __name__ == "__main__":',
-            '    import pprint',
-            '    print("FAF File Tools Report:")',
-            '    pprint.pprint(get_report(), indent=2)'
-        ])
+        try:
+            with open(file_path, 'rb') as f:
+                for item, bytes_read in _iter_array_items(f, chunk_size):
+                    records += 1
+                    yield item
+        except Exception as e:
+            success = False
+            self.stats["errors"] += 1
+            raise Exception(f"Failed to stream {filename}: {str(e)}")
+        finally:
+            self._record_stream(file_path, bytes_read, records, start_time, success)
+    
+    def _record_stream(self, file_path: Path, bytes_read: int, records: int,
+                       start_time: float, success: bool):
+        """Fold a finished (or abandoned) stream into the bridge statistics"""
+        duration = (time.perf_counter() - start_time) * 1000
+        self._log_operation('stream', str(file_path), bytes_read, duration, success)
+        if success:
+            self.stats["files_read"] += 1
+        self.stats["bytes_processed"] += bytes_read
+        self.stats["records_streamed"] += records
+        if duration > 0:
+            self.stats["stream_throughput_mb_s"] = round(
+                bytes_read / (1024 * 1024) / (duration / 1000), 2
+            )
+    
+    @traced()
+    def write_python_report(self, data: Dict[str, Any], output_file: str,
+                            formats: Tuple[str, ...] = ('python',)) -> str:
+        """
+        Generate report files from ``data`` in one streaming pass.
         
-        content = "\n".join(report_lines)
-        file_path = self.base_path / output_file
+        Each requested format ('python', 'json', 'msgpack') gets its own
+        buffered file next to ``output_file`` (same stem, format extension;
+        the first format keeps ``output_file`` as given). Nested dicts,
+        lists and tuples are serialized recursively.
+        """
+        start_time = time.perf_counter()
+        unknown = [fmt for fmt in formats if fmt not in REPORT_FORMATS]
+        if unknown or not formats:
+            raise ValueError(f"Unknown report format(s): {unknown or formats}")
         
+        base_file = self.base_path / output_file
         # Create directories if needed
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        base_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w') as f:
-            f.write(content)
+        sinks = []
+        try:
+            for index, fmt in enumerate(formats):
+                file_path = base_file if index == 0 else base_file.with_suffix(REPORT_FORMATS[fmt][0])
+                sinks.append(REPORT_FORMATS[fmt][1](file_path))
+            
+            with span("serialize", formats=",".join(formats)):
+                for sink in sinks:
+                    sink.begin_report()
+                _emit_report_value(data, sinks, 0)
+                for sink in sinks:
+                    sink.end_report()
+        finally:
+            with span("flush"):
+                for sink in sinks:
+                    sink.close()
         
-        duration = (time.time() - start_time) * 1000
-        self._log_operation('write', str(file_path), len(content), duration, True)
-        self.stats["files_written"] += 1
-        self.stats["bytes_processed"] += len(content)
+        duration = (time.perf_counter() - start_time) * 1000
+        written = []
+        for sink in sinks:
+            self._log_operation('write', str(sink.path), sink.size, duration, True)
+            self.stats["files_written"] += 1
+            self.stats["bytes_processed"] += sink.size
+            written.append(f"{sink.size} bytes to {sink.path}")
         
-        return f"✅ Written {len(content)} bytes to {file_path}"
+        return f"✅ Successfully wrote {', '.join(written)}"
     
     def generate_test_suite(self) -> str:
         """Generate a Python test suite for FAF tools"""
@@ -231,16 +344,116 @@ if __name__ == "__main__":
         
         return str(output_path)
     
-    def calculate_file_hash(self, filepath: str) -> str:
-        """Calculate SHA-256 hash of a file"""
-        sha256_hash = hashlib.sha256()
-        file_path = self.base_path / filepath
+    @traced()
+    def calculate_file_hash(self, filepath: str, algorithm: str = "sha256",
+                            mode: str = "buffered") -> str:
+        """Calculate the hash of a file (SHA-256 by default, see hash_file)"""
+        return hash_file(self.base_path / filepath, algorithm=algorithm, mode=mode)
+    
+    @traced()
+    def hash_tree(self, directory: str = ".", manifest_file: Optional[str] = None,
+                  cache: Optional[Dict[str, ManifestEntry]] = None,
+                  workers: Optional[int] = None, algorithm: str = "sha256") -> Iterator[ManifestEntry]:
+        """
+        Hash every file below ``directory`` and yield manifest entries.
         
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
+        Files whose size and mtime match ``cache`` (by default the previous
+        ``manifest_file``, if any) reuse the cached hash; the rest are hashed
+        across a process pool. When ``manifest_file`` is given the entries are
+        streamed to it as JSON Lines and it is swapped in once complete.
+        """
+        start_time = time.perf_counter()
+        root = self.base_path / directory
+        manifest_path = self.base_path / manifest_file if manifest_file else None
+        if cache is None:
+            cache = load_manifest(manifest_path) if manifest_path and manifest_path.exists() else {}
         
-        return sha256_hash.hexdigest()
+        hashed = 0
+        total_bytes = 0
+        success = True
+        pool = None
+        out = None
+        tmp_path = None
+        
+        try:
+            if manifest_path:
+                manifest_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+                out = open(tmp_path, 'w', encoding='utf-8')
+            skip = {os.path.abspath(p) for p in (manifest_path, tmp_path) if p}
+            
+            files = (f for f in scan_files(root) if os.path.abspath(f[1]) not in skip)
+            while True:
+                batch = [f for _, f in zip(range(MANIFEST_BATCH_SIZE), files)]
+                if not batch:
+                    break
+                
+                entries: List[Optional[ManifestEntry]] = []
+                misses = []
+                for rel_path, full_path, st in batch:
+                    cached = cache.get(rel_path)
+                    if (cached and cached.size_bytes == st.st_size
+                            and cached.mtime_ns == st.st_mtime_ns and cached.algorithm == algorithm):
+                        entries.append(cached)
+                        self.stats["hash_cache_hits"] += 1
+                    else:
+                        entries.append(None)
+                        misses.append(len(entries) - 1)
+                
+                jobs = [(batch[i][1], algorithm) for i in misses]
+                if len(jobs) > 1 and workers != 1:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=workers)
+                    digests = pool.map(_hash_worker, jobs, chunksize=max(1, len(jobs) // 64))
+                else:
+                    digests = map(_hash_worker, jobs)
+                for i, digest in zip(misses, digests):
+                    rel_path, _, st = batch[i]
+                    entries[i] = ManifestEntry(rel_path, st.st_size, st.st_mtime_ns, digest, algorithm)
+                hashed += len(misses)
+                
+                for entry in entries:
+                    total_bytes += entry.size_bytes
+                    if out:
+                        out.write(json.dumps(entry.to_dict()) + "\n")
+                    yield entry
+            
+            if out:
+                out.close()
+                os.replace(tmp_path, manifest_path)
+        except Exception as e:
+            success = False
+            self.stats["errors"] += 1
+            raise Exception(f"Failed to hash {directory}: {str(e)}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if out and not out.closed:
+                out.close()
+                tmp_path.unlink(missing_ok=True)
+            duration = (time.perf_counter() - start_time) * 1000
+            self._log_operation('hash_tree', str(root), total_bytes, duration, success)
+            self.stats["files_hashed"] += hashed
+            self.stats["bytes_processed"] += total_bytes
+    
+    def watch(self, directory: str = ".", backend: str = "auto",
+              poll_interval: float = 1.0) -> "ChangeWatcher":
+        """Start a change watcher below ``directory``; iterate it for push events"""
+        from faf_watcher import ChangeWatcher
+        return ChangeWatcher(self.base_path / directory, backend=backend,
+                             poll_interval=poll_interval).start()
+    
+    def profile(self, label: str = "bridge", mode: str = "sampling",
+                output_dir: Optional[str] = None) -> "Profiler":
+        """
+        Profile a block of bridge calls; the profile is written on exit.
+            
+            with bridge.profile("export", mode="cprofile") as profiler:
+                bridge.write_python_report(data, "report", formats=("json",))
+            print(profiler.output_path)
+        """
+        from faf_profiling import Profiler
+        return Profiler(mode, label=label, output_dir=output_dir)
     
     def _log_operation(self, op_type: str, path: str, size: int, duration: float, success: bool):
         """Log file operations for tracking"""
@@ -254,6 +467,28 @@ if __name__ == "__main__":
         )
         self.operations.append(operation)
     
+    @traced()
+    def export_operations(self, output_file: str, append: bool = True) -> str:
+        """
+        Write the logged operations as JSON Lines (input for
+        FAFDataAnalyzer.ingest_operations). With ``append`` only operations
+        not yet exported to ``output_file`` by this bridge are added, so
+        repeated exports never duplicate a record; otherwise the file is
+        rewritten with every operation.
+        """
+        file_path = self.base_path / output_file
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        key = file_path.resolve()
+        start = self._exported.get(key, 0) if append else 0
+        pending = self.operations[start:]
+        with open(file_path, 'a' if append else 'w', encoding='utf-8') as f:
+            for operation in pending:
+                f.write(json.dumps(operation.to_dict()) + "\n")
+        self._exported[key] = len(self.operations)
+        
+        return f"✅ Exported {len(pending)} operations to {file_path}"
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get operational statistics"""
         return {
@@ -268,6 +503,543 @@ if __name__ == "__main__":
         }
 
 
+def hash_file(path: os.PathLike, algorithm: str = "sha256", mode: str = "buffered",
+              buffer_size: int = HASH_BUFFER_SIZE, chunk_size: int = TREE_CHUNK_SIZE,
+              workers: Optional[int] = None) -> str:
+    """
+    Hash a file and return the hex digest.
+    
+    Modes:
+      buffered - ``readinto`` a single reusable buffer (no per-block allocation)
+      mmap     - feed a read-only memory map straight into the hash
+      tree     - BLAKE2b tree hash; fixed-size leaves are hashed in parallel
+                 on a thread pool and combined into a root node. ``algorithm``
+                 is ignored and the digest differs from a plain BLAKE2b hash.
+    """
+    if mode not in HASH_MODES:
+        raise ValueError(f"Unknown hash mode: {mode}")
+    if mode == 'tree':
+        return _tree_hash(path, chunk_size, workers)
+    
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        if mode == 'mmap':
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+        else:
+            buffer = bytearray(buffer_size)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+    return hasher.hexdigest()
+
+
+def _report_scalar(value: Any) -> Any:
+    """Coerce values with no native report representation"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if hasattr(value, 'item') and callable(value.item):
+        return value.item()  # numpy / pandas scalars
+    return str(value)
+
+
+_PLAIN_SCALARS = (str, int, bool, type(None))
+
+
+def _exact_scalar(value: Any) -> Any:
+    """
+    The plain str/int/float behind a subclass such as numpy.float64 or
+    IntEnum, whose repr is not a literal every format can read back
+    """
+    if type(value) in _PLAIN_SCALARS or type(value) is float:
+        return value
+    if hasattr(value, 'item') and callable(value.item):
+        return value.item()  # numpy scalars
+    if isinstance(value, int):
+        return int.__int__(value)
+    if isinstance(value, float):
+        return float.__float__(value)
+    return str.__str__(value)
+
+
+def _is_plain(value: Any, plain: Dict[int, bool]) -> bool:
+    """
+    True for values every format's C encoder can take verbatim. The verdict
+    for each dict and list below ``value`` is recorded in ``plain`` (by id),
+    bottom-up, so every container is inspected once.
+    """
+    kind = type(value)
+    if kind in _PLAIN_SCALARS:
+        return True
+    if kind is float:
+        return math.isfinite(value)
+    if kind is dict:
+        result = True
+        for k, v in value.items():
+            # No short-circuit: every child container gets its own entry
+            if not _is_plain(v, plain) or type(k) is not str:
+                result = False
+    elif kind is list:
+        result = True
+        for v in value:
+            if not _is_plain(v, plain):
+                result = False
+    else:
+        return False
+    plain[id(value)] = result
+    return result
+
+
+def _emit_report_value(value: Any, sinks: List["_ReportSink"], depth: int,
+                       plain: Optional[Dict[int, bool]] = None):
+    """Walk ``value`` once, feeding every sink"""
+    if plain is None:
+        plain = {}
+    if value is None or isinstance(value, (str, bool, int, float)):
+        value = _exact_scalar(value)
+        for sink in sinks:
+            sink.scalar(value)
+    elif type(value) in (dict, list) and (plain[id(value)] if id(value) in plain else _is_plain(value, plain)):
+        for sink in sinks:
+            sink.literal(value)
+    elif isinstance(value, dict):
+        for sink in sinks:
+            sink.begin_map(len(value), depth)
+        for index, (key, item) in enumerate(value.items()):
+            if isinstance(key, (str, int, float, bool)):
+                key = _exact_scalar(key)
+            elif key is not None:
+                key = str(key)
+            for sink in sinks:
+                sink.key(key, index, depth)
+            _emit_report_value(item, sinks, depth + 1, plain)
+        for sink in sinks:
+            sink.end_map(len(value), depth)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for sink in sinks:
+            sink.begin_list(len(value), depth)
+        for index, item in enumerate(value):
+            for sink in sinks:
+                sink.item(index, depth)
+            _emit_report_value(item, sinks, depth + 1, plain)
+        for sink in sinks:
+            sink.end_list(len(value), depth)
+    else:
+        _emit_report_value(_report_scalar(value), sinks, depth, plain)
+
+
+class _ReportSink:
+    """Buffered output for one report format"""
+    binary = False
+    
+    def __init__(self, path: Path):
+        self.path = path
+        mode = 'wb' if self.binary else 'w'
+        encoding = None if self.binary else 'utf-8'
+        self.handle = open(path, mode, encoding=encoding, buffering=REPORT_BUFFER_SIZE)
+        self.size = 0
+    
+    def close(self):
+        if not self.handle.closed:
+            self.handle.flush()
+            self.size = os.fstat(self.handle.fileno()).st_size
+            self.handle.close()
+    
+    def begin_report(self):
+        pass
+    
+    def end_report(self):
+        pass
+
+
+class _PythonReportSink(_ReportSink):
+    """Importable Python module exposing ``report_data``"""
+    
+    def begin_report(self):
+        self.handle.write(
+            "# FAF File Tools - Python Report\n"
+            f"# Generated: {datetime.now().isoformat()}\n"
+            "# " + "=" * 50 + "\n"
+            "\n"
+            "from typing import Dict, Any\n"
+            "\n"
+            "report_data = "
+        )
+    
+    def end_report(self):
+        self.handle.write(
+            "\n"
+            "\n"
+            "def get_report():\n"
+            "    return report_data\n"
+            "\n"
+            'if __name__ == "__main__":\n'
+            "    import pprint\n"
+            '    print("FAF File Tools Report:")\n'
+            "    pprint.pprint(get_report(), indent=2)\n"
+        )
+    
+    def scalar(self, value: Any):
+        if isinstance(value, str):
+            self.handle.write(_encode_string(value))
+        elif isinstance(value, float) and value != value:
+            self.handle.write("float('nan')")
+        elif isinstance(value, float) and value in (float('inf'), float('-inf')):
+            self.handle.write("float('inf')" if value > 0 else "-float('inf')")
+        else:
+            self.handle.write(repr(value))
+    
+    def literal(self, value: Any):
+        self.handle.write(repr(value))
+    
+    def begin_map(self, size: int, depth: int):
+        self.handle.write("{" if size else "{}")
+    
+    def key(self, key: Any, index: int, depth: int):
+        self.handle.write(f"{',' if index else ''}\n{'    ' * (depth + 1)}")
+        self.scalar(key)
+        self.handle.write(": ")
+    
+    def end_map(self, size: int, depth: int):
+        if size:
+            self.handle.write(f",\n{'    ' * depth}}}")
+    
+    def begin_list(self, size: int, depth: int):
+        self.handle.write("[" if size else "[]")
+    
+    def item(self, index: int, depth: int):
+        self.handle.write(f"{',' if index else ''}\n{'    ' * (depth + 1)}")
+    
+    def end_list(self, size: int, depth: int):
+        if size:
+            self.handle.write(f",\n{'    ' * depth}]")
+
+
+class _JsonReportSink(_PythonReportSink):
+    """Plain JSON document"""
+    
+    def begin_report(self):
+        pass
+    
+    def end_report(self):
+        self.handle.write("\n")
+    
+    def scalar(self, value: Any):
+        if isinstance(value, str):
+            self.handle.write(_encode_string(value))
+        elif isinstance(value, float) and not math.isfinite(value):
+            self.handle.write("null")  # JSON has no NaN or Infinity
+        else:
+            self.handle.write(json.dumps(value))
+    
+    def literal(self, value: Any):
+        self.handle.write(json.dumps(value, ensure_ascii=False))
+    
+    def key(self, key: Any, index: int, depth: int):
+        self.handle.write(f"{',' if index else ''}\n{'  ' * (depth + 1)}")
+        self.handle.write(_encode_string(key if isinstance(key, str) else json.dumps(key)))
+        self.handle.write(": ")
+    
+    def end_map(self, size: int, depth: int):
+        if size:
+            self.handle.write(f"\n{'  ' * depth}}}")
+    
+    def item(self, index: int, depth: int):
+        self.handle.write(f"{',' if index else ''}\n{'  ' * (depth + 1)}")
+    
+    def end_list(self, size: int, depth: int):
+        if size:
+            self.handle.write(f"\n{'  ' * depth}]")
+
+
+class _MsgpackReportSink(_ReportSink):
+    """MessagePack document (requires the ``msgpack`` package)"""
+    binary = True
+    
+    def __init__(self, path: Path):
+        if msgpack is None:
+            raise ImportError("msgpack report format requires 'pip install msgpack'")
+        super().__init__(path)
+        self.packer = msgpack.Packer()
+    
+    def scalar(self, value: Any):
+        self.handle.write(self.packer.pack(value))
+    
+    literal = scalar
+    
+    def begin_map(self, size: int, depth: int):
+        self.handle.write(self.packer.pack_map_header(size))
+    
+    def key(self, key: Any, index: int, depth: int):
+        self.scalar(key)
+    
+    def end_map(self, size: int, depth: int):
+        pass
+    
+    def begin_list(self, size: int, depth: int):
+        self.handle.write(self.packer.pack_array_header(size))
+    
+    def item(self, index: int, depth: int):
+        pass
+    
+    def end_list(self, size: int, depth: int):
+        pass
+
+
+# Report format -> (extension, sink)
+REPORT_FORMATS = {
+    'python': ('.py', _PythonReportSink),
+    'json': ('.json', _JsonReportSink),
+    'msgpack': ('.msgpack', _MsgpackReportSink)
+}
+
+
+def scan_files(root: os.PathLike) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Walk ``root`` with os.scandir, yielding (relative posix path, full path, stat)"""
+    root = os.fspath(root)
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                rel_path = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                yield rel_path, entry.path, entry.stat(follow_symlinks=False)
+        stack.extend(reversed(subdirs))
+
+
+def load_manifest(path: os.PathLike) -> Dict[str, ManifestEntry]:
+    """Load a JSON Lines manifest written by FAFPythonBridge.hash_tree"""
+    manifest = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = ManifestEntry(**json.loads(line))
+                manifest[entry.path] = entry
+    return manifest
+
+
+def diff_manifests(old: Dict[str, ManifestEntry],
+                   new: Dict[str, ManifestEntry]) -> Dict[str, List[str]]:
+    """Compare two manifests and list added, removed and modified paths"""
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "modified": sorted(p for p in new.keys() & old.keys() if new[p].hash != old[p].hash)
+    }
+
+
+def _hash_worker(job: Tuple[str, str]) -> str:
+    """Process pool entry point for hash_tree"""
+    path, algorithm = job
+    return hash_file(path, algorithm=algorithm)
+
+
+def _tree_hash(path: os.PathLike, chunk_size: int, workers: Optional[int]) -> str:
+    """Two-level BLAKE2b tree hash using the algorithm's native tree parameters"""
+    def node(offset: int, depth: int, last: bool) -> "hashlib.blake2b":
+        return hashlib.blake2b(
+            digest_size=TREE_DIGEST_SIZE, fanout=0, depth=2, leaf_size=chunk_size,
+            node_offset=offset, node_depth=depth, inner_size=TREE_DIGEST_SIZE,
+            last_node=last
+        )
+    
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return node(0, 1, True).hexdigest()
+        
+        leaves = (size + chunk_size - 1) // chunk_size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            
+            # hashlib releases the GIL on large updates, so leaves hash in parallel
+            def hash_leaf(index: int) -> bytes:
+                leaf = node(index, 0, index == leaves - 1)
+                leaf.update(view[index * chunk_size:(index + 1) * chunk_size])
+                return leaf.digest()
+            
+            try:
+                if leaves == 1:
+                    digests = [hash_leaf(0)]
+                else:
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        digests = list(pool.map(hash_leaf, range(leaves)))
+            finally:
+                view.release()
+    
+    root = node(0, 1, True)
+    for digest in digests:
+        root.update(digest)
+    return root.hexdigest()
+
+
+def benchmark_hash_modes(path: os.PathLike, repeats: int = 3,
+                         workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """Compare hashing throughput of each mode (plus the old 4 KiB loop) on one file"""
+    def legacy(p):
+        sha256_hash = hashlib.sha256()
+        with open(p, "rb") as f:
+            for byte_block in iter(lambda: f.read(4096), b""):
+                sha256_hash.update(byte_block)
+        return sha256_hash.hexdigest()
+    
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    candidates = {'legacy_4k': legacy}
+    for mode in HASH_MODES:
+        candidates[mode] = lambda p, mode=mode: hash_file(p, mode=mode, workers=workers)
+    
+    results = {}
+    for name, func in candidates.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(path)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            "best_ms": best * 1000,
+            "throughput_mb_s": size_mb / best if best > 0 else 0.0
+        }
+    return results
+
+
+def _iter_array_items(stream: BinaryIO, chunk_size: int) -> Iterator[Tuple[Any, int]]:
+    """
+    Incrementally decode the elements of a top-level JSON array.
+    
+    Yields ``(item, bytes_read)`` pairs. Only the current chunk plus any
+    partially decoded element is buffered, so memory stays bounded by the
+    chunk size and the largest single element. Objects, arrays and strings
+    are only decoded once their closing character has arrived, so an
+    element spanning many chunks is still decoded once.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    bytes_read = 0
+    eof = False
+    expect = '['  # '[' -> 'first' -> 'separator' <-> 'value'
+    scan = [0, 0, False]  # progress through the pending element, see _scan_value_end
+    
+    while True:
+        pos = _JSON_WHITESPACE.match(buf, pos).end()
+        need_more = pos == len(buf)
+        
+        if not need_more and expect in ('first', 'value'):
+            if expect == 'first' and buf[pos] == ']':
+                pos += 1
+                break
+            complete = eof or buf[pos] not in '[{"' or _scan_value_end(buf, pos, scan) >= 0
+            if complete:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                    # A value running into the end of the buffer may be a number
+                    # split across two chunks, so wait for more data first.
+                    need_more = (not eof and buf[pos] not in '[{"'
+                                 and _JSON_NUMBER_TAIL.match(buf, end) is not None)
+                except json.JSONDecodeError:
+                    if eof or buf[pos] in '[{"':
+                        raise
+                    need_more = True
+            if complete and not need_more:
+                pos = end
+                expect = 'separator'
+                scan = [0, 0, False]
+                yield item, bytes_read
+                continue
+            need_more = True
+        elif not need_more:
+            char = buf[pos]
+            pos += 1
+            if expect == '[' and char == '[':
+                expect = 'first'
+            elif expect == 'separator' and char == ',':
+                expect = 'value'
+            elif expect == 'separator' and char == ']':
+                break
+            else:
+                raise ValueError(f"Unexpected character {char!r} in JSON array")
+            continue
+        
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = stream.read(chunk_size)
+        bytes_read += len(chunk)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+    
+    # Only whitespace may follow the closing bracket
+    while True:
+        pos = _JSON_WHITESPACE.match(buf, pos).end()
+        if pos < len(buf):
+            raise ValueError(f"Unexpected data after JSON array: {buf[pos:pos + 20]!r}")
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = utf8.decode(chunk, final=eof)
+        pos = 0
+
+
+def _scan_value_end(buf: str, start: int, state: List) -> int:
+    """
+    Find the end of the object, array or string starting at ``buf[start]``.
+    
+    Returns the offset just past it, or -1 if it is still incomplete. ``state``
+    is ``[offset from start, nesting depth, inside a string]`` and carries the
+    progress across calls, so each character is scanned once however many
+    chunks the value spans.
+    """
+    offset, depth, in_string = state
+    i = start + offset
+    n = len(buf)
+    while True:
+        if in_string:
+            match = _JSON_STRING_SPECIAL.search(buf, i)
+            if match is None:
+                i = n
+                break
+            if match.group() == '\\':
+                if match.end() >= n:
+                    i = match.start()  # the escaped character is in the next chunk
+                    break
+                i = match.end() + 1
+                continue
+            i = match.end()
+            in_string = False
+            if depth == 0:
+                return i
+        else:
+            match = _JSON_STRUCTURE.search(buf, i)
+            if match is None:
+                i = n
+                break
+            char = match.group()
+            i = match.end()
+            if char == '"':
+                in_string = True
+            elif char in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth <= 0:
+                    return i
+    state[:] = [i - start, depth, in_string]
+    return -1
+
+
 def main():
     """Demonstrate FAF Python Bridge capabilities"""
     print("🏎️ FAF File Tools - Python Integration")
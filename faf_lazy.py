@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Lazy Imports
+Defer heavy dependencies (pandas, numpy, ...) until they are first used
+"""
+
+import importlib
+import sys
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """
+    Module stand-in imported on first attribute access.
+        
+        pd = lazy_import("pandas")   # nothing imported yet
+        pd.DataFrame(...)            # pandas imported here
+    
+    Resolved attributes are cached on the proxy, so after the first use an
+    access costs the same as on the real module.
+    """
+    
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+    
+    def _load(self) -> ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with self._lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    self.__dict__['_module'] = module
+        return module
+    
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+    
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+        self.__dict__[attr] = value
+    
+    def __dir__(self):
+        return dir(self._load())
+    
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str):
+    """The module if it is already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """False for a LazyModule that has not been used yet"""
+    return not isinstance(module, LazyModule) or module.__dict__['_module'] is not None
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - API Load Test
+Concurrency and payload-size sweeps against faf_api_server
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from faf_benchmark import environment
+from faf_lazy import lazy_import
+
+httpx = lazy_import("httpx")
+np = lazy_import("numpy")
+
+
+# Endpoints exercised by a sweep
+LOAD_ENDPOINTS = ('read', 'write', 'list', 'metadata', 'upload')
+
+# Default sweep: concurrent clients and payload sizes
+LOAD_CONCURRENCY = (1, 4, 16, 64)
+LOAD_PAYLOAD_SIZES = {'1KB': 1024, '64KB': 64 * 1024, '1MB': 1024 * 1024}
+
+# Files in the directory listed by the 'list' endpoint
+LIST_DIRECTORY_FILES = 100
+
+# Scratch directories inside the server's storage
+LOAD_DIR = "load"
+LIST_DIR = "load_list"
+
+
+@dataclass
+class LoadResult:
+    """Throughput and latency of one endpoint at one concurrency level and payload size"""
+    endpoint: str
+    concurrency: int
+    payload_bytes: int
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p90_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class LoadTester:
+    """
+    Drive faf_api_server with concurrent asyncio clients.
+    
+    Without ``base_url`` the app is served in-process through httpx's ASGI
+    transport with its storage redirected to a temporary directory; with
+    ``base_url`` a running server is targeted over HTTP. Each sweep point
+    issues ``requests`` requests from ``concurrency`` clients.
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, requests: int = 200,
+                 warmup: int = 10, timeout: float = 30.0):
+        self.base_url = base_url
+        self.requests = requests
+        self.warmup = warmup
+        self.timeout = timeout
+    
+    @property
+    def target(self) -> str:
+        return self.base_url or "in-process (ASGI)"
+    
+    def run(self, endpoints: Sequence[str] = LOAD_ENDPOINTS,
+            concurrency: Sequence[int] = LOAD_CONCURRENCY,
+            payload_sizes: Dict[str, int] = LOAD_PAYLOAD_SIZES) -> List[LoadResult]:
+        """Run the sweep and return one LoadResult per endpoint/concurrency/payload"""
+        unknown = [endpoint for endpoint in endpoints if endpoint not in LOAD_ENDPOINTS]
+        if unknown:
+            raise ValueError(f"Unknown endpoint(s): {unknown}")
+        
+        if self.base_url is not None:
+            return asyncio.run(self._sweep(httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout),
+                                           endpoints, concurrency, payload_sizes))
+        
+        import faf_api_server
+        original_base = faf_api_server.BASE_PATH
+        with tempfile.TemporaryDirectory(prefix="faf_load_") as storage:
+            faf_api_server.BASE_PATH = Path(storage)
+            try:
+                transport = httpx.ASGITransport(app=faf_api_server.app)
+                client = httpx.AsyncClient(transport=transport, base_url="http://faf", timeout=self.timeout)
+                return asyncio.run(self._sweep(client, endpoints, concurrency, payload_sizes))
+            finally:
+                faf_api_server.BASE_PATH = original_base
+                faf_api_server.access_metrics.clear()
+    
+    async def _sweep(self, client: httpx.AsyncClient, endpoints: Sequence[str],
+                     concurrency: Sequence[int], payload_sizes: Dict[str, int]) -> List[LoadResult]:
+        results = []
+        async with client:
+            payloads = await self._seed(client, payload_sizes)
+            for endpoint in endpoints:
+                # Listing does not depend on payload size
+                sizes = {'': b''} if endpoint == 'list' else payloads
+                for size, payload in sizes.items():
+                    send = self._request_factory(client, endpoint, size, payload)
+                    await self._drive(send, min(self.warmup, self.requests), 1)
+                    for clients in concurrency:
+                        results.append(await self._measure(endpoint, len(payload), send, clients))
+        return results
+    
+    async def _seed(self, client: httpx.AsyncClient, payload_sizes: Dict[str, int]) -> Dict[str, bytes]:
+        """Create the files read, hashed and listed during the sweep"""
+        payloads = {}
+        for size, size_bytes in payload_sizes.items():
+            payloads[size] = os.urandom(size_bytes // 2 + 1).hex()[:size_bytes].encode()
+            response = await client.post("/api/write", json={
+                "path": f"{LOAD_DIR}/{size}.txt", "content": payloads[size].decode()})
+            response.raise_for_status()
+        for i in range(LIST_DIRECTORY_FILES):
+            response = await client.post("/api/write", json={"path": f"{LIST_DIR}/file_{i}.txt", "content": "x"})
+            response.raise_for_status()
+        return payloads
+    
+    def _request_factory(self, client: httpx.AsyncClient, endpoint: str, size: str, payload: bytes):
+        """Return ``send(i)`` issuing the i-th request of a run"""
+        path = f"{LOAD_DIR}/{size}.txt"
+        if endpoint == 'read':
+            return lambda i: client.post("/api/read", json={"path": path})
+        if endpoint == 'write':
+            content = payload.decode()
+            return lambda i: client.post("/api/write", json={
+                "path": f"{LOAD_DIR}/write_{size}_{i % 64}.txt", "content": content})
+        if endpoint == 'list':
+            return lambda i: client.get("/api/list", params={"directory": LIST_DIR})
+        if endpoint == 'metadata':
+            return lambda i: client.get(f"/api/metadata/{path}")
+        return lambda i: client.post("/api/upload", files={
+            "file": (f"load_{size}_{i % 64}.txt", payload, "text/plain")})
+    
+    async def _drive(self, send, requests: int, concurrency: int) -> Tuple[List[float], int]:
+        """Issue ``requests`` requests from ``concurrency`` clients; returns (latencies ms, errors)"""
+        counter = itertools.count()
+        latencies: List[float] = []
+        errors = 0
+        
+        async def client_loop():
+            nonlocal errors
+            while (i := next(counter)) < requests:
+                start = time.perf_counter()
+                try:
+                    response = await send(i)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += failed
+        
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return latencies, errors
+    
+    async def _measure(self, endpoint: str, payload_bytes: int, send, concurrency: int) -> LoadResult:
+        requests = max(self.requests, concurrency)
+        start = time.perf_counter()
+        latencies, errors = await self._drive(send, requests, concurrency)
+        elapsed = time.perf_counter() - start
+        p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+        return LoadResult(
+            endpoint=endpoint,
+            concurrency=concurrency,
+            payload_bytes=payload_bytes,
+            requests=len(latencies),
+            errors=errors,
+            duration_s=elapsed,
+            throughput_rps=len(latencies) / elapsed,
+            mean_ms=float(np.mean(latencies)),
+            p50_ms=float(p50),
+            p90_ms=float(p90),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            max_ms=float(np.max(latencies))
+        )
+    
+    def generate_report(self, results: List[LoadResult]) -> str:
+        """Text table of a sweep"""
+        report = []
+        report.append("=" * 78)
+        report.append(f"FAF API LOAD TEST - {self.target}")
+        report.append("=" * 78)
+        report.append(f"{'Endpoint':<10}{'Conc':>5}{'Payload':>10}{'req/s':>10}{'p50 ms':>9}"
+                      f"{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>7}")
+        report.append("-" * 78)
+        for r in results:
+            report.append(f"{r.endpoint:<10}{r.concurrency:>5}{r.payload_bytes:>10,}{r.throughput_rps:>10,.0f}"
+                          f"{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.p99_ms:>9.2f}{r.max_ms:>9.2f}{r.errors:>7}")
+        return "\n".join(report)
+    
+    def save_results(self, results: List[LoadResult], filepath: str) -> str:
+        """Write a sweep as JSON for comparison between commits"""
+        payload = {
+            'timestamp': datetime.now().isoformat(),
+            'target': self.target,
+            'environment': environment(),
+            'settings': {'requests': self.requests, 'warmup': self.warmup},
+            'results': [result.to_dict() for result in results]
+        }
+        with open(filepath, 'w') as f:
+            json.dump(payload, f, indent=2)
+        return filepath
+
+
+def _parse_sizes(text: str) -> Dict[str, int]:
+    """'1KB,64KB,1MB' -> {'1KB': 1024, ...}"""
+    units = {'B': 1, 'KB': 1024, 'MB': 1024 * 1024}
+    sizes = {}
+    for item in text.split(","):
+        item = item.strip().upper()
+        unit = next(u for u in ('KB', 'MB', 'B') if item.endswith(u))
+        sizes[item] = int(float(item[:-len(unit)]) * units[unit])
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run a load-test sweep from the command line"""
+    parser = argparse.ArgumentParser(description="FAF API load test")
+    parser.add_argument("--url", help="running server to target (default: in-process ASGI app)")
+    parser.add_argument("--endpoints", default=",".join(LOAD_ENDPOINTS))
+    parser.add_argument("--concurrency", default=",".join(map(str, LOAD_CONCURRENCY)))
+    parser.add_argument("--sizes", default=",".join(LOAD_PAYLOAD_SIZES))
+    parser.add_argument("--requests", type=int, default=200, help="requests per sweep point")
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args(argv)
+    
+    tester = LoadTester(base_url=args.url, requests=args.requests)
+    print(f"🌐 Load testing {tester.target}...")
+    results = tester.run(args.endpoints.split(","),
+                         [int(level) for level in args.concurrency.split(",")],
+                         _parse_sizes(args.sizes))
+    print(tester.generate_report(results))
+    tester.save_results(results, args.output)
+    print(f"\n✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Profiling
+Opt-in sampling and cProfile profilers writing flamegraph-compatible output
+"""
+
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Profiler modes: 'sampling' writes folded stacks (flamegraph.pl, speedscope,
+# inferno); 'cprofile' writes pstats files (snakeviz, flameprof, gprof2dot)
+PROFILE_MODES = ('sampling', 'cprofile')
+PROFILE_EXTENSIONS = {'sampling': '.folded', 'cprofile': '.prof'}
+
+# Where profiles are written unless an output directory is given
+PROFILE_DIR = os.environ.get("FAF_PROFILE_DIR", "profiles")
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.001
+
+# cProfile can only profile one thing per thread at a time, and sessions
+# sampling every thread would record each other, so both are exclusive
+_cprofile_lock = threading.Lock()
+_all_threads_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a cProfile or all-threads sampling session is already running"""
+
+
+class Profiler:
+    """
+    Profile a block of code.
+    
+    ``mode='sampling'`` starts a daemon thread that records the stack of the
+    profiled thread (or of every thread but the profiler's own with
+    ``all_threads=True``) every ``interval`` seconds; overhead is independent
+    of how many calls the code makes. ``mode='cprofile'`` traces every call
+    with cProfile. Only one cProfile or all-threads session runs at a time;
+    starting another raises ProfilerBusy. ``stop()`` writes the profile to
+    ``output_dir`` and returns its path; ``stop(write=False)`` only picks
+    the path, leaving ``write()`` for later (e.g. off an event loop).
+    """
+    
+    def __init__(self, mode: str = 'sampling', label: str = 'profile',
+                 output_dir: Optional[str] = None, interval: float = SAMPLE_INTERVAL,
+                 all_threads: bool = False):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.mode = mode
+        self.label = label
+        self.output_dir = Path(output_dir or PROFILE_DIR)
+        self.interval = interval
+        self.all_threads = all_threads
+        self.samples: Counter = Counter()
+        self.output_path: Optional[Path] = None
+        self.duration_s = 0.0
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target = None
+        self._start = 0.0
+        self._lock: Optional[threading.Lock] = None
+    
+    def start(self) -> "Profiler":
+        if self.mode == 'cprofile' or self.all_threads:
+            lock = _cprofile_lock if self.mode == 'cprofile' else _all_threads_lock
+            if not lock.acquire(blocking=False):
+                raise ProfilerBusy(f"A {'cProfile' if self.mode == 'cprofile' else 'sampling'} session is already running")
+            self._lock = lock
+        self._start = time.perf_counter()
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._target = threading.get_ident()
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, name="faf-profiler", daemon=True)
+            self._sampler.start()
+        return self
+    
+    def stop(self, write: bool = True) -> Path:
+        """Stop profiling and pick the output path; the file is written unless ``write`` is False"""
+        self.duration_s = time.perf_counter() - self._start
+        if self.mode == 'cprofile':
+            self._profile.disable()
+        else:
+            self._stop.set()
+            self._sampler.join()
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+        
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        self.output_path = self.output_dir / f"{stamp}_{_safe_label(self.label)}{PROFILE_EXTENSIONS[self.mode]}"
+        if write:
+            self.write()
+        return self.output_path
+    
+    def write(self) -> Path:
+        """Write the collected profile to ``output_path`` (set by stop())"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.mode == 'cprofile':
+            self._profile.dump_stats(str(self.output_path))
+        else:
+            with open(self.output_path, 'w', encoding='utf-8') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        return self.output_path
+    
+    def __enter__(self) -> "Profiler":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.all_threads:
+                for ident, frame in frames.items():
+                    if ident not in names:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    name = names.get(ident, str(ident))
+                    if name != "faf-profiler":  # this sampler and single-thread ones
+                        self.samples[_fold(frame, name)] += 1
+            elif self._target in frames:
+                self.samples[_fold(frames[self._target])] += 1
+
+
+def _fold(frame, root: Optional[str] = None) -> str:
+    """Folded stack for ``frame``: outermost first, ';'-separated"""
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    if root is not None:
+        stack.append(root)
+    stack.reverse()
+    return ";".join(stack)
+
+
+def _safe_label(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")[:80] or "profile"
+
+
+def read_folded(path: str) -> Dict[str, int]:
+    """Load a folded-stack profile back into {stack: samples}"""
+    samples = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                samples[stack] = samples.get(stack, 0) + int(count)
+    return samples
+
+
+def main():
+    """Profile a Python script: faf_profiling.py [--cprofile] script.py [args...]"""
+    args = sys.argv[1:]
+    mode = 'sampling'
+    if args and args[0] == '--cprofile':
+        mode = 'cprofile'
+        args = args[1:]
+    if not args:
+        print("Usage: faf_profiling.py [--cprofile] script.py [args...]")
+        sys.exit(2)
+    
+    import runpy
+    sys.argv = args
+    profiler = Profiler(mode, label=Path(args[0]).stem, all_threads=True).start()
+    try:
+        runpy.run_path(args[0], run_name="__main__")
+    finally:
+        path = profiler.stop()
+        print(f"🔥 Wrote {mode} profile to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Tracing
+OpenTelemetry-compatible phase spans exported as OTLP/JSON lines
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Spans are exported when FAF_TRACE_FILE is set (or configure() is called);
+# otherwise span() returns a shared no-op and tracing costs one global lookup
+TRACE_FILE = os.environ.get("FAF_TRACE_FILE")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "faf-file-tools")
+SCOPE_NAME = "faf_tracing"
+
+# OTLP enum names
+SPAN_KINDS = {'internal': 'SPAN_KIND_INTERNAL', 'server': 'SPAN_KIND_SERVER', 'client': 'SPAN_KIND_CLIENT'}
+STATUS_CODES = {'unset': 'STATUS_CODE_UNSET', 'ok': 'STATUS_CODE_OK', 'error': 'STATUS_CODE_ERROR'}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("faf_current_span", default=None)
+_exporter = None
+
+
+class Span:
+    """
+    One timed operation. Use as a context manager via ``span()``; spans
+    opened inside it (in the same task or thread, or in work handed off with
+    asyncio.to_thread) become its children. A trace is exported in one
+    batch when its root span ends.
+    """
+    
+    __slots__ = ('name', 'kind', 'attributes', 'trace_id', 'span_id', 'parent_span_id',
+                 'start_ns', 'end_ns', 'status', 'status_message', '_trace', '_root', '_token', '_activate')
+    
+    def __init__(self, name: str, kind: str = 'internal', attributes: Optional[Dict[str, Any]] = None,
+                 parent: Optional["Span"] = None, trace_id: Optional[str] = None,
+                 parent_span_id: Optional[str] = None, activate: bool = True):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.span_id = f"{random.getrandbits(64) or 1:016x}"
+        self._root = parent is None
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_span_id = parent.span_id
+            self._trace = parent._trace
+        else:
+            self.trace_id = trace_id or f"{random.getrandbits(128) or 1:032x}"
+            self.parent_span_id = parent_span_id
+            self._trace = []
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = 'unset'
+        self.status_message = ''
+        self._token = None
+        self._activate = activate
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def set_status(self, status: str, message: str = ''):
+        self.status = status
+        self.status_message = message
+    
+    def start(self) -> "Span":
+        self.start_ns = time.time_ns()
+        if self._activate:
+            self._token = _current_span.set(self)
+        return self
+    
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if error is not None and self.status == 'unset':
+            self.set_status('error', f"{type(error).__name__}: {error}")
+        self._trace.append(self)
+        exporter = _exporter
+        if self._root and exporter is not None:
+            exporter.export(self._trace)
+    
+    def __enter__(self) -> "Span":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span in OTLP/JSON form"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KINDS.get(self.kind, SPAN_KINDS['internal']),
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': STATUS_CODES[self.status]}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Returned by span() while tracing is disabled"""
+    
+    __slots__ = ()
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def set_status(self, status: str, message: str = ''):
+        pass
+    
+    def __enter__(self) -> "_NoopSpan":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, kind: str = 'internal', **attributes):
+    """Open a child of the current span (or a new trace): ``with span("read") as s: ...``"""
+    if _exporter is None:
+        return _NOOP_SPAN
+    return Span(name, kind, attributes, parent=_current_span.get())
+
+
+def start_trace(name: str, kind: str = 'server', traceparent: Optional[str] = None, **attributes):
+    """Open a root span, continuing a W3C ``traceparent`` if one is given"""
+    if _exporter is None:
+        return _NOOP_SPAN
+    trace_id = parent_span_id = None
+    if traceparent:
+        parts = traceparent.split("-")
+        if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+            trace_id, parent_span_id = parts[1], parts[2]
+    return Span(name, kind, attributes, trace_id=trace_id, parent_span_id=parent_span_id)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running a function (or a generator, until exhausted) in a span"""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if _exporter is None:
+                    yield from func(*args, **kwargs)
+                    return
+                # Not made current: the consumer runs between yields
+                with Span(span_name, parent=_current_span.get(), activate=False):
+                    yield from func(*args, **kwargs)
+            return generator_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with Span(span_name, parent=_current_span.get()):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class JsonLinesExporter:
+    """
+    Append each finished trace to ``path`` as one OTLP/JSON
+    ExportTraceServiceRequest per line, the format read by the
+    OpenTelemetry Collector's otlpjsonfile receiver.
+    """
+    
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.resource = {'attributes': _otlp_attributes({'service.name': service_name})}
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def export(self, spans: List[Span]):
+        line = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': [s.to_otlp() for s in spans]}]
+        }]})
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            self._file.write(line + "\n")
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MemoryExporter:
+    """Keep finished spans in memory (tests, in-process analysis)"""
+    
+    def __init__(self):
+        self.spans: List[Span] = []
+    
+    def export(self, spans: List[Span]):
+        self.spans.extend(spans)
+    
+    def close(self):
+        pass
+
+
+def configure(exporter) -> Any:
+    """Install ``exporter`` (None disables tracing); returns the previous one"""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    return previous
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    values = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            value = {'boolValue': value}
+        elif isinstance(value, int):
+            value = {'intValue': str(value)}
+        elif isinstance(value, float):
+            value = {'doubleValue': value}
+        else:
+            value = {'stringValue': str(value)}
+        values.append({'key': key, 'value': value})
+    return values
+
+
+def read_spans(path: str) -> List[Dict[str, Any]]:
+    """Load the spans written by JsonLinesExporter"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            for resource in json.loads(line)['resourceSpans']:
+                for scope in resource['scopeSpans']:
+                    spans.extend(scope['spans'])
+    return spans
+
+
+def summarize_phases(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{root span name: {phase name: {count, mean_ms, total_ms}}} for OTLP spans"""
+    by_id = {s['spanId']: s for s in spans}
+    
+    def root_of(s):
+        while s.get('parentSpanId') in by_id:
+            s = by_id[s['parentSpanId']]
+        return s
+    
+    durations = defaultdict(lambda: defaultdict(list))
+    for s in spans:
+        duration = (int(s['endTimeUnixNano']) - int(s['startTimeUnixNano'])) / 1e6
+        durations[root_of(s)['name']][s['name']].append(duration)
+    return {
+        root: {phase: {'count': len(values), 'mean_ms': sum(values) / len(values), 'total_ms': sum(values)}
+               for phase, values in phases.items()}
+        for root, phases in durations.items()
+    }
+
+
+if TRACE_FILE:
+    configure(JsonLinesExporter(TRACE_FILE))
+
+
+def main():
+    """Summarize a trace file: faf_tracing.py traces.jsonl"""
+    if len(sys.argv) != 2:
+        print("Usage: faf_tracing.py traces.jsonl")
+        sys.exit(2)
+    
+    print(f"🔎 Phase breakdown for {sys.argv[1]}")
+    for root, phases in summarize_phases(read_spans(sys.argv[1])).items():
+        print(f"\n{root}")
+        for phase, stats in sorted(phases.items(), key=lambda item: -item[1]['total_ms']):
+            print(f"  {phase:<30}{stats['count']:>8}{stats['mean_ms']:>12.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+FAF File Tools - Change Watcher
+Push-based change feed for a directory tree (inotify with a polling fallback)
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+
+# inotify constants (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Event kinds recorded in the journal; 'overflow' means consumers must rescan
+EVENT_TYPES = ('created', 'modified', 'deleted', 'overflow')
+
+
+@dataclass
+class ChangeEvent:
+    """A single change observed below the watched root"""
+    seq: int
+    event: str
+    path: str
+    is_dir: bool
+    timestamp: str
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ChangeJournal:
+    """
+    Bounded, thread-safe journal of change events.
+    
+    Events carry a monotonically increasing ``seq`` so consumers can resume
+    from the last event they saw. Readers can block on a thread
+    (``wait``) or on an asyncio loop (``wait_async``).
+    """
+    
+    def __init__(self, max_events: int = 10000):
+        self._events: Deque[ChangeEvent] = deque(maxlen=max_events)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+    
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+    
+    def append(self, event: str, path: str, is_dir: bool = False) -> ChangeEvent:
+        """Record an event and wake every waiting reader"""
+        with self._cond:
+            self._seq += 1
+            change = ChangeEvent(self._seq, event, path, is_dir, datetime.now().isoformat())
+            self._events.append(change)
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+        
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # loop already closed
+        return change
+    
+    def since(self, seq: int) -> List[ChangeEvent]:
+        """Events newer than ``seq`` that are still retained"""
+        with self._cond:
+            if not self._events or seq >= self._seq:
+                return []
+            first = self._events[0].seq
+            start = max(0, seq - first + 1)
+            return [self._events[i] for i in range(start, len(self._events))]
+    
+    def is_truncated(self, seq: int) -> bool:
+        """True if events after ``seq`` have already been dropped from the journal"""
+        with self._cond:
+            return bool(self._events) and seq < self._events[0].seq - 1
+    
+    def wait(self, seq: int, timeout: Optional[float] = None) -> List[ChangeEvent]:
+        """Block until events newer than ``seq`` exist or ``timeout`` expires"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+        return self.since(seq)
+    
+    async def wait_async(self, seq: int, timeout: Optional[float] = None) -> List[ChangeEvent]:
+        """Asyncio flavour of ``wait`` that never ties up a worker thread"""
+        events = self.since(seq)
+        if events:
+            return events
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._cond:
+            self._async_waiters.add(waiter)
+            ready = self._seq > seq
+        try:
+            if not ready:
+                await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        return self.since(seq)
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeWatcher:
+    """
+    Watch a directory tree and feed changes into a ``ChangeJournal``.
+    
+    Uses inotify on Linux and falls back to periodic ``os.scandir``
+    snapshots elsewhere (or when ``backend='polling'``). Iterating a
+    watcher blocks and yields new events until ``stop()`` is called.
+    """
+    
+    def __init__(self, root: os.PathLike, backend: str = "auto",
+                 poll_interval: float = 1.0, max_events: int = 10000):
+        if backend not in ("auto", "inotify", "polling"):
+            raise ValueError(f"Unknown watcher backend: {backend}")
+        if backend == "auto":
+            backend = "inotify" if _load_libc() is not None else "polling"
+        elif backend == "inotify" and _load_libc() is None:
+            raise RuntimeError("inotify is not available on this platform")
+        
+        self.root = Path(root)
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.journal = ChangeJournal(max_events)
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> "ChangeWatcher":
+        """Start watching in a daemon thread (returns once the watch is armed)"""
+        if self.running:
+            return self
+        self._stop.clear()
+        self._ready.clear()
+        target = self._run_inotify if self.backend == "inotify" else self._run_polling
+        self._thread = threading.Thread(target=target, name="faf-watcher", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=10)
+        return self
+    
+    def stop(self):
+        """Stop watching and release blocked iterators"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self.journal._cond:
+            self.journal._cond.notify_all()
+    
+    def __enter__(self) -> "ChangeWatcher":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def __iter__(self) -> Iterator[ChangeEvent]:
+        return self.events()
+    
+    def events(self, since: Optional[int] = None,
+               timeout: Optional[float] = None) -> Iterator[ChangeEvent]:
+        """
+        Yield events newer than ``since`` (default: only new ones) as they
+        arrive. Stops when the watcher stops or, if ``timeout`` is set, once
+        no event has arrived for that many seconds.
+        """
+        seq = self.journal.last_seq if since is None else since
+        idle_since = time.monotonic()
+        while not self._stop.is_set():
+            batch = self.journal.wait(seq, timeout=0.25)
+            for event in batch:
+                seq = event.seq
+                yield event
+            if batch:
+                idle_since = time.monotonic()
+            elif timeout is not None and time.monotonic() - idle_since >= timeout:
+                return
+    
+    def _record(self, event: str, full_path: str, is_dir: bool):
+        rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+        self.journal.append(event, rel_path, is_dir)
+    
+    # Polling backend
+    def _snapshot(self) -> Dict[str, Tuple[int, int, bool]]:
+        snapshot = {}
+        stack = [str(self.root)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size, is_dir)
+                        if is_dir:
+                            stack.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return snapshot
+    
+    def _run_polling(self):
+        previous = self._snapshot()
+        self._ready.set()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            for path in current.keys() - previous.keys():
+                self._record('created', path, current[path][2])
+            for path in previous.keys() - current.keys():
+                self._record('deleted', path, previous[path][2])
+            for path in current.keys() & previous.keys():
+                if current[path] != previous[path] and not current[path][2]:
+                    self._record('modified', path, False)
+            previous = current
+    
+    # inotify backend
+    def _run_inotify(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            # e.g. max_user_instances exhausted: degrade rather than die
+            self.backend = "polling"
+            return self._run_polling()
+        
+        root = str(self.root)
+        watches: Dict[int, str] = {}
+        
+        def add_tree(directory: str, report: bool):
+            """Watch ``directory`` and everything below it"""
+            stack = [directory]
+            while stack:
+                current = stack.pop()
+                wd = libc.inotify_add_watch(fd, os.fsencode(current), WATCH_MASK)
+                if wd < 0:
+                    continue
+                watches[wd] = current
+                try:
+                    with os.scandir(current) as it:
+                        for entry in it:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if report:
+                                # Created before the watch existed; report it now
+                                self._record('created', entry.path, is_dir)
+                            if is_dir:
+                                stack.append(entry.path)
+                except (FileNotFoundError, NotADirectoryError, PermissionError):
+                    continue
+        
+        def drop_tree(directory: str):
+            """Stop watching ``directory`` and everything below it"""
+            prefix = directory + os.sep
+            for wd, path in list(watches.items()):
+                if path == directory or path.startswith(prefix):
+                    libc.inotify_rm_watch(fd, wd)
+                    del watches[wd]
+        
+        try:
+            add_tree(root, report=False)
+            self._ready.set()
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 0.25)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    name = data[offset:offset + length].rstrip(b"\0")
+                    offset += length
+                    
+                    if mask & IN_Q_OVERFLOW:
+                        self.journal.append('overflow', '', True)
+                        continue
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    directory = watches.get(wd)
+                    if directory is None:
+                        continue
+                    if not name:
+                        # A moved directory is re-watched from its parent's
+                        # MOVED_FROM/MOVED_TO, so a watch still here has lost
+                        # its path (or is the root): consumers must rescan
+                        if mask & IN_MOVE_SELF or (mask & IN_DELETE_SELF and directory == root):
+                            self.journal.append('overflow', '', True)
+                            drop_tree(directory)
+                        continue
+                    
+                    full_path = os.path.join(directory, os.fsdecode(name))
+                    is_dir = bool(mask & IN_ISDIR)
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._record('created', full_path, is_dir)
+                        if is_dir:
+                            add_tree(full_path, report=True)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._record('deleted', full_path, is_dir)
+                        if is_dir and mask & IN_MOVED_FROM:
+                            # Re-added under the new path if it moves within the tree
+                            drop_tree(full_path)
+                    elif mask & (IN_CLOSE_WRITE | IN_ATTRIB) and not is_dir:
+                        self._record('modified', full_path, False)
+        finally:
+            self._ready.set()
+            os.close(fd)
+
+
+_libc = None
+
+
+def _load_libc():
+    """Return libc with the inotify functions bound, or None if unavailable"""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def main():
+    """Print changes below a directory until interrupted"""
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+    watcher = ChangeWatcher(root).start()
+    print(f"👀 Watching {Path(root).resolve()} ({watcher.backend})")
+    try:
+        for event in watcher:
+            print(f"{event.seq:>6} {event.event:<9} {event.path}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,9 @@ import json
 import os
 import tempfile
 import shutil
+import time
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-import numpy as np
 from unittest.mock import Mock, patch, AsyncMock
 import sys
 
@@ -23,6 +22,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import modules to test
 from faf_file_tools import FAFPythonBridge, FileOperation
 from faf_data_analyzer import FAFDataAnalyzer
+from faf_lazy import lazy_import
+
+# Only the tests that use pandas/numpy pay for importing them
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
 
 
 class TestFAFPythonBridge:
@@ -63,6 +67,63 @@ class TestFAFPythonBridge:
         assert bridge.stats["files_read"] == 1
         assert bridge.stats["bytes_processed"] > 0
     
+    def test_iter_json_lines(self, bridge, temp_dir):
+        """Test streaming a JSON Lines file"""
+        records = [{"operation": "read", "size": i} for i in range(500)]
+        test_file = temp_dir / "ops.jsonl"
+        test_file.write_text("\n".join(json.dumps(r) for r in records) + "\n\n")
+        
+        streamed = bridge.iter_json_lines("ops.jsonl")
+        assert next(streamed) == records[0]
+        assert list(streamed) == records[1:]
+        
+        assert bridge.stats["records_streamed"] == 500
+        assert bridge.stats["files_read"] == 1
+        assert bridge.stats["bytes_processed"] == test_file.stat().st_size
+        assert bridge.operations[-1].operation == "stream"
+    
+    def test_iter_json_array(self, bridge, temp_dir):
+        """Test incremental parsing of a top-level JSON array"""
+        records = [{"id": i, "value": -1.5e3 * i, "tags": ["a", "é"]} for i in range(300)]
+        (temp_dir / "ops.json").write_text(json.dumps(records, indent=2))
+        
+        # A tiny chunk size forces elements to straddle chunk boundaries
+        assert list(bridge.iter_json_array("ops.json", chunk_size=7)) == records
+        assert bridge.stats["records_streamed"] == 300
+        assert bridge.stats["stream_throughput_mb_s"] >= 0
+        
+        # Elements far larger than a chunk, with brackets and escapes inside strings
+        large = [{"text": 'x]}"\\' * 20000, "nested": [[{"a": "]"}]]}, "s\\\"]", 7]
+        (temp_dir / "large.json").write_text(json.dumps(large) + "\n")
+        assert list(bridge.iter_json_array("large.json", chunk_size=64)) == large
+    
+    def test_iter_json_array_early_close(self, bridge, temp_dir):
+        """Test abandoning a stream still records partial progress"""
+        (temp_dir / "ops.json").write_text(json.dumps(list(range(10000))))
+        
+        stream = bridge.iter_json_array("ops.json", chunk_size=16)
+        assert [next(stream) for _ in range(3)] == [0, 1, 2]
+        stream.close()
+        
+        assert bridge.stats["records_streamed"] == 3
+        assert bridge.operations[-1].success is True
+    
+    def test_stream_errors(self, bridge, temp_dir):
+        """Test malformed streams raise and are counted as errors"""
+        (temp_dir / "bad.json").write_text('[1, 2,')
+        (temp_dir / "bad.jsonl").write_text('{"ok": 1}\nnot json\n')
+        
+        with pytest.raises(Exception, match="Failed to stream"):
+            list(bridge.iter_json_array("bad.json"))
+        (temp_dir / "trailing.json").write_text('[1, 2] [3]')
+        with pytest.raises(Exception, match="after JSON array"):
+            list(bridge.iter_json_array("trailing.json", chunk_size=4))
+        with pytest.raises(Exception, match="line 2"):
+            list(bridge.iter_json_lines("bad.jsonl"))
+        
+        assert bridge.stats["errors"] == 3
+        assert bridge.operations[-1].success is False
+    
     def test_write_python_report(self, bridge, temp_dir):
         """Test writing Python report"""
         report_data = {
@@ -85,6 +146,63 @@ class TestFAFPythonBridge:
             code = f.read()
         compile(code, str(report_file), 'exec')
     
+    def test_write_report_formats(self, bridge, temp_dir):
+        """Test nested data round-trips through every report format in one pass"""
+        import runpy
+        msgpack = pytest.importorskip("msgpack")
+        report_data = {
+            "title": 'Quotes " and \\ newlines\n',
+            "ratio": 0.5,
+            "missing": None,
+            "nested": {"levels": [1, {"deep": (True, False)}], "empty": {}},
+            "timestamp": datetime(2025, 9, 15, 8, 0)
+        }
+        expected = dict(report_data,
+                        nested={"levels": [1, {"deep": [True, False]}], "empty": {}},
+                        timestamp="2025-09-15T08:00:00")
+        
+        result = bridge.write_python_report(report_data, "out/report.py",
+                                            formats=("python", "json", "msgpack"))
+        
+        assert "Successfully wrote" in result
+        assert bridge.stats["files_written"] == 3
+        assert runpy.run_path(str(temp_dir / "out" / "report.py"))["report_data"] == expected
+        assert json.loads((temp_dir / "out" / "report.json").read_text()) == expected
+        assert msgpack.unpackb((temp_dir / "out" / "report.msgpack").read_bytes()) == expected
+        
+        # Non-finite floats are not valid JSON; they are written as null
+        bridge.write_python_report({"scores": [1.5, float('nan')], "limit": float('-inf')},
+                                   "out/nonfinite.json", formats=("json",))
+        text = (temp_dir / "out" / "nonfinite.json").read_text()
+        assert "NaN" not in text and "Infinity" not in text
+        assert json.loads(text) == {"scores": [1.5, None], "limit": None}
+        
+        with pytest.raises(ValueError):
+            bridge.write_python_report(report_data, "out/report.yaml", formats=("yaml",))
+    
+    def test_write_analyzer_report(self, bridge, temp_dir):
+        """Test numpy and enum scalars are written as plain literals"""
+        import enum
+        import runpy
+        msgpack = pytest.importorskip("msgpack")
+        
+        class Level(enum.IntEnum):
+            HIGH = 2
+        
+        analyzer = FAFDataAnalyzer()
+        analysis = analyzer.analyze_performance(analyzer.generate_sample_data(50))
+        report_data = {"analysis": analysis, "level": Level.HIGH, "by_level": {Level.HIGH: np.float64(1.5)}}
+        bridge.write_python_report(report_data, "analysis.py", formats=("python", "json", "msgpack"))
+        
+        text = (temp_dir / "analysis.py").read_text()
+        assert "np." not in text and "<Level" not in text
+        loaded = runpy.run_path(str(temp_dir / "analysis.py"))["report_data"]
+        assert loaded["level"] == 2 and type(loaded["level"]) is int
+        assert loaded["by_level"] == {2: 1.5}
+        assert loaded["analysis"]["summary"]["success_rate"] == pytest.approx(analysis["summary"]["success_rate"])
+        assert json.loads((temp_dir / "analysis.json").read_text())["level"] == 2
+        assert msgpack.unpackb((temp_dir / "analysis.msgpack").read_bytes(), strict_map_key=False)["by_level"] == {2: 1.5}
+    
     def test_generate_test_suite(self, bridge, temp_dir):
         """Test generating test suite"""
         test_file = bridge.generate_test_suite()
@@ -108,6 +226,71 @@ class TestFAFPythonBridge:
         assert len(hash_result) == 64  # SHA-256 hash length
         assert all(c in '0123456789abcdef' for c in hash_result)
     
+    def test_hash_modes(self, bridge, temp_dir):
+        """Test every hashing mode against hashlib"""
+        import hashlib
+        payload = os.urandom(3 * 1024 * 1024 + 17)
+        (temp_dir / "blob.bin").write_bytes(payload)
+        (temp_dir / "empty.bin").write_bytes(b"")
+        
+        expected = hashlib.sha256(payload).hexdigest()
+        assert bridge.calculate_file_hash("blob.bin") == expected
+        assert bridge.calculate_file_hash("blob.bin", mode="mmap") == expected
+        assert bridge.calculate_file_hash("empty.bin", mode="mmap") == hashlib.sha256().hexdigest()
+        assert bridge.calculate_file_hash("blob.bin", algorithm="md5") == hashlib.md5(payload).hexdigest()
+        
+        with pytest.raises(ValueError):
+            bridge.calculate_file_hash("blob.bin", mode="bogus")
+    
+    def test_tree_hash(self, temp_dir):
+        """Test tree hashing is deterministic across worker counts and content sensitive"""
+        from faf_file_tools import hash_file
+        path = temp_dir / "blob.bin"
+        path.write_bytes(os.urandom(1024 * 1024 + 5))
+        
+        single = hash_file(path, mode="tree", chunk_size=64 * 1024, workers=1)
+        assert hash_file(path, mode="tree", chunk_size=64 * 1024, workers=4) == single
+        assert hash_file(path, mode="tree", chunk_size=128 * 1024) != single
+        
+        with open(path, "r+b") as f:
+            f.seek(700 * 1024)
+            f.write(b"X")
+        assert hash_file(path, mode="tree", chunk_size=64 * 1024) != single
+    
+    def test_hash_tree_manifest(self, bridge, temp_dir):
+        """Test directory hashing, manifest streaming and cache reuse"""
+        import hashlib
+        from faf_file_tools import load_manifest, diff_manifests
+        tree = temp_dir / "repo"
+        for i in range(12):
+            sub = tree / f"pkg{i % 3}"
+            sub.mkdir(parents=True, exist_ok=True)
+            (sub / f"mod{i}.py").write_text(f"value = {i}\n" * (i + 1))
+        
+        entries = list(bridge.hash_tree("repo", manifest_file="repo.manifest.jsonl", workers=2))
+        assert len(entries) == 12
+        first = entries[0]
+        assert first.hash == hashlib.sha256((tree / first.path).read_bytes()).hexdigest()
+        assert bridge.stats["files_hashed"] == 12
+        
+        manifest = load_manifest(temp_dir / "repo.manifest.jsonl")
+        assert set(manifest) == {e.path for e in entries}
+        
+        # Second run only rehashes what changed
+        (tree / "pkg1" / "mod1.py").write_text("changed = True\n")
+        (tree / "pkg0" / "new.py").write_text("x = 1\n")
+        (tree / "pkg2" / "mod2.py").unlink()
+        list(bridge.hash_tree("repo", manifest_file="repo.manifest.jsonl"))
+        assert bridge.stats["files_hashed"] == 14
+        assert bridge.stats["hash_cache_hits"] == 10
+        
+        changes = diff_manifests(manifest, load_manifest(temp_dir / "repo.manifest.jsonl"))
+        assert changes == {
+            "added": ["pkg0/new.py"],
+            "removed": ["pkg2/mod2.py"],
+            "modified": ["pkg1/mod1.py"]
+        }
+    
     def test_get_statistics(self, bridge):
         """Test statistics retrieval"""
         stats = bridge.get_statistics()
@@ -137,6 +320,67 @@ class TestFAFPythonBridge:
         
         assert "Failed to read" in str(exc_info.value)
         assert bridge.stats["errors"] == 1
+    
+    def test_profile(self, bridge, temp_dir):
+        """Test the profiling context manager writes folded stacks and pstats"""
+        import pstats
+        from faf_profiling import read_folded
+        
+        data = {"rows": [{"id": i, "name": f"row {i}"} for i in range(2000)]}
+        with bridge.profile("report", output_dir=str(temp_dir / "profiles")) as profiler:
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                bridge.write_python_report(data, "report", formats=("json",))
+        
+        assert profiler.output_path.suffix == ".folded"
+        assert "report" in profiler.output_path.name
+        stacks = read_folded(str(profiler.output_path))
+        assert sum(stacks.values()) > 0
+        assert any("test_profile" in stack for stack in stacks)
+        
+        with bridge.profile("report", mode="cprofile", output_dir=str(temp_dir / "profiles")) as profiler:
+            bridge.write_python_report(data, "report", formats=("json",))
+        stats = pstats.Stats(str(profiler.output_path))
+        assert any(name == "write_python_report" for _, _, name in stats.stats)
+        
+        with pytest.raises(ValueError):
+            bridge.profile(mode="perf")
+        
+        # All-threads sampling sessions would record each other: one at a time
+        from faf_profiling import Profiler, ProfilerBusy
+        first = Profiler(all_threads=True, output_dir=str(temp_dir / "threads")).start()
+        with pytest.raises(ProfilerBusy):
+            Profiler(all_threads=True).start()
+        path = first.stop(write=False)
+        assert not path.exists() and first.write() == path and path.exists()
+        Profiler(all_threads=True, output_dir=str(temp_dir / "threads")).start().stop()
+    
+    def test_tracing_spans(self, bridge, temp_dir):
+        """Test bridge methods emit phase spans only while tracing is configured"""
+        import faf_tracing
+        (temp_dir / "config.json").write_text('{"name": "faf"}')
+        bridge.read_json_config("config.json")
+        
+        exporter = faf_tracing.MemoryExporter()
+        previous = faf_tracing.configure(exporter)
+        try:
+            bridge.read_json_config("config.json")
+            bridge.write_python_report({"a": [1, 2]}, "report.json", formats=("json",))
+            with pytest.raises(Exception):
+                bridge.read_json_config("missing.json")
+        finally:
+            faf_tracing.configure(previous)
+        
+        names = [s.name for s in exporter.spans]
+        assert names == ["read", "decode", "FAFPythonBridge.read_json_config",
+                         "serialize", "flush", "FAFPythonBridge.write_python_report",
+                         "read", "FAFPythonBridge.read_json_config"]
+        root = exporter.spans[2]
+        assert {s.parent_span_id for s in exporter.spans[:2]} == {root.span_id}
+        assert root.parent_span_id is None and root.duration_ms >= exporter.spans[0].duration_ms
+        assert exporter.spans[-1].status == "error" and exporter.spans[-2].status == "error"
+        assert exporter.spans[-1].trace_id != root.trace_id
+        assert faf_tracing.span("idle") is faf_tracing._NOOP_SPAN
 
 
 class TestFAFDataAnalyzer:
@@ -166,6 +410,36 @@ class TestFAFDataAnalyzer:
         assert pd.api.types.is_numeric_dtype(df['size_bytes'])
         assert pd.api.types.is_bool_dtype(df['success'])
     
+    def test_generate_sample_data_seeded(self, analyzer):
+        """Test seeded generation is reproducible and honours the workload mix"""
+        start = datetime(2025, 9, 15)
+        first = analyzer.generate_sample_data(2000, seed=42, start_time=start)
+        second = analyzer.generate_sample_data(2000, seed=42, start_time=start)
+        pd.testing.assert_frame_equal(first, second)
+        assert isinstance(first['operation'].dtype, pd.CategoricalDtype)
+        assert first['timestamp'].iloc[1] - first['timestamp'].iloc[0] == pd.Timedelta(minutes=15)
+        
+        skewed = analyzer.generate_sample_data(
+            5000, seed=1,
+            operation_mix={'faf_read': 9, 'faf_write': 1},
+            profiles={'faf_read': {'latency': ('lognormal', 20, 0.3), 'size_bytes': (10, 20)}}
+        )
+        assert set(skewed['operation'].unique()) == {'faf_read', 'faf_write'}
+        reads = skewed[skewed['operation'] == 'faf_read']
+        assert len(reads) > 4000
+        assert reads['size_bytes'].between(10, 20).all()
+        assert reads['duration_ms'].median() == pytest.approx(20, rel=0.1)
+    
+    def test_stream_sample_data(self, analyzer, tmp_path):
+        """Test chunked generation to disk"""
+        csv_path = tmp_path / "workload.csv"
+        result = analyzer.stream_sample_data(str(csv_path), 2500, chunk_size=1000, seed=3)
+        
+        assert "Generated 2500 records" in result
+        df = pd.read_csv(csv_path)
+        assert len(df) == 2500
+        assert df['path'].is_unique
+    
     def test_analyze_performance(self, analyzer):
         """Test performance analysis"""
         df = analyzer.generate_sample_data(100)
@@ -189,6 +463,47 @@ class TestFAFDataAnalyzer:
         assert 'p99_duration_ms' in perf
         assert perf['avg_duration_ms'] > 0
     
+    def test_group_metrics_match_filtered_groups(self, analyzer):
+        """Test vectorized per-group metrics against per-group filtering"""
+        df = analyzer.generate_sample_data(500)
+        analysis = analyzer.analyze_performance(df)
+        
+        for column, key in (('operation', 'by_operation'), ('file_type', 'by_file_type')):
+            assert set(analysis[key]) == set(df[column].unique())
+            for group, metrics in analysis[key].items():
+                subset = df[df[column] == group]
+                assert metrics['count'] == len(subset)
+                assert metrics['avg_duration_ms'] == pytest.approx(subset['duration_ms'].mean())
+                assert metrics['avg_size_bytes'] == pytest.approx(subset['size_bytes'].mean())
+                assert metrics['success_rate'] == pytest.approx(subset['success'].mean() * 100)
+                assert metrics['p95_duration_ms'] == pytest.approx(subset['duration_ms'].quantile(0.95))
+                assert metrics['p99_duration_ms'] == pytest.approx(subset['duration_ms'].quantile(0.99))
+    
+    def test_ingest_bridge_operations(self, analyzer, tmp_path):
+        """Test analyzing real bridge operations, live and from an exported log"""
+        bridge = FAFPythonBridge(base_path=str(tmp_path))
+        (tmp_path / "config.json").write_text('{"a": 1}')
+        for i in range(5):
+            bridge.read_json_config("config.json")
+            bridge.write_python_report({"i": i}, f"reports/r{i}.py")
+        with pytest.raises(Exception):
+            bridge.read_json_config("missing.json")
+        
+        live = analyzer.ingest_operations(bridge)
+        assert len(live) == 11
+        assert set(live['operation']) == {'read', 'write'}
+        assert set(live['file_type']) == {'.json', '.py'}
+        assert live['success'].sum() == 10
+        
+        bridge.export_operations("ops.jsonl")
+        bridge.export_operations("ops.jsonl")  # nothing new: no duplicates
+        logged = analyzer.ingest_operations(str(tmp_path / "ops.jsonl"), chunk_size=4)
+        pd.testing.assert_frame_equal(logged, live)
+        
+        analysis = analyzer.analyze_performance(logged)
+        assert analysis['by_operation']['read']['count'] == 6
+        assert analysis['summary']['success_rate'] == pytest.approx(10 / 11 * 100)
+    
     def test_generate_performance_report(self, analyzer):
         """Test report generation"""
         df = analyzer.generate_sample_data(50)
@@ -201,6 +516,41 @@ class TestFAFDataAnalyzer:
         assert "PERFORMANCE METRICS" in report
         assert "Total Operations:" in report
     
+    def test_render_report_formats(self, analyzer, tmp_path):
+        """Test one-pass rendering to every format with top-N truncation"""
+        analysis = analyzer.analyze_performance(analyzer.generate_sample_data(200, seed=12))
+        template = next(iter(analysis['by_file_type'].values()))
+        analysis['by_file_type'] = {f".ext{i}": dict(template, count=i + 1) for i in range(1000)}
+        
+        reports = analyzer.render_reports(analysis, top_n=5)
+        assert set(reports) == {'text', 'markdown', 'html', 'json'}
+        assert "Total Operations: 200" in reports['text']
+        assert "| .ext999 |" in reports['markdown'] and ".ext994" not in reports['markdown']
+        assert "<td>.ext995</td>" in reports['html'] and reports['html'].rstrip().endswith("</html>")
+        assert "995 more (495,510 operations)" in reports['text']
+        
+        data = json.loads(reports['json'])
+        assert data['summary']['total_operations'] == 200
+        assert list(data['by_file_type']['groups']) == [f".ext{i}" for i in range(999, 994, -1)]
+        assert data['by_file_type']['omitted_groups'] == 995
+        assert len(data['by_operation']['groups']) == 5
+        
+        assert analyzer.generate_performance_report(analysis, 'markdown', top_n=5) == reports['markdown']
+        assert analyzer.generate_performance_report(analysis, top_n=None).count(".ext") == 1000
+        
+        paths = analyzer.write_performance_report(analysis, str(tmp_path / "out" / "report.md"),
+                                                  formats=('markdown', 'json'), top_n=5)
+        assert paths == [str(tmp_path / "out" / "report.md"), str(tmp_path / "out" / "report.json")]
+        assert Path(paths[0]).read_text(encoding='utf-8') == reports['markdown']
+        assert json.loads(Path(paths[1]).read_text()) == data
+        with pytest.raises(ValueError):
+            analyzer.render_reports(analysis, formats=('pdf',))
+        
+        # Names and unformattable metrics are escaped in HTML
+        unsafe = dict(analysis, by_operation={"<script>": dict(template, count="a & b")})
+        page = analyzer.generate_performance_report(unsafe, 'html')
+        assert "<script>" not in page and "<td>&lt;script&gt;</td><td>a &amp; b</td>" in page
+    
     def test_export_metrics_csv(self, analyzer, tmp_path):
         """Test CSV export"""
         df = analyzer.generate_sample_data(25)
@@ -216,6 +566,217 @@ class TestFAFDataAnalyzer:
         assert len(df_read) == 25
         assert list(df_read.columns) == list(df.columns)
     
+    def test_export_metrics_csv_chunks(self, analyzer, tmp_path):
+        """Test streaming CSV export from an iterable of frames"""
+        df = analyzer.generate_sample_data(100, seed=5)
+        chunks = (df.iloc[i:i + 30] for i in range(0, len(df), 30))
+        csv_path = tmp_path / "chunked.csv"
+        
+        result = analyzer.export_metrics_csv(chunks, str(csv_path), chunk_size=7)
+        
+        assert "Exported 100 records" in result
+        df_read = pd.read_csv(csv_path)
+        assert len(df_read) == 100
+        assert list(df_read['path']) == list(df['path'])
+    
+    def test_export_metrics_parquet_and_feather(self, analyzer, tmp_path):
+        """Test columnar exports, including day/operation partitioning"""
+        pytest.importorskip("pyarrow")
+        df = analyzer.generate_sample_data(300, seed=9, start_time=datetime(2025, 9, 15))
+        
+        analyzer.export_metrics_parquet(df, str(tmp_path / "metrics.parquet"))
+        single = pd.read_parquet(tmp_path / "metrics.parquet")
+        pd.testing.assert_frame_equal(single, df, check_dtype=False, check_categorical=False)
+        
+        dataset = tmp_path / "dataset"
+        chunks = (df.iloc[i:i + 100] for i in range(0, len(df), 100))
+        result = analyzer.export_metrics_parquet(chunks, str(dataset), partition_by=['day', 'operation'])
+        assert "Exported 300 records" in result
+        assert (dataset / "day=2025-09-15" / "operation=faf_read").is_dir()
+        assert len(pd.read_parquet(dataset)) == 300
+        
+        # Exporting again replaces the dataset rather than adding to it
+        chunks = (df.iloc[i:i + 25] for i in range(0, 50, 25))
+        analyzer.export_metrics_parquet(chunks, str(dataset), partition_by=['operation'])
+        assert not (dataset / "day=2025-09-15").exists()
+        assert len(pd.read_parquet(dataset)) == 50
+        
+        analyzer.export_metrics_feather(df, str(tmp_path / "metrics.feather"))
+        feather = pd.read_feather(tmp_path / "metrics.feather")
+        assert feather['duration_ms'].tolist() == df['duration_ms'].tolist()
+    
+    def test_analyze_files_out_of_core(self, analyzer, tmp_path):
+        """Test chunked file analysis matches in-memory analysis"""
+        df = analyzer.generate_sample_data(5000, seed=11)
+        csv_path = tmp_path / "metrics.csv"
+        analyzer.export_metrics_csv(df, str(csv_path))
+        
+        exact = analyzer.analyze_performance(df)
+        chunked = analyzer.analyze_files(str(csv_path), chunk_size=700)
+        
+        assert chunked['summary']['total_operations'] == 5000
+        assert chunked['summary']['unique_files'] == exact['summary']['unique_files']
+        assert chunked['summary']['time_range'] == exact['summary']['time_range']
+        assert chunked['summary']['success_rate'] == pytest.approx(exact['summary']['success_rate'])
+        assert chunked['performance']['avg_duration_ms'] == pytest.approx(exact['performance']['avg_duration_ms'])
+        assert chunked['performance']['total_bytes_processed'] == exact['performance']['total_bytes_processed']
+        for key in ('median_duration_ms', 'p95_duration_ms', 'p99_duration_ms'):
+            assert chunked['performance'][key] == pytest.approx(exact['performance'][key], rel=0.02)
+        for op, metrics in exact['by_operation'].items():
+            assert chunked['by_operation'][op]['count'] == metrics['count']
+            assert chunked['by_operation'][op]['p95_duration_ms'] == pytest.approx(metrics['p95_duration_ms'], rel=0.02)
+        assert set(chunked['by_file_type']) == set(exact['by_file_type'])
+    
+    def test_analyze_files_parallel(self, analyzer, tmp_path):
+        """Test process-pool analysis merges to the serial result"""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"worker_{i}.csv"
+            analyzer.export_metrics_csv(analyzer.generate_sample_data(400, seed=i), str(path))
+            paths.append(str(path))
+        
+        serial = analyzer.analyze_files(paths)
+        parallel = analyzer.analyze_files_parallel(paths, workers=2)
+        
+        assert parallel['summary']['total_operations'] == 1200
+        assert parallel['summary'] == serial['summary']
+        assert parallel['performance'] == serial['performance']
+        assert parallel['by_operation'] == serial['by_operation']
+    
+    def test_compact_frame(self, analyzer):
+        """Test compact dtypes, interned paths and unchanged analysis"""
+        df = analyzer.generate_sample_data(2000, seed=8)
+        df['path'] = [f"/src/module_{i % 50}.py" for i in range(2000)]
+        df['operation'] = df['operation'].astype(object)
+        
+        compact = analyzer.compact_frame(df)
+        assert isinstance(compact['operation'].dtype, pd.CategoricalDtype)
+        assert isinstance(compact['path'].dtype, pd.CategoricalDtype)
+        assert len(compact['path'].cat.categories) == 50
+        assert compact['duration_ms'].dtype == np.float32
+        assert compact['size_bytes'].dtype == np.uint32
+        assert compact.memory_usage(deep=True).sum() * 2 < df.memory_usage(deep=True).sum()
+        assert compact['path'].tolist() == df['path'].tolist()
+        
+        exact = analyzer.analyze_performance(df)
+        analysis = analyzer.analyze_performance(compact)
+        assert analysis['summary'] == exact['summary']
+        assert analysis['performance']['p95_duration_ms'] == pytest.approx(exact['performance']['p95_duration_ms'])
+        
+        unique = analyzer.compact_frame(analyzer.generate_sample_data(100, seed=8))
+        assert not isinstance(unique['path'].dtype, pd.CategoricalDtype)
+    
+    def test_analysis_memoized_per_frame(self, analyzer):
+        """Test repeated analyses reuse derived statistics until the frame changes"""
+        df = analyzer.generate_sample_data(200, seed=9)
+        first = analyzer.analyze_performance(df)
+        first['summary']['total_operations'] = -1
+        assert analyzer.analyze_performance(df)['summary']['total_operations'] == 200
+        memo = analyzer._frame_stats(df)
+        assert analyzer._frame_stats(df) is memo
+        
+        # In-place edits change the fingerprint, so the memo is not served stale
+        df.loc[0, 'duration_ms'] = 1e6
+        assert analyzer.analyze_performance(df)['performance']['avg_duration_ms'] > 5000
+        df.loc[200] = df.loc[1]
+        assert analyzer.analyze_performance(df)['summary']['total_operations'] == 201
+        
+        analyzer.invalidate(df)
+        assert id(df) not in analyzer._frame_cache
+        analyzer.analyze_performance(df)
+        assert id(df) in analyzer._frame_cache
+        del df
+        assert not analyzer._frame_cache
+    
+    def test_incremental_analysis(self, analyzer):
+        """Test add_operations keeps a running analysis matching a full one"""
+        df = analyzer.generate_sample_data(3000, seed=10)
+        assert analyzer.current_analysis()['summary']['total_operations'] == 0
+        
+        for start in range(0, 3000, 250):
+            analyzer.add_operations(df.iloc[start:start + 250])
+        live = analyzer.current_analysis()
+        exact = analyzer.analyze_performance(df)
+        
+        assert live['summary'] == exact['summary']
+        assert live['performance']['p95_duration_ms'] == pytest.approx(exact['performance']['p95_duration_ms'], rel=0.02)
+        assert {op: m['count'] for op, m in live['by_operation'].items()} == \
+            {op: m['count'] for op, m in exact['by_operation'].items()}
+        
+        live['summary']['total_operations'] = 0
+        record = {'timestamp': '2030-01-01T00:00:00', 'operation': 'read', 'path': 'new.md',
+                  'duration_ms': 5.0, 'size_bytes': 10, 'success': False}
+        assert analyzer.add_operations([record]) == 3001
+        updated = analyzer.current_analysis()
+        assert updated['summary']['total_operations'] == 3001
+        assert updated['by_operation']['read']['success_rate'] == 0
+        assert updated['by_file_type']['.md']['count'] > exact['by_file_type']['.md']['count']
+        
+        analyzer.reset_operations()
+        assert analyzer.current_analysis()['summary']['total_operations'] == 0
+    
+    def test_analyze_windows(self, analyzer):
+        """Test time-bucketed metrics and rolling windows"""
+        df = analyzer.generate_sample_data(480, seed=5, start_time=datetime(2026, 1, 1))
+        hourly = analyzer.analyze_windows(df, freq='1h')
+        
+        assert list(hourly.columns) == ['operations', 'throughput_ops_s', 'error_rate', 'avg_duration_ms',
+                                        'p50_duration_ms', 'p95_duration_ms', 'p99_duration_ms']
+        assert hourly['operations'].sum() == 480
+        assert (hourly['operations'] == 4).all()
+        assert hourly['throughput_ops_s'].iloc[0] == pytest.approx(4 / 3600)
+        first = df.iloc[:4]['duration_ms']
+        assert hourly['p95_duration_ms'].iloc[0] == pytest.approx(first.quantile(0.95))
+        
+        trailing = analyzer.analyze_windows(df, freq='1h', rolling='2h')
+        assert trailing['operations'].iloc[0] == 4
+        assert (trailing['operations'].iloc[1:] == 8).all()
+        
+        by_operation = analyzer.analyze_windows(df, freq='1D', by='operation')
+        assert by_operation['operations'].sum() == 480
+        assert set(by_operation.index.get_level_values(0)) == set(df['operation'].unique())
+    
+    def test_detect_regressions(self, analyzer):
+        """Test latency regressions are flagged against preceding windows"""
+        df = analyzer.generate_sample_data(960, seed=6, start_time=datetime(2026, 1, 1))
+        df.loc[800:839, 'duration_ms'] *= 5  # ten slow hours
+        windows = analyzer.analyze_windows(df, freq='6h')
+        
+        regressions = analyzer.detect_regressions(windows, min_operations=5)
+        slow_start = pd.Timestamp(df['timestamp'].iloc[800]).floor('6h')
+        assert regressions
+        assert {r['window_start'] for r in regressions} <= {str(slow_start + pd.Timedelta(hours=6 * i))
+                                                            for i in range(3)}
+        assert all(r['ratio'] >= 1.5 for r in regressions)
+        
+        clean = analyzer.analyze_windows(
+            analyzer.generate_sample_data(960, seed=6, start_time=datetime(2026, 1, 1)), freq='6h')
+        assert analyzer.detect_regressions(clean, min_operations=5) == []
+    
+    def test_sketches_merge(self):
+        """Test quantile and distinct sketches merge like a single pass"""
+        from faf_data_analyzer import QuantileSketch, DistinctCounter
+        values = np.random.default_rng(0).lognormal(3, 1, 20000)
+        
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        whole.update(values)
+        left.update(values[:5000])
+        right.update(values[5000:])
+        left.merge(right)
+        assert left.quantile(0.99) == whole.quantile(0.99)
+        assert whole.quantile(0.5) == pytest.approx(np.quantile(values, 0.5), rel=0.02)
+        
+        exact = DistinctCounter()
+        exact.update(["a", "b", "a"])
+        assert exact.estimate() == 2
+        
+        first, second = DistinctCounter(exact_limit=1000), DistinctCounter(exact_limit=1000)
+        first.update([f"file_{i}" for i in range(30000)])
+        second.update([f"file_{i}" for i in range(20000, 50000)])
+        first.merge(second)
+        assert first.hashes is None
+        assert first.estimate() == pytest.approx(50000, rel=0.05)
+    
     def test_create_benchmark_suite(self, analyzer):
         """Test benchmark suite creation"""
         benchmark_code = analyzer.create_benchmark_suite()
@@ -270,6 +831,590 @@ class TestFileOperation:
         assert result["success"] is True
 
 
+class TestChangeWatcher:
+    """Test the change journal and directory watchers"""
+    
+    def collect(self, watcher, predicate, timeout=5.0):
+        """Gather events until predicate(events) holds or timeout"""
+        events = []
+        for event in watcher.events(since=0, timeout=timeout):
+            events.append(event)
+            if predicate(events):
+                break
+        return events
+    
+    def test_journal_cursor_and_truncation(self):
+        """Test journal sequencing, resume and overflow detection"""
+        from faf_watcher import ChangeJournal
+        journal = ChangeJournal(max_events=3)
+        for i in range(5):
+            journal.append("created", f"file_{i}.txt")
+        
+        assert journal.last_seq == 5
+        assert [e.seq for e in journal.since(3)] == [4, 5]
+        assert journal.since(5) == []
+        assert journal.is_truncated(0)
+        assert not journal.is_truncated(2)
+        assert [e.path for e in journal.since(0)] == ["file_2.txt", "file_3.txt", "file_4.txt"]
+    
+    def test_journal_wait_async(self):
+        """Test asyncio waiters are woken from another thread"""
+        import threading
+        from faf_watcher import ChangeJournal
+        journal = ChangeJournal()
+        
+        async def scenario():
+            timer = threading.Timer(0.05, journal.append, args=("modified", "a.txt"))
+            timer.start()
+            events = await journal.wait_async(0, timeout=5)
+            idle = await journal.wait_async(journal.last_seq, timeout=0.05)
+            return events, idle
+        
+        events, idle = asyncio.run(scenario())
+        assert [e.path for e in events] == ["a.txt"]
+        assert idle == []
+    
+    @pytest.mark.parametrize("backend", ["polling", "inotify"])
+    def test_watcher_backends(self, tmp_path, backend):
+        """Test create/modify/delete events, including inside new directories"""
+        from faf_watcher import ChangeWatcher, _load_libc
+        if backend == "inotify" and _load_libc() is None:
+            pytest.skip("inotify not available")
+        (tmp_path / "existing.txt").write_text("v1")
+        
+        with ChangeWatcher(tmp_path, backend=backend, poll_interval=0.05) as watcher:
+            seen = set()
+            steps = [
+                (lambda: (tmp_path / "existing.txt").write_text("version 2"),
+                 {("modified", "existing.txt")}),
+                (lambda: (tmp_path / "sub").mkdir(),
+                 {("created", "sub")}),
+                (lambda: (tmp_path / "sub" / "new.txt").write_text("hello"),
+                 {("created", "sub/new.txt")}),
+                (lambda: (tmp_path / "existing.txt").unlink(),
+                 {("deleted", "existing.txt")}),
+            ]
+            for action, expected in steps:
+                action()
+                events = self.collect(
+                    watcher, lambda evs: expected <= seen | {(e.event, e.path) for e in evs}
+                )
+                seen |= {(e.event, e.path) for e in events}
+                assert expected <= seen
+        
+        assert not watcher.running
+    
+    def test_inotify_directory_moves(self, tmp_path):
+        """Test renamed directories keep reporting under their new path"""
+        from faf_watcher import ChangeWatcher, _load_libc
+        if _load_libc() is None:
+            pytest.skip("inotify not available")
+        root = tmp_path / "root"
+        (root / "old" / "deep").mkdir(parents=True)
+        
+        with ChangeWatcher(root, backend="inotify") as watcher:
+            (root / "old").rename(root / "new")
+            (root / "new" / "deep" / "a.txt").write_text("moved")
+            events = self.collect(watcher, lambda evs: any(e.path.endswith("a.txt") for e in evs))
+            assert ("deleted", "old") in {(e.event, e.path) for e in events}
+            assert [e.path for e in events if e.path.endswith("a.txt")] == ["new/deep/a.txt"]
+            
+            # Moved out of the tree: no longer watched under its stale path
+            (root / "new").rename(tmp_path / "outside")
+            (tmp_path / "outside" / "deep" / "b.txt").write_text("gone")
+            (root / "marker.txt").write_text("x")
+            events = self.collect(watcher, lambda evs: any(e.path == "marker.txt" for e in evs))
+            assert not any(e.path.endswith("b.txt") for e in events)
+            
+            root.rename(tmp_path / "elsewhere")
+            events = self.collect(watcher, lambda evs: any(e.event == "overflow" for e in evs))
+            assert events[-1].event == "overflow"
+    
+    def test_bridge_watch(self, tmp_path):
+        """Test the bridge exposes a started watcher over its base path"""
+        bridge = FAFPythonBridge(base_path=str(tmp_path))
+        watcher = bridge.watch(backend="polling", poll_interval=0.05)
+        try:
+            bridge.write_python_report({"ok": True}, "watched.py")
+            events = self.collect(watcher, lambda evs: any(e.path == "watched.py" for e in evs))
+            assert events[0].event == "created"
+        finally:
+            watcher.stop()
+
+
+class TestFAFBenchmark:
+    """Test the importable benchmark harness"""
+    
+    @pytest.fixture
+    def benchmark(self, tmp_path):
+        """Create a fast benchmark instance working in a temporary directory"""
+        from faf_benchmark import FAFBenchmark
+        return FAFBenchmark(samples=5, warmup=1, min_sample_time=0.001, max_time=0.5,
+                            work_dir=str(tmp_path / "bench"), analyzer_rows=500)
+    
+    def test_measure_statistics(self, benchmark):
+        """Test calibration, statistics and confidence interval of one benchmark"""
+        calls = []
+        result = benchmark.measure("append", calls.append, 1, group="custom", params={"n": 1})
+        
+        assert result.ok and result.group == "custom" and result.params == {"n": 1}
+        assert result.loops > 1
+        assert len(calls) >= result.loops * result.samples
+        assert result.samples + result.rejected == 5
+        assert result.min_ms <= result.median_ms <= result.max_ms
+        assert result.ci_low_ms <= result.mean_ms <= result.ci_high_ms
+        assert benchmark.results["append"] is result
+        
+        failed = benchmark.measure("boom", lambda: 1 / 0)
+        assert not failed.ok and "ZeroDivisionError" in failed.error
+    
+    def test_reject_outliers(self):
+        """Test Tukey fences drop only the extreme samples"""
+        from faf_benchmark import reject_outliers, bootstrap_ci
+        timings = np.array([1.0, 1.1, 0.9, 1.05, 0.95, 1.0, 25.0])
+        kept = reject_outliers(timings)
+        assert 25.0 not in kept and len(kept) == 6
+        low, high = bootstrap_ci(kept)
+        assert low <= kept.mean() <= high
+    
+    def test_stat_benchmark(self, benchmark):
+        """Test the snapshot patterns make fewer stat calls than repeated stats"""
+        results = benchmark.benchmark_stat_operations(requests=8, threads=2, list_files=10)
+        
+        assert all(result.ok for result in results.values())
+        calls = {name: result.metadata['stat_calls'] for name, result in results.items()}
+        assert calls['stat_read_repeated'] == 4 and calls['stat_read_snapshot'] == 1
+        assert calls['stat_metadata_repeated'] == 2 and calls['stat_metadata_snapshot'] == 1
+        assert calls['stat_list_repeated'] == 2 + 4 * 10 and calls['stat_list_snapshot'] == 10
+        assert 'stat_calls' not in results['stat_read_snapshot'].params
+        with pytest.raises(ValueError):
+            benchmark.benchmark_stat_operations(patterns=("walk",))
+    
+    def test_startup_benchmark(self, benchmark):
+        """Test cold-start timings and that imports stay light and side-effect free"""
+        results = benchmark.benchmark_startup_operations({
+            'interpreter': 'pass',
+            'faf_data_analyzer': 'import faf_data_analyzer',
+            'faf_api_server': 'import faf_api_server',
+            'broken': 'import faf_missing_module'
+        })
+        
+        assert all(results[f'startup_{name}'].ok for name in ('interpreter', 'faf_data_analyzer', 'faf_api_server'))
+        assert results['startup_interpreter'].metadata['heavy_modules'] == []
+        assert results['startup_faf_data_analyzer'].metadata['heavy_modules'] == []
+        server_modules = results['startup_faf_api_server'].metadata['heavy_modules']
+        assert 'fastapi' in server_modules and 'uvicorn' not in server_modules
+        assert not (benchmark.work_dir / "faf_storage").exists()
+        assert not results['startup_broken'].ok
+        assert results['startup_interpreter'].mean_ms <= results['startup_faf_api_server'].mean_ms
+    
+    def test_groups_and_results_file(self, benchmark, tmp_path):
+        """Test bridge and analyzer groups run and save machine-readable results"""
+        results = benchmark.run_full_benchmark(("json", "analyzer"))
+        assert {"json_read_large", "json_write_small", "analyze_performance", "render_reports"} <= set(results)
+        assert all(result.ok for result in results.values())
+        assert "JSON OPERATIONS" in benchmark.generate_report(results)
+        
+        saved = json.loads(Path(benchmark.save_results(results, str(tmp_path / "results.json"))).read_text())
+        assert saved["environment"]["cpu_count"] == os.cpu_count()
+        assert saved["results"]["json_read_large"]["params"] == {"records": 1000}
+        
+        with pytest.raises(ValueError):
+            benchmark.run_full_benchmark(("gpu",))
+    
+    def test_concurrent_benchmarks(self, benchmark):
+        """Test thread, process and asyncio modes report scaling efficiency"""
+        results = benchmark.benchmark_concurrency_operations(workloads=("write", "json"), levels=(1, 2),
+                                                             operations=4)
+        assert len(results) == 12
+        assert all(result.ok for result in results.values()), [r.error for r in results.values()]
+        for mode in ("thread", "process", "asyncio"):
+            assert results[f"json_{mode}_x1"].efficiency == pytest.approx(1.0)
+            scaled = results[f"write_{mode}_x2"]
+            assert scaled.params == {"workload": "write", "mode": mode, "parallelism": 2, "operations": 4}
+            assert scaled.efficiency > 0
+        assert (benchmark.work_dir / "concurrent_write.txt.1").exists()
+        assert "eff 100%" in benchmark.generate_report(results)
+        with pytest.raises(ValueError):
+            benchmark.benchmark_concurrency_operations(modes=("gpu",))
+    
+    def test_results_store_and_compare(self, benchmark, tmp_path, capsys):
+        """Test runs are stored by commit/machine and regressions are flagged"""
+        from faf_benchmark import BenchmarkResult, BenchmarkStore, main
+        rng = np.random.default_rng(1)
+        
+        def run(read_ms, write_ms):
+            return {name: benchmark._summarize(name, "custom", {"size": 1}, 10, rng.normal(ms, ms * 0.02, 30))
+                    for name, ms in (("read", read_ms), ("write", write_ms))}
+        
+        db = str(tmp_path / "history.db")
+        with BenchmarkStore(db) as store:
+            base = store.add_run(run(1.0, 2.0), benchmark.settings(), commit="aaa111", dirty=False)
+            # Measured metadata differs between runs without changing the key
+            slower = run(1.3, 2.0)
+            slower["read"].metadata["heavy_modules"] = ["pandas"]
+            head = store.add_run(slower, benchmark.settings(), commit="bbb222", label="v2")
+            
+            assert store.resolve_run("aaa") == base
+            assert store.resolve_run("v2") == store.resolve_run("latest") == head
+            assert store.resolve_run("previous") == base
+            assert store.runs()[0]["git_commit"] == "bbb222"
+            assert store.load_results(base)[("read", '{"size": 1}')].p99_ms > 1.0
+            assert store.load_results(head)[("read", '{"size": 1}')].metadata == {"heavy_modules": ["pandas"]}
+            
+            comparisons = {(c.name, c.metric): c for c in store.compare(base, head)}
+            assert len(comparisons) == 6
+            assert comparisons[("read", "mean")].status == "regression"
+            assert comparisons[("read", "p99")].change_pct > 20
+            assert comparisons[("write", "median")].status == "unchanged"
+            assert store.compare(head, base)[0].status == "improvement"
+            with pytest.raises(LookupError):
+                store.resolve_run("ccc")
+            
+            # A crashed or dropped benchmark is reported, not skipped
+            broken = {"write": BenchmarkResult.failed("write", "custom", {"size": 1}, "boom")}
+            store.add_run(broken, benchmark.settings(), commit="ccc333")
+            statuses = {(c.name, c.status, c.detail) for c in store.compare(head, "ccc333")}
+            assert statuses == {("read", "missing", "not in head run"), ("write", "failed", "boom")}
+        
+        assert main(["compare", "aaa111", "bbb222", "--db", db]) == 1
+        assert "3 regressions" in capsys.readouterr().out
+        assert main(["compare", "bbb222", "bbb222", "--db", db]) == 0
+        assert "0 regressions" in capsys.readouterr().out
+        assert main(["compare", "bbb222", "ccc333", "--db", db]) == 1
+        assert "1 benchmarks failed in head, 1 missing from head" in capsys.readouterr().out
+        # A benchmark only the head run has is reported but does not fail the gate
+        assert main(["compare", "ccc333", "bbb222", "--db", db, "--json"]) == 0
+        statuses = {(c["name"], c["status"]) for c in json.loads(capsys.readouterr().out)}
+        assert statuses == {("read", "new"), ("write", "recovered")}
+
+
+class TestAPIServer:
+    """Test the FastAPI server endpoints"""
+    
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Create a test client serving a temporary storage directory"""
+        pytest.importorskip("fastapi")
+        pytest.importorskip("httpx")
+        monkeypatch.chdir(tmp_path)
+        import faf_api_server
+        from fastapi.testclient import TestClient
+        
+        storage = tmp_path / "storage"
+        storage.mkdir()
+        monkeypatch.setattr(faf_api_server, "BASE_PATH", storage)
+        monkeypatch.setattr(faf_api_server, "_watcher", None)
+        with TestClient(faf_api_server.app) as test_client:
+            yield test_client
+        if faf_api_server._watcher is not None:
+            faf_api_server._watcher.stop()
+    
+    def test_events_long_poll(self, client):
+        """Test /api/events returns changes after the cursor"""
+        first = client.get("/api/events", params={"timeout": 0}).json()
+        cursor = first["data"]["cursor"]
+        assert first["data"]["events"] == []
+        
+        client.post("/api/write", json={"path": "notes/a.md", "content": "# hi"})
+        body = client.get("/api/events", params={"since": cursor, "timeout": 5}).json()
+        
+        assert body["data"]["cursor"] > cursor
+        assert "notes" in {e["path"].split("/")[0] for e in body["data"]["events"]}
+
+
+    def test_access_metrics(self, client, tmp_path, monkeypatch):
+        """Test request timings are recorded in operation-record shape"""
+        import faf_api_server
+        faf_api_server.access_metrics.clear()
+        monkeypatch.setattr(faf_api_server, "ACCESS_LOG_PATH", str(tmp_path / "access.jsonl"))
+        client.post("/api/write", json={"path": "a.md", "content": "# hello"})
+        client.get("/api/metadata/a.md")
+        client.get("/api/metadata/missing.md")
+        client.post("/api/read", json={"path": "a.md"})
+        
+        records = client.get("/api/metrics").json()["data"]
+        assert [r["operation"] for r in records] == ["api_write", "api_metadata", "api_metadata", "api_read"]
+        assert [r["success"] for r in records] == [True, True, False, True]
+        assert [r["path"] for r in records] == ["a.md", "a.md", "missing.md", "a.md"]
+        
+        df = FAFDataAnalyzer().ingest_operations(records)
+        assert df['duration_ms'].gt(0).all()
+        assert list(df['file_type']) == ['.md', '.md', '.md', '.md']
+        
+        # The access log is written by a background thread; close() flushes it
+        faf_api_server._access_log.close()
+        monkeypatch.setattr(faf_api_server, "_access_log", None)
+        logged = [json.loads(line) for line in (tmp_path / "access.jsonl").read_text().splitlines()]
+        assert logged[:4] == records
+        
+        performance = client.get("/api/stats").json()["performance"]
+        assert performance["avg_write_ms"] == pytest.approx(records[0]["duration_ms"], abs=0.01)
+        assert performance["avg_read_ms"] == pytest.approx(records[3]["duration_ms"], abs=0.01)
+    
+    def test_access_metrics_running_means(self):
+        """Test mean latencies follow the retained window as records are evicted"""
+        pytest.importorskip("fastapi")
+        from faf_api_server import AccessMetrics
+        metrics = AccessMetrics(maxlen=3)
+        for duration, success in [(100, True), (2, True), (4, True), (50, False), (6, True)]:
+            metrics.append({"operation": "api_read", "duration_ms": duration, "success": success})
+        
+        assert metrics.mean_latency("api_read") == 5.0  # 100 and 2 evicted, 50 failed
+        assert metrics.mean_latency("api_write") is None
+        metrics.clear()
+        assert metrics.mean_latency("api_read") is None
+    
+    def test_read_bytes_and_msgpack(self, client, tmp_path, monkeypatch):
+        """Test bytes mode never decodes and msgpack is negotiated via Accept"""
+        import base64
+        import msgpack
+        from faf_api_server import negotiate
+        blob = bytes(range(256)) * 4
+        (tmp_path / "storage" / "blob.txt").write_bytes(blob)
+        
+        assert client.post("/api/read", json={"path": "blob.txt"}).status_code == 500
+        body = client.post("/api/read", json={"path": "blob.txt", "mode": "bytes"}).json()
+        assert base64.b64decode(body["data"]["content"]) == blob and body["data"]["binary"]
+        
+        response = client.post("/api/read", json={"path": "blob.txt", "mode": "bytes"},
+                               headers={"Accept": "application/octet-stream"})
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.content == blob
+        import faf_api_server
+        monkeypatch.setattr(faf_api_server, "PASSTHROUGH_STREAM_BYTES", 100)
+        streamed = client.post("/api/read", json={"path": "blob.txt", "mode": "bytes"},
+                               headers={"Accept": "application/octet-stream"})
+        assert streamed.content == blob and "etag" in streamed.headers
+        
+        response = client.post("/api/read", json={"path": "blob.txt", "mode": "bytes"},
+                               headers={"Accept": "application/msgpack"})
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)["data"]["content"] == blob
+        
+        client.post("/api/write", json={"path": "a.md", "content": 'say "hi"\n' * 100})
+        response = client.post("/api/read", json={"path": "a.md"}, headers={"Accept": "application/x-msgpack"})
+        assert msgpack.unpackb(response.content)["data"]["content"] == 'say "hi"\n' * 100
+        assert client.post("/api/read", json={"path": "a.md", "mode": "hex"}).status_code == 422
+        assert "application/json" in client.get("/api/list", headers={"Accept": "text/html"}).headers["content-type"]
+        
+        assert negotiate("application/msgpack;q=0.5, application/json") == "application/json"
+        assert negotiate("*/*, application/msgpack") == "application/msgpack"
+        assert negotiate("application/msgpack;q=0, */*") == "application/json"
+        assert negotiate(None) == "application/json"
+    
+    def test_admission_control(self, client, monkeypatch):
+        """Test rate-limited clients get 429 + Retry-After while others are served"""
+        import faf_api_server
+        from faf_admission import AdmissionController
+        assert client.get("/api/stats").json()["admission"] is None
+        
+        monkeypatch.setattr(faf_api_server, "admission",
+                            AdmissionController(rate=0.01, burst=5, api_keys={"greedy", "polite"}))
+        assert client.get("/api/stats", headers={"X-API-Key": "greedy"}).status_code == 200
+        limited = client.get("/api/list", headers={"X-API-Key": "greedy"})
+        assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+        
+        stats = client.get("/api/stats", headers={"X-API-Key": "polite"}).json()["admission"]
+        assert stats["rate_limited"] == 1 and stats["clients"] == 2
+        assert stats["classes"]["expensive"]["active"] == 1
+        assert [r["status"] for r in faf_api_server.access_metrics][-2:] == [429, 200]
+    
+    def test_admission_slot_held_while_streaming(self, monkeypatch):
+        """Test the concurrency slot is held until the last body chunk, then released once"""
+        import faf_api_server
+        from faf_admission import AdmissionController
+        controller = AdmissionController()
+        monkeypatch.setattr(faf_api_server, "admission", controller)
+        limiter = controller.limiters["expensive"]
+        active = []
+        
+        async def streaming_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for chunk in (b"a", b"b"):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                active.append(limiter.active)
+            await send({"type": "http.response.body", "body": b""})
+            active.append(limiter.active)
+        
+        async def failing_app(scope, receive, send):
+            raise RuntimeError("boom")
+        
+        async def call(app):
+            scope = {"type": "http", "method": "GET", "path": "/api/download/big.bin", "headers": [],
+                     "query_string": b"", "client": ("10.0.0.1", 1), "server": ("test", 80), "scheme": "http"}
+            
+            async def receive():
+                return {"type": "http.request", "body": b""}
+            
+            async def send(message):
+                pass
+            
+            await faf_api_server.RequestInstrumentation(app)(scope, receive, send)
+        
+        asyncio.run(call(streaming_app))
+        assert active == [1, 1, 0]
+        with pytest.raises(RuntimeError):
+            asyncio.run(call(failing_app))
+        assert limiter.stats()["active"] == 0
+    
+    def test_request_profiling(self, client, tmp_path, monkeypatch):
+        """Test profiling is off by default and opt-in via env var or header"""
+        import faf_api_server
+        import faf_profiling
+        monkeypatch.setattr(faf_profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+        client.post("/api/write", json={"path": "a.md", "content": "# hello"})
+        
+        response = client.post("/api/read", json={"path": "a.md"}, headers={"X-FAF-Profile": "cprofile"})
+        assert "X-FAF-Profile-Output" not in response.headers
+        assert not (tmp_path / "profiles").exists()
+        
+        monkeypatch.setattr(faf_api_server, "PROFILE_HEADER_ENABLED", True)
+        response = client.post("/api/read", json={"path": "a.md"}, headers={"X-FAF-Profile": "cprofile"})
+        assert response.json()["success"]
+        output = Path(response.headers["X-FAF-Profile-Output"])
+        assert output.name.endswith("POST_api_read.prof") and output.exists()
+        assert client.get("/api/list", headers={"X-FAF-Profile": "flame"}).status_code == 400
+        
+        monkeypatch.setattr(faf_api_server, "PROFILE_MODE", "sampling")
+        response = client.get("/api/metadata/a.md")
+        assert response.headers["X-FAF-Profile-Output"].endswith("GET_api_metadata.folded")
+        assert "X-FAF-Profile-Output" not in client.get("/").headers
+    
+    def test_request_tracing(self, client, tmp_path):
+        """Test API requests export validate/stat/read/decode/serialize spans as OTLP JSON"""
+        import faf_tracing
+        trace_file = tmp_path / "traces.jsonl"
+        exporter = faf_tracing.JsonLinesExporter(str(trace_file))
+        previous = faf_tracing.configure(exporter)
+        try:
+            client.post("/api/write", json={"path": "a.md", "content": "# hello\r\nworld"})
+            parent = "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"
+            body = client.post("/api/read", json={"path": "a.md"}, headers={"traceparent": parent}).json()
+            client.get("/api/metadata/missing.md")
+        finally:
+            faf_tracing.configure(previous)
+            exporter.close()
+        
+        assert body["data"]["content"] == "# hello\nworld"
+        spans = faf_tracing.read_spans(str(trace_file))
+        read = [s for s in spans if s["traceId"] == "ab" * 16]
+        assert [s["name"] for s in read] == ["validate", "open", "stat", "read", "decode", "serialize", "POST /api/read"]
+        root = read[-1]
+        assert root["parentSpanId"] == "cd" * 8 and root["kind"] == "SPAN_KIND_SERVER"
+        assert all(s["parentSpanId"] == root["spanId"] for s in read[:-1])
+        assert {"key": "http.response.status_code", "value": {"intValue": "200"}} in root["attributes"]
+        
+        phases = faf_tracing.summarize_phases(spans)
+        assert set(phases) == {"POST /api/write", "POST /api/read", "GET /api/metadata/{path:path}"}
+        assert set(phases["POST /api/write"]) == {"validate", "encode", "mkdir", "write", "serialize", "POST /api/write"}
+        assert set(phases["GET /api/metadata/{path:path}"]) == {"validate", "stat", "GET /api/metadata/{path:path}"}
+    
+    def test_load_test_sweep(self, tmp_path, monkeypatch):
+        """Test the in-process load generator sweeps every endpoint"""
+        pytest.importorskip("fastapi")
+        pytest.importorskip("httpx")
+        monkeypatch.chdir(tmp_path)
+        from faf_load_test import LoadTester, LOAD_ENDPOINTS
+        
+        tester = LoadTester(requests=8, warmup=2)
+        results = tester.run(concurrency=(1, 4), payload_sizes={'1KB': 1024, '4KB': 4096})
+        
+        # list ignores payload size: 2 concurrency levels x (4 endpoints x 2 sizes + 1)
+        assert len(results) == 18
+        assert {r.endpoint for r in results} == set(LOAD_ENDPOINTS)
+        assert all(r.errors == 0 and r.requests == 8 for r in results)
+        assert all(r.p50_ms <= r.p99_ms <= r.max_ms and r.throughput_rps > 0 for r in results)
+        
+        saved = json.loads(Path(tester.save_results(results, str(tmp_path / "load.json"))).read_text())
+        assert saved["target"] == "in-process (ASGI)"
+        assert saved["results"][0]["endpoint"] == "read"
+        assert "upload" in tester.generate_report(results)
+        with pytest.raises(ValueError):
+            tester.run(endpoints=("delete",))
+
+
+class TestAdmissionControl:
+    """Test rate limiting, fair queuing and load shedding"""
+    
+    def test_fair_queuing(self):
+        """Test a queued client is served between an aggressive client's requests"""
+        from faf_admission import FairLimiter
+        
+        async def scenario():
+            limiter = FairLimiter(1, queue_limit=20, client_queue_limit=10, timeout=5)
+            order = []
+            
+            async def request(client, i):
+                await limiter.acquire(client)
+                order.append((client, i))
+                await asyncio.sleep(0)
+                limiter.release()
+            
+            await limiter.acquire("holder")
+            tasks = [asyncio.create_task(request("greedy", i)) for i in range(10)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.create_task(request("polite", 0)))
+            await asyncio.sleep(0)
+            queued = limiter.stats()
+            limiter.release()
+            await asyncio.gather(*tasks)
+            return order, queued, limiter.stats()
+        
+        order, queued, idle = asyncio.run(scenario())
+        assert order[:2] == [("greedy", 0), ("polite", 0)]
+        assert [i for client, i in order if client == "greedy"] == list(range(10))
+        assert queued["queued"] == 11 and queued["waiting_clients"] == 2
+        assert idle["active"] == 0 and idle["queued"] == 0
+    
+    def test_load_shedding(self):
+        """Test full queues and queue timeouts shed with 503 and leave no waiters behind"""
+        from faf_admission import AdmissionRejected, FairLimiter
+        
+        async def scenario():
+            limiter = FairLimiter(1, queue_limit=2, client_queue_limit=1, timeout=0.05)
+            await limiter.acquire("holder")
+            waiter = asyncio.create_task(limiter.acquire("a"))
+            await asyncio.sleep(0)
+            errors = []
+            for client in ("a", "b", "c"):
+                try:
+                    await asyncio.wait_for(limiter.acquire(client), 1)
+                except AdmissionRejected as e:
+                    errors.append((client, e.status_code, e.reason))
+            with pytest.raises(AdmissionRejected):
+                await waiter
+            return errors, limiter.stats()
+        
+        errors, stats = asyncio.run(scenario())
+        assert [(client, status) for client, status, _ in errors] == [("a", 503), ("b", 503), ("c", 503)]
+        assert "queue full" in errors[0][2] and "timed out" in errors[1][2]
+        assert stats["queued"] == 0 and stats["active"] == 1 and stats["shed"] == 4
+    
+    def test_token_buckets(self):
+        """Test per-client buckets, endpoint costs and Retry-After"""
+        from faf_admission import AdmissionController, AdmissionRejected
+        controller = AdmissionController(rate=0.5, burst=5, api_keys={"k1"})
+        
+        assert controller.endpoint_class("/api/metadata/a.md") == "expensive"
+        assert controller.endpoint_class("/api/read") == "cheap"
+        assert controller.client_id("k1", "10.0.0.1") == "key:k1"
+        assert controller.client_id(None, "10.0.0.1") == "addr:10.0.0.1"
+        assert controller.client_id("minted", "10.0.0.1") == "addr:10.0.0.1"
+        
+        controller.check_rate("key:a", 5)
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.check_rate("key:a", 1)
+        assert exc_info.value.status_code == 429 and exc_info.value.retry_after >= 1
+        controller.check_rate("key:b", 1)
+        assert controller.stats()["rate_limited"] == 1 and controller.stats()["clients"] == 2
+        
+        # Rotating unknown keys from one address share that address's bucket
+        controller.check_rate(controller.client_id("fresh-1", "10.0.0.9"), 5)
+        with pytest.raises(AdmissionRejected):
+            controller.check_rate(controller.client_id("fresh-2", "10.0.0.9"), 1)
+
+
 class TestIntegration:
     """Integration tests for FAF File Tools"""
     